@@ -0,0 +1,8 @@
+"""Micro-benchmarks for the backend.
+
+Run individual benchmarks as modules from the ``backend`` directory, e.g.
+``python -m benchmarks.json_encoding``. ``benchmarks.hot_paths`` covers the
+ranking read, fit and import paths and can check results against a stored
+baseline. ``benchmarks.load_test`` drives concurrent voting sessions against
+a live server.
+"""
@@ -0,0 +1,151 @@
+"""Concurrent-connection capacity of the WSGI and ASGI serving paths.
+
+For each level in ``--levels`` the benchmark holds that many live ranking
+event streams (``/ranking/<uid>/events``) open, then issues ``--requests``
+``GET /compare/<uid>`` calls from ``--clients`` concurrent clients and
+reports how many streams were established and the latency and error rate
+of the requests made next to them.
+
+Both servers are spawned on fresh databases with the same ``--workers``
+and ``--threads`` per worker: gunicorn's threaded worker for ``wsgi``, where
+every open stream holds one of the threads, and uvicorn running
+``webrankit.asgi`` for ``asgi``, where idle streams hold no thread. Needs
+gunicorn and uvicorn installed.
+
+Usage: ``python -m benchmarks.connections [--server both] [--workers 1
+--threads 32] [--levels 0 16 32 64 128 256] [--json-out results.json]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+from .load_test import (
+    SERVERS,
+    LoadTestError,
+    Session,
+    Stats,
+    _percentile,
+    spawned_server,
+)
+
+
+def open_streams(base_url: str, ranking_id: str, token: str, count: int, timeout: float) -> List[Any]:
+    """Open ``count`` event streams; returns those whose headers arrived in time."""
+    url = f"{base_url}/ranking/{ranking_id}/events"
+
+    def connect(_: int) -> Any:
+        try:
+            response = requests.get(url, params={"jwt": token}, stream=True, timeout=timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            response.close()
+            return None
+        return response
+
+    if not count:
+        return []
+    with ThreadPoolExecutor(max_workers=min(count, 64)) as pool:
+        return [stream for stream in pool.map(connect, range(count)) if stream is not None]
+
+
+def measure(session: Session, total: int, clients: int, timeout: float) -> Dict[str, float]:
+    """Latency of ``total`` pair requests from ``clients`` concurrent clients."""
+
+    def one(_: int) -> Tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            ok = session.http.get(
+                f"{session.base_url}/compare/{session.ranking_id}", timeout=timeout
+            ).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outcomes = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for latency, _ in outcomes)
+    errors = sum(not ok for _, ok in outcomes)
+    return {
+        "throughput": total / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "error_rate": errors / total,
+    }
+
+
+def run(base_url: str, levels: List[int], total: int, clients: int, timeout: float) -> List[Dict[str, Any]]:
+    session = Session(base_url, uuid.uuid4().hex[:8], 0, 20, Stats())
+    session.setup()
+    token = session.http.headers["Authorization"].split(" ", 1)[1]
+    rows = []
+    for level in levels:
+        streams = open_streams(base_url, session.ranking_id, token, level, timeout)
+        try:
+            row = {"streams": level, "held": len(streams), **measure(session, total, clients, timeout)}
+        finally:
+            for stream in streams:
+                stream.close()
+        print(
+            f"{level:>8}{row['held']:>8}{row['throughput']:>10.1f}"
+            f"{row['p50_ms']:>9.1f}ms{row['p99_ms']:>9.1f}ms{row['error_rate']:>8.1%}"
+        )
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=(*SERVERS, "both"), default="both")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes.")
+    parser.add_argument("--threads", type=int, default=32, help="Handler threads per worker.")
+    parser.add_argument(
+        "--levels", type=int, nargs="+", default=[0, 16, 32, 64, 128, 256],
+        help="Open event streams to measure at.",
+    )  # fmt: skip
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level.")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent requesting clients.")
+    parser.add_argument("--timeout", type=float, default=5, help="Seconds before a call fails.")
+    parser.add_argument("--port", type=int, default=5058, help="Port to serve on.")
+    parser.add_argument("--database-url", help="Database (default: temporary SQLite).")
+    parser.add_argument("--json-out", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {}
+    servers = SERVERS if args.server == "both" else (args.server,)
+    try:
+        for server in servers:
+            print(f"== {server}: {args.workers} worker(s) x {args.threads} thread(s)")
+            print(f"{'streams':>8}{'held':>8}{'req/s':>10}{'p50':>11}{'p99':>11}{'errors':>9}")
+            with tempfile.TemporaryDirectory() as tmp:
+                database_url = args.database_url or f"sqlite:///{tmp}/connections.db"
+                with spawned_server(
+                    args.port, args.workers, database_url, server, args.threads
+                ) as base_url:
+                    results[server] = run(
+                        base_url, args.levels, args.requests, args.clients, args.timeout
+                    )
+    except LoadTestError as e:
+        sys.exit(str(e))
+
+    if args.json_out:
+        with open(args.json_out, "w") as fh:
+            json.dump(
+                {"workers": args.workers, "threads": args.threads, "servers": results}, fh, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""Benchmark the ranking hot paths on synthetic rankings.
+
+Rankings of each size are generated in a temporary SQLite database with a
+sparse (about 2 comparisons per item) or dense (about 20 per item)
+comparison graph. For every case the fastest of ``--repeat`` runs is
+reported together with the number of SQL queries and the peak Python heap
+use of one extra traced run. Cold cases drop the fitted model from every
+cache, including snapshots, so they measure a full fit;
+``get_pairwise_model_shared`` drops it from the process only and measures
+loading it from the cache shared between workers.
+
+Results can be stored as a baseline and later runs checked against it;
+a case regresses when its time, query count or peak memory exceeds the
+baseline by more than ``--tolerance``. Query counts are near-deterministic
+but timings are machine specific, so record the baseline on the machine
+you compare on.
+
+Usage: ``python -m benchmarks.hot_paths [--sizes 100 1000 10000]
+[--cases ranking_get ...] [--save-baseline | --check]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask
+from flask_jwt_extended import create_access_token
+
+from webrankit import create_app
+from webrankit.cache import model_cache
+from webrankit.database import db_proxy
+from webrankit.datasource import FileDatasource
+from webrankit.model import Comparison, Item, Ranking, User
+from webrankit.pairwise import PairwiseModel
+from webrankit.shared_cache import shared_model_cache
+from webrankit.snapshots import model_snapshots
+
+BASELINE_PATH = Path(__file__).with_name("baselines") / "hot_paths.json"
+GRAPHS = {"sparse": 2, "dense": 20}  # comparisons per item
+INSERT_BATCH = 500
+
+
+@dataclass
+class Result:
+    case: str
+    graph: str
+    items: int
+    seconds: float
+    queries: int
+    peak_kib: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}/{self.graph}/{self.items}"
+
+
+@dataclass
+class Case:
+    """``setup`` runs untimed before every run and feeds ``run``."""
+
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+
+
+class QueryCounter:
+    """Counts statements executed on ``db_proxy``."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.enabled = False
+        database = db_proxy.obj
+        execute_sql = database.execute_sql
+
+        def counting_execute_sql(sql: str, params: Any = None, *args: Any, **kwargs: Any):
+            if self.enabled:
+                self.count += 1
+            return execute_sql(sql, params, *args, **kwargs)
+
+        database.execute_sql = counting_execute_sql
+
+    @contextmanager
+    def counting(self) -> Iterator["QueryCounter"]:
+        self.count = 0
+        self.enabled = True
+        try:
+            yield self
+        finally:
+            self.enabled = False
+
+
+def _batched(rows: List[Dict[str, Any]], size: int = INSERT_BATCH) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def generate_ranking(user: User, n: int, per_item: int, rng: random.Random) -> Ranking:
+    """A ranking of ``n`` items whose comparison graph is connected.
+
+    Items are chained in random order, then random extra pairs are added
+    until there are about ``per_item * n / 2`` distinct pairs. Outcomes
+    follow a Bradley-Terry model over hidden abilities.
+    """
+    ranking = Ranking.create(
+        user=user, name=f"bench-{n}-{per_item}-{uuid.uuid4().hex[:6]}", item_count=n
+    )
+    ids = [uuid.uuid4() for _ in range(n)]
+    skill = {item_id: rng.gauss(0, 1.5) for item_id in ids}
+    with db_proxy.atomic():
+        for batch in _batched(
+            [
+                {
+                    "id": item_id,
+                    "ranking": ranking.id,
+                    "label": f"Item {idx}",
+                    "img_url": f"https://example.invalid/img/{idx}.jpg",
+                    "init_rating": rng.randint(0, 10),
+                }
+                for idx, item_id in enumerate(ids)
+            ]
+        ):
+            Item.insert_many(batch).execute()
+
+    order = ids[:]
+    rng.shuffle(order)
+    pairs = set(zip(order, order[1:]))
+    target = min(max(per_item * n // 2, n - 1), n * (n - 1) // 2)
+    while len(pairs) < target:
+        a, b = rng.sample(ids, 2)
+        if (b, a) not in pairs:
+            pairs.add((a, b))
+
+    rows = []
+    for a, b in pairs:
+        item1, item2 = sorted((a, b), key=str)
+        games = rng.randint(1, 3)
+        p1 = 1 / (1 + math.exp(skill[item2] - skill[item1]))
+        wins1 = sum(rng.random() < p1 for _ in range(games))
+        rows.append(
+            {
+                "ranking": ranking.id,
+                "item1": item1,
+                "item2": item2,
+                "win1_count": wins1,
+                "win2_count": games - wins1,
+                "draw_count": 0,
+            }
+        )
+    with db_proxy.atomic():
+        for batch in _batched(rows):
+            Comparison.insert_many(batch).execute()
+    Ranking.bump_version(ranking.id)
+    return Ranking.get_by_id(ranking.id)
+
+
+def unfitted_model(ranking: Ranking) -> PairwiseModel:
+    model = PairwiseModel()
+    for comp in ranking.comparisons:
+        id1, id2 = str(comp.item1_id), str(comp.item2_id)
+        model.draw(id1, id2, comp.draw_count)
+        model.win(id1, id2, comp.win1_count)
+        model.win(id2, id1, comp.win2_count)
+    return model
+
+
+def import_lines(n: int) -> List[str]:
+    return [json.dumps({"label": f"Import {idx}", "rating": idx % 11}) for idx in range(n)]
+
+
+def ranking_cases(app: Flask, ranking: Ranking, headers: Dict[str, str]) -> List[Case]:
+    client = app.test_client()
+    fitted: Dict[str, PairwiseModel] = {}
+
+    def cold_cache() -> Ranking:
+        model_cache.clear()
+        shared_model_cache.invalidate(ranking.id)
+        model_snapshots.delete(ranking.id)
+        return ranking
+
+    def warm_cache() -> None:
+        ranking.get_pairwise_model()
+
+    def shared_cache() -> Ranking:
+        ranking.get_pairwise_model()
+        model_cache.clear()
+        return ranking
+
+    def fitted_model() -> PairwiseModel:
+        if "model" not in fitted:
+            fitted["model"] = ranking.get_pairwise_model()
+        return fitted["model"]
+
+    def get(path: str) -> None:
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.status_code
+        response.get_data()  # drain streamed bodies
+
+    def next_comparisons(model: PairwiseModel) -> None:
+        for _ in range(100):
+            model.next_comparison()
+
+    return [
+        Case("get_pairwise_model", cold_cache, lambda r: r.get_pairwise_model()),
+        Case("get_pairwise_model_shared", shared_cache, lambda r: r.get_pairwise_model()),
+        Case("update_model", lambda: unfitted_model(ranking), lambda m: m.update_model()),
+        Case("next_comparison_x100", fitted_model, next_comparisons),
+        Case("ranking_get", warm_cache, lambda _: get(f"/ranking/{ranking.id}")),
+        Case("ranking_get_cold", cold_cache, lambda _: get(f"/ranking/{ranking.id}")),
+        Case("statistics_get", warm_cache, lambda _: get(f"/ranking/{ranking.id}/statistics")),
+    ]
+
+
+def import_case(user: User, n: int) -> Case:
+    lines = import_lines(n)
+
+    def fresh_ranking() -> Ranking:
+        return Ranking.create(user=user, name=f"import-{uuid.uuid4().hex[:8]}", datasource="file")
+
+    return Case("bulk_import", fresh_ranking, lambda r: r.import_items(FileDatasource(lines)))
+
+
+def measure(case: Case, counter: QueryCounter, repeat: int) -> Tuple[float, int, float]:
+    best = math.inf
+    for _ in range(repeat):
+        arg = case.setup()
+        start = time.perf_counter()
+        case.run(arg)
+        best = min(best, time.perf_counter() - start)
+
+    arg = case.setup()
+    tracemalloc.start()
+    with counter.counting():
+        case.run(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, counter.count, peak / 1024
+
+
+def run(sizes: List[int], graphs: List[str], cases: Optional[List[str]], repeat: int) -> List[Result]:
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(
+            {
+                "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+                "JWT_SECRET_KEY": "benchmark-secret-benchmark-secret",
+                "TESTING": True,
+                # Keep generated files in the temporary directory.
+                "MODEL_SNAPSHOT_DIR": f"{tmp}/model-snapshots",
+                "SHARED_MODEL_CACHE_DIR": f"{tmp}/shared-models",
+                "THUMBNAIL_DIR": "",
+            }
+        )
+        with app.app_context():
+            db_proxy.connect(reuse_if_open=True)
+            db_proxy.create_tables([User, Ranking, Item, Comparison])
+            counter = QueryCounter()
+            user = User.create(email="bench@example.invalid", password="x")
+            headers = {"Authorization": f"Bearer {create_access_token(identity=user)}"}
+            rng = random.Random(0)
+
+            print(f"{'case':<28}{'graph':<8}{'items':>7}{'time':>12}{'queries':>9}{'peak mem':>12}")
+            for n in sizes:
+                planned = [(graph, None) for graph in graphs] + [("-", import_case(user, n))]
+                for graph, single in planned:
+                    if single is not None:
+                        todo = [single]
+                    else:
+                        ranking = generate_ranking(user, n, GRAPHS[graph], rng)
+                        todo = ranking_cases(app, ranking, headers)
+                    for case in todo:
+                        if cases and case.name not in cases:
+                            continue
+                        seconds, queries, peak_kib = measure(case, counter, repeat)
+                        result = Result(case.name, graph, n, seconds, queries, round(peak_kib, 1))
+                        results.append(result)
+                        print(
+                            f"{case.name:<28}{graph:<8}{n:>7}{seconds * 1000:>10.1f}ms"
+                            f"{queries:>9}{peak_kib:>10.0f}Ki"
+                        )
+                        sys.stdout.flush()
+            db_proxy.close()
+    return results
+
+
+def compare(results: List[Result], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    regressions = []
+    for result in results:
+        base = baseline.get(result.key)
+        if base is None:
+            continue
+        if result.seconds > base["seconds"] * (1 + tolerance):
+            regressions.append(
+                f"{result.key}: {result.seconds * 1000:.1f}ms vs {base['seconds'] * 1000:.1f}ms"
+            )
+        if result.queries > base["queries"] * (1 + tolerance):
+            regressions.append(f"{result.key}: {result.queries} queries vs {base['queries']}")
+        if result.peak_kib > base["peak_kib"] * (1 + tolerance):
+            regressions.append(
+                f"{result.key}: {result.peak_kib:.0f}Ki peak vs {base['peak_kib']:.0f}Ki"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--graphs", nargs="+", choices=sorted(GRAPHS), default=sorted(GRAPHS, reverse=True))
+    parser.add_argument("--cases", nargs="+", help="Only run these cases.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed growth, as a fraction.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save-baseline", action="store_true", help="Store results as the baseline.")
+    mode.add_argument("--check", action="store_true", help="Exit non-zero on regressions.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.graphs, args.cases, args.repeat)
+
+    if args.save_baseline:
+        stored: Dict[str, Any] = {}
+        if args.baseline.exists():
+            stored = json.loads(args.baseline.read_text())
+        stored.update({result.key: asdict(result) for result in results})
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        if args.check:
+            sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions and args.check:
+        sys.exit(1)
+    if not regressions:
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compare JSON providers on the ranking, items and statistics payloads.
+
+Usage: ``python -m benchmarks.json_encoding [--sizes 100 1000 10000]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import timeit
+import uuid
+from typing import Any, Callable, Dict, List
+
+from flask import Flask
+
+from webrankit.serialization import JSON_PROVIDERS
+
+
+def ranking_payload(n: int) -> Dict[str, Any]:
+    items = []
+    for idx in range(n):
+        items.append(
+            {
+                "id": uuid.uuid4(),
+                "label": f"Item {idx}",
+                "img_url": f"https://example.invalid/img/{idx}.jpg",
+                "init_rating": random.randint(0, 10),
+                "curr_rating": round((idx + 1) / n * 10, 2),
+                "stderr": round(random.random(), 2),
+                "ability": round(random.gauss(0, 2), 3),
+                "comparisons_count": random.randint(0, 50),
+            }
+        )
+    return {
+        "ranking": {
+            "id": uuid.uuid4(),
+            "name": "Benchmark",
+            "datasource": "anilist",
+            "item_count": n,
+            "comp_count": n * 3,
+            "items": items,
+        }
+    }
+
+
+def items_payload(n: int) -> Dict[str, Any]:
+    return {
+        "items": [
+            {
+                "id": uuid.uuid4(),
+                "label": f"Item {idx}",
+                "img_url": f"https://example.invalid/img/{idx}.jpg",
+                "init_rating": random.randint(0, 10),
+            }
+            for idx in range(n)
+        ]
+    }
+
+
+def statistics_payload(n: int) -> Dict[str, Any]:
+    return {
+        "statistics": {
+            "ranking_id": uuid.uuid4(),
+            "ranking_name": "Benchmark",
+            "item_count": n,
+            "comparison_count": n * 3,
+            "max_possible_comparisons": n * (n - 1) // 2,
+            "completion_percentage": 0.12,
+            "comparison_distribution": {count: random.randint(1, n) for count in range(60)},
+            "recent_comparisons": [
+                {
+                    "item1": f"Item {idx}",
+                    "item2": f"Item {idx + 1}",
+                    "win1_count": 1,
+                    "win2_count": 2,
+                    "draw_count": 0,
+                }
+                for idx in range(10)
+            ],
+            "uncertainty_stats": {"average": 0.8, "max": 2.1, "min": 0.1},
+            "needs_more_comparisons": True,
+        }
+    }
+
+
+def _legacy_dumps(payload: Dict[str, Any]) -> bytes:
+    """What the resources did before: stringify UUIDs, then stdlib json."""
+
+    def convert(obj: Any) -> Any:
+        if isinstance(obj, dict):
+            return {str(key): convert(value) for key, value in obj.items()}
+        if isinstance(obj, list):
+            return [convert(value) for value in obj]
+        if isinstance(obj, uuid.UUID):
+            return str(obj)
+        return obj
+
+    return json.dumps(convert(payload)).encode()
+
+
+def run(sizes: List[int], number: int) -> None:
+    app = Flask(__name__)
+    encoders: Dict[str, Callable[[Any], bytes]] = {"legacy": _legacy_dumps}
+    for name, provider_cls in JSON_PROVIDERS.items():
+        encoders[name] = provider_cls(app).dumpb
+
+    print(f"{'payload':<12}{'n':>8}" + "".join(f"{name:>12}" for name in encoders))
+    for build in (ranking_payload, items_payload, statistics_payload):
+        for n in sizes:
+            payload = build(n)
+            timings = []
+            with app.app_context():
+                for encode in encoders.values():
+                    seconds = min(timeit.repeat(lambda: encode(payload), number=number, repeat=3))
+                    timings.append(seconds / number * 1000)
+            label = build.__name__.replace("_payload", "")
+            print(f"{label:<12}{n:>8}" + "".join(f"{ms:>10.3f}ms" for ms in timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--number", type=int, default=20, help="Encodings per timing run.")
+    args = parser.parse_args()
+    run(args.sizes, args.number)
+
+
+if __name__ == "__main__":
+    main()
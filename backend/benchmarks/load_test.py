@@ -0,0 +1,304 @@
+"""Load test: concurrent voting sessions against a running backend.
+
+Each simulated user registers through ``/auth/user``, logs in through
+``/auth``, creates a ranking with ``--items`` items and seeds it with a chain
+of comparisons. Then, until ``--duration`` runs out, it repeatedly asks for
+a pair (``GET /compare/<uid>``), votes on it (``POST /compare/<uid>``) and
+every ``--read-every`` votes reads the whole ranking. Throughput, p50/p99
+latency and error rate are reported per operation.
+
+By default the backend at ``--url`` is used. With ``--spawn`` a server is
+started on a fresh database (``--database-url``, a temporary SQLite file by
+default): the threaded development server for one worker, gunicorn for
+``--workers`` above one or with ``--threads``, and uvicorn running the ASGI
+entry point with ``--server asgi``. Run the same scenario with different
+servers, worker counts and database URLs to compare them.
+
+Usage: ``python -m benchmarks.load_test [--url http://127.0.0.1:5000]
+[--spawn --workers 4 [--server asgi]] [--users 20 --duration 30]
+[--json-out results.json]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+OPERATIONS = ("compare_get", "compare_post", "ranking_get")
+SERVERS = ("wsgi", "asgi")
+
+
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, operation: str, seconds: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies[operation].append(seconds)
+            if not ok:
+                self.errors[operation] += 1
+
+
+class LoadTestError(Exception):
+    """A session could not be set up."""
+
+
+class Session:
+    """One simulated user with its own ranking."""
+
+    def __init__(self, base_url: str, run_id: str, index: int, items: int, stats: Stats) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.http = requests.Session()
+        self.email = f"load-{run_id}-{index}@example.invalid"
+        self.items = items
+        self.stats = stats
+        self.rng = random.Random(index)
+        self.ranking_id = ""
+
+    def _call(self, method: str, path: str, expected: int = 200, **kwargs: Any) -> Any:
+        response = self.http.request(method, self.base_url + path, timeout=30, **kwargs)
+        if response.status_code != expected:
+            raise LoadTestError(f"{method} {path} -> {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def setup(self) -> None:
+        password = "load-test-password"
+        self._call("POST", "/auth/user", json={"email": self.email, "password": password})
+        token = self._call("POST", "/auth", json={"email": self.email, "password": password})
+        self.http.headers["Authorization"] = f"Bearer {token['access_token']}"
+
+        ranking = self._call("POST", "/ranking", json={"name": "Load test", "source": "manual"})
+        self.ranking_id = ranking["ranking"]["id"]
+        item_ids = []
+        for idx in range(self.items):
+            created = self._call(
+                "POST",
+                f"/ranking/{self.ranking_id}/items",
+                expected=201,
+                json={"label": f"Item {idx}", "init_rating": self.rng.randint(0, 10)},
+            )
+            item_ids.append(created["item"]["id"])
+        for winner, loser in zip(item_ids, item_ids[1:]):
+            self._call(
+                "POST", f"/compare/{self.ranking_id}", json={"winitem": winner, "loseitem": loser}
+            )
+
+    def _timed(self, operation: str, method: str, path: str, **kwargs: Any) -> Optional[Any]:
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=30, **kwargs)
+            body = response.content
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok, body = False, b""
+        self.stats.record(operation, time.perf_counter() - start, ok)
+        if not ok:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    def vote_until(self, deadline: float, read_every: int) -> None:
+        votes = 0
+        while time.monotonic() < deadline:
+            pair = self._timed("compare_get", "GET", f"/compare/{self.ranking_id}")
+            if not pair or "comparison" not in pair:
+                continue
+            first, second = (item["id"] for item in pair["comparison"])
+            if self.rng.random() < 0.5:
+                first, second = second, first
+            self._timed(
+                "compare_post",
+                "POST",
+                f"/compare/{self.ranking_id}",
+                json={"winitem": first, "loseitem": second},
+            )
+            votes += 1
+            if read_every and votes % read_every == 0:
+                self._timed("ranking_get", "GET", f"/ranking/{self.ranking_id}")
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(stats: Stats, elapsed: float) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for operation in OPERATIONS + ("total",):
+        if operation == "total":
+            values = sorted(v for op in OPERATIONS for v in stats.latencies.get(op, []))
+            errors = sum(stats.errors.values())
+        else:
+            values = sorted(stats.latencies.get(operation, []))
+            errors = stats.errors.get(operation, 0)
+        if not values:
+            continue
+        summary[operation] = {
+            "requests": len(values),
+            "throughput": len(values) / elapsed,
+            "p50_ms": _percentile(values, 50) * 1000,
+            "p99_ms": _percentile(values, 99) * 1000,
+            "error_rate": errors / len(values),
+        }
+    return summary
+
+
+def run(base_url: str, users: int, items: int, duration: float, read_every: int) -> Dict[str, Any]:
+    run_id = uuid.uuid4().hex[:8]
+    stats = Stats()
+    sessions = [Session(base_url, run_id, idx, items, stats) for idx in range(users)]
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        print(f"Setting up {users} sessions with {items} items each...")
+        for future in [pool.submit(session.setup) for session in sessions]:
+            future.result()
+
+        print(f"Voting for {duration:.0f}s...")
+        start = time.monotonic()
+        deadline = start + duration
+        for future in [pool.submit(session.vote_until, deadline, read_every) for session in sessions]:
+            future.result()
+        elapsed = time.monotonic() - start
+
+    return {
+        "url": base_url,
+        "users": users,
+        "items": items,
+        "duration": elapsed,
+        "operations": summarize(stats, elapsed),
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"{'operation':<14}{'requests':>10}{'req/s':>10}{'p50':>11}{'p99':>11}{'errors':>9}")
+    for operation, row in result["operations"].items():
+        print(
+            f"{operation:<14}{row['requests']:>10}{row['throughput']:>10.1f}"
+            f"{row['p50_ms']:>9.1f}ms{row['p99_ms']:>9.1f}ms{row['error_rate']:>8.1%}"
+        )
+
+
+@contextmanager
+def spawned_server(
+    port: int,
+    workers: int,
+    database_url: str,
+    server: str = "wsgi",
+    threads: Optional[int] = None,
+) -> Iterator[str]:
+    """Serve a fresh database on ``port``; ``threads`` per worker, if given."""
+    env = {
+        "PWRANK_JWT_SECRET": uuid.uuid4().hex,
+        **os.environ,
+        "PWRANK_DATABASE_URL": database_url,
+        "PWRANK_SLOW_REQUEST_MS": "0",
+        "PWRANK_VOTES_PER_MINUTE": "0",
+    }
+    subprocess.run([sys.executable, "-m", "webrankit.cli", "init-db"], env=env, check=True)
+    if server == "asgi":
+        if threads:
+            env["PWRANK_ASGI_THREADS"] = str(threads)
+        command = [
+            sys.executable, "-m", "uvicorn",
+            "--factory", "webrankit.asgi:create_asgi_app",
+            "--workers", str(workers),
+            "--port", str(port),
+            "--log-level", "warning",
+        ]  # fmt: skip
+    elif workers > 1 or threads:
+        command = [
+            sys.executable, "-m", "gunicorn",
+            "--workers", str(workers),
+            *(["--threads", str(threads)] if threads else []),
+            "--bind", f"127.0.0.1:{port}",
+            "webrankit.app:create_app()",
+        ]  # fmt: skip
+    else:
+        serve = f"from webrankit import create_app; create_app().run(port={port}, threaded=True)"
+        command = [sys.executable, "-c", serve]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            if server.poll() is not None:
+                raise LoadTestError(f"Server exited with {server.returncode}")
+            try:
+                requests.get(f"{base_url}/ranking", timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        else:
+            raise LoadTestError("Server did not start")
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Backend to test.")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent voting sessions.")
+    parser.add_argument("--items", type=int, default=50, help="Items per session's ranking.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of voting.")
+    parser.add_argument("--read-every", type=int, default=5, help="Votes between ranking reads.")
+    parser.add_argument("--spawn", action="store_true", help="Start a server on a fresh database.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes with --spawn.")
+    parser.add_argument("--threads", type=int, help="Threads per worker with --spawn.")
+    parser.add_argument("--server", choices=SERVERS, default="wsgi", help="Server for --spawn.")
+    parser.add_argument("--port", type=int, default=5057, help="Port for --spawn.")
+    parser.add_argument("--database-url", help="Database for --spawn (default: temporary SQLite).")
+    parser.add_argument("--json-out", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    def execute(base_url: str) -> Dict[str, Any]:
+        return run(base_url, args.users, args.items, args.duration, args.read_every)
+
+    try:
+        if args.spawn:
+            with tempfile.TemporaryDirectory() as tmp:
+                database_url = args.database_url or f"sqlite:///{tmp}/load.db"
+                with spawned_server(
+                    args.port, args.workers, database_url, args.server, args.threads
+                ) as base_url:
+                    result = execute(base_url)
+                result.update(
+                    server=args.server,
+                    workers=args.workers,
+                    threads=args.threads,
+                    database_url=database_url,
+                )
+        else:
+            result = execute(args.url)
+    except LoadTestError as e:
+        sys.exit(str(e))
+
+    print_report(result)
+    if args.json_out:
+        with open(args.json_out, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare the streaming rgGames parser with the old BeautifulSoup scan.
+
+Fixture pages with the given library sizes are written to a temporary
+directory (or ``--fixtures``) and read back in 64 KiB chunks, the way the
+fetcher delivers them.
+
+Usage: ``python -m benchmarks.steam_parser [--sizes 100 1000 10000]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterator, List, Tuple
+
+from webrankit.datasource.steam import iter_rg_games
+
+CHUNK_SIZE = 64 * 1024
+
+
+def fixture_page(games: int) -> bytes:
+    """A games page shaped like steamcommunity.com's, with ``games`` entries."""
+    rg_games = [
+        {
+            "appid": appid,
+            "name": f"Game {appid}",
+            "logo": f"https://cdn.example.invalid/steam/apps/{appid}/capsule_184x69.jpg",
+            "friendlyURL": appid,
+            "availStatLinks": {"achievements": True, "global_achievements": True},
+            "hours_forever": f"{games - appid:,}.5",
+            "last_played": 1700000000 - appid,
+        }
+        for appid in range(games)
+    ]
+    filler = "".join(f'<div class="row"><a href="/app/{i}">link {i}</a></div>' for i in range(games))
+    return (
+        "<!DOCTYPE html><html><head><script>var g_sessionID = \"x\";</script></head><body>"
+        f"{filler}<script language=\"javascript\">\n\t\tvar rgGames = {json.dumps(rg_games)};\n"
+        "\t\tvar rgChangingGames = [];\n</script></body></html>"
+    ).encode()
+
+
+def read_chunks(path: Path) -> Iterator[bytes]:
+    with path.open("rb") as fh:
+        while chunk := fh.read(CHUNK_SIZE):
+            yield chunk
+
+
+def legacy_parse(path: Path) -> List[dict]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(b"".join(read_chunks(path)), "html.parser")
+    script_pattern = re.compile(r"var rgGames = (.*);")
+    for script in soup.find_all("script"):
+        match = script_pattern.search(str(script))
+        if match:
+            return json.loads(match.group(1))
+    return []
+
+
+def streaming_parse(path: Path) -> List[dict]:
+    # Count rather than collect so the parser's own footprint is measured.
+    return [None for _ in iter_rg_games(read_chunks(path))]
+
+
+def measure(func: Callable[[Path], List[dict]], path: Path) -> Tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = len(func(path))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def run(sizes: List[int], fixtures: Path) -> None:
+    parsers = {"streaming": streaming_parse}
+    try:
+        import bs4  # noqa: F401
+
+        parsers["beautifulsoup"] = legacy_parse
+    except ImportError:
+        print("beautifulsoup4 not installed; only the streaming parser is measured")
+
+    print(f"{'games':>8}{'page':>10}  {'parser':<14}{'time':>10}{'peak mem':>12}")
+    for size in sizes:
+        path = fixtures / f"steam_games_{size}.html"
+        if not path.exists():
+            path.write_bytes(fixture_page(size))
+        page_kib = path.stat().st_size // 1024
+        for name, parser in parsers.items():
+            elapsed, peak, count = measure(parser, path)
+            assert count == size, f"{name} found {count} of {size} games"
+            print(f"{size:>8}{page_kib:>8}Ki  {name:<14}{elapsed * 1000:>8.1f}ms{peak / 1024:>10.0f}Ki")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--fixtures", type=Path, help="Directory for generated pages.")
+    args = parser.parse_args()
+    if args.fixtures:
+        args.fixtures.mkdir(parents=True, exist_ok=True)
+        run(args.sizes, args.fixtures)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(args.sizes, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
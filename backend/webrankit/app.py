@@ -8,9 +8,21 @@ from flask_restful import Api
 
 from .config import Config
 from .database import init_app as init_database
+from .datasource import init_app as init_datasources
+from .engines import online_refits
 from .extensions import jwt
+from .fits import model_fits
 from .logging_config import configure_logging
+from .metrics import init_app as init_metrics
+from .profiling import init_app as init_profiling
+from .ratelimit import rate_limits
 from .resource import register_resources
+from .serialization import init_app as init_serialization
+from .serialization import output_json
+from .shared_cache import shared_model_cache
+from .sharding import shards
+from .snapshots import model_snapshots
+from .thumbnails import thumbnails
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +43,20 @@ def create_app(config: dict | None = None) -> Flask:
     CORS(app)
     jwt.init_app(app)
     init_database(app)
+    init_metrics(app)
+    shards.init_app(app)
+    init_profiling(app)
+    init_serialization(app)
+    init_datasources(app)
+    model_snapshots.init_app(app)
+    shared_model_cache.init_app(app)
+    model_fits.init_app(app)
+    rate_limits.init_app(app)
+    online_refits.init_app(app)
+    thumbnails.init_app(app)
 
     api = Api(app)
+    api.representation("application/json")(output_json)
     register_resources(api)
 
     logger.info("Flask application created successfully")
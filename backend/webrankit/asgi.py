@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+"""
+ASGI entry point.
+
+Under a WSGI server every open connection holds a worker thread for as
+long as it lasts: a client on ``/ranking/<uid>/events`` keeps one busy
+indefinitely, and so does a slow client uploading a large body.
+``create_asgi_app`` serves the same Flask application from an ASGI server
+instead::
+
+    uvicorn --factory webrankit.asgi:create_asgi_app --workers 4
+
+Requests are bridged to Flask by a2wsgi, which runs the handlers on a pool
+of ``ASGI_THREADS`` threads. Request bodies are read on the event loop
+before a handler starts, so slow uploads hold no thread. Bradley-Terry fits
+do not run on the handler threads but on their own bounded pool (see
+``webrankit.fits``), so a burst of cold rankings queues there while other
+requests proceed. Imports already run as background jobs and return ``202``
+at once (see ``webrankit.datasource.jobs``).
+
+Event streams are the one path not left to the bridge: once the handler
+has authorized the request, the stream continues on the event loop and
+takes a pool thread only to render an event or to check the ranking
+version, so idle subscribers cost no threads.
+
+``benchmarks.connections`` compares how many concurrent connections this
+and the WSGI path sustain.
+"""
+
+import asyncio
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, List, MutableMapping, Optional, Tuple
+
+from a2wsgi import WSGIMiddleware
+from flask import Flask
+
+from .app import create_app
+from .constants import ASGI_THREADS
+from .database import use_shard
+from .events import ranking_events
+from .resource.events import DEFER_STREAM, EventStream
+
+logger = logging.getLogger(__name__)
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class _LoopQueue(queue.Queue):
+    """Subscriber queue that wakes an event loop whenever an event is put."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, ready: asyncio.Event, maxsize: int) -> None:
+        super().__init__(maxsize)
+        self._loop = loop
+        self._ready = ready
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # The loop has shut down.
+
+
+class AsgiApp:
+    """ASGI application serving a Flask app through a2wsgi."""
+
+    def __init__(self, app: Flask, threads: int = ASGI_THREADS) -> None:
+        self.app = app
+        self.bridge = WSGIMiddleware(self._wsgi, workers=threads)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        return self.bridge.executor
+
+    def _wsgi(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        # The body was read in full before the handler started, so it may be
+        # read to its end even without a Content-Length (chunked uploads).
+        environ["wsgi.input_terminated"] = True
+        # a2wsgi passes the ASGI scope along; expose the stream hand-off to Flask.
+        defer = environ["asgi.scope"].get(DEFER_STREAM)
+        if defer is not None:
+            environ[DEFER_STREAM] = defer
+        return self.app(environ, start_response)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        if isinstance(body, tuple):
+            await self._send_simple(send, *body)
+            return
+
+        replay: List[Message] = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive_body() -> Message:
+            return replay.pop() if replay else await receive()
+
+        deferred: List[EventStream] = []
+
+        async def forward(message: Message) -> None:
+            if deferred:
+                if message["type"] == "http.response.start":
+                    headers = [(k, v) for k, v in message["headers"] if k != b"content-length"]
+                    message = {**message, "headers": headers}
+                elif not message.get("more_body", False):
+                    return  # The event stream continues on the loop.
+            await send(message)
+
+        await self.bridge({**scope, DEFER_STREAM: deferred.append}, receive_body, forward)
+        if deferred:
+            await self._stream_events(deferred[0], receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive: Receive) -> bytes | Tuple[int, bytes] | None:
+        """The request body, a ``(status, message)`` to reject it with, or
+        ``None`` if the client went away."""
+        limit = self.app.config.get("MAX_CONTENT_LENGTH")
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if limit is not None and size > limit:
+                return 413, b'{"message":"Request body is too large."}'
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send_simple(send: Send, status: int, body: bytes) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _in_context(
+        self, stream: EventStream, func: Callable[..., str], *args: Any
+    ) -> Awaitable[str]:
+        """Run ``func`` on the pool with the app context and the stream's shard."""
+
+        def call() -> str:
+            with self.app.app_context(), use_shard(stream.shard):
+                return func(*args)
+
+        return asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def _stream_events(self, stream: EventStream, receive: Receive, send: Send) -> None:
+        ready = asyncio.Event()
+        subscriber = _LoopQueue(asyncio.get_running_loop(), ready, ranking_events.max_queue)
+
+        async def disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        async def emit(chunk: str) -> None:
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+
+        gone = asyncio.ensure_future(disconnect())
+        try:
+            await emit(await self._in_context(stream, stream.open, subscriber))
+            while not gone.done():
+                woken = asyncio.ensure_future(ready.wait())
+                done, _ = await asyncio.wait(
+                    {woken, gone}, timeout=stream.poll_interval, return_when=asyncio.FIRST_COMPLETED
+                )
+                woken.cancel()
+                if gone in done:
+                    break
+                ready.clear()
+                events = []
+                while True:
+                    try:
+                        events.append(subscriber.get_nowait())
+                    except queue.Empty:
+                        break
+                if events:
+                    chunk = await self._in_context(
+                        stream, lambda: "".join(stream.render(event) for event in events)
+                    )
+                elif woken not in done:
+                    chunk = await self._in_context(stream, stream.poll)
+                else:
+                    continue
+                await emit(chunk)
+        finally:
+            gone.cancel()
+            stream.close()
+            try:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            except Exception:  # noqa: BLE001 - the client is already gone
+                pass
+
+
+def create_asgi_app(config: dict | None = None, threads: Optional[int] = None) -> AsgiApp:
+    """Application factory for ASGI servers (``uvicorn --factory``)."""
+    app = create_app(config)
+    return AsgiApp(app, threads or app.config.get("ASGI_THREADS", ASGI_THREADS))
+
+
+__all__ = ["AsgiApp", "create_asgi_app"]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+"""
+In-process caches.
+
+Fitted models are keyed by ranking id and ranking version. Any write to a
+ranking bumps its version, so stale entries are never served; the TTL only
+bounds how long memory is held for rankings nobody looks at.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+from .constants import (
+    MODEL_CACHE_MAX_ENTRIES,
+    MODEL_CACHE_TTL,
+    USER_CACHE_MAX_ENTRIES,
+    USER_CACHE_TTL,
+)
+from .metrics import record_cache
+
+V = TypeVar("V")
+
+
+class VersionedCache(Generic[V]):
+    """Thread-safe LRU cache of ``key -> (version, value)`` with a TTL.
+
+    Lookups are counted as hits and misses under ``name``.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_version, expires, value = entry
+                if cached_version == version and expires >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    record_cache(self.name, hit=True)
+                    return value
+        record_cache(self.name, hit=False)
+        return None
+
+    def put(self, key: Hashable, version: int, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+model_cache: VersionedCache[Any] = VersionedCache("model", MODEL_CACHE_MAX_ENTRIES, MODEL_CACHE_TTL)
+
+# Users have no version column: entries are stored under version 0,
+# invalidated on writes in this process and otherwise expire after the TTL.
+user_cache: VersionedCache[Any] = VersionedCache("user", USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL)
+
+
+__all__ = ["VersionedCache", "model_cache", "user_cache"]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import uuid
+
 import click
 from flask.cli import FlaskGroup
 
@@ -29,13 +31,237 @@ def runserver(host: str, port: int, debug: bool) -> None:
 def init_db() -> None:
     """Initialize the database schema."""
     from .database import db_proxy
+    from .migrations import stamp_all
     from .model import Comparison, Item, Ranking, User
 
+    fresh = not db_proxy.table_exists(Ranking._meta.table_name)
     click.echo("Creating database tables...")
     db_proxy.create_tables([User, Ranking, Item, Comparison])
+    if fresh:
+        # The tables match the models, so every migration is already applied.
+        stamp_all()
+    else:
+        click.echo("Existing tables were kept; run `backend migrate` to update them.")
     click.echo("Database tables created successfully!")
 
 
+@cli.command("migrate")
+@click.option("--status", is_flag=True, help="List migrations instead of applying them.")
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=None,
+    help="Rows per backfill transaction (default MIGRATION_BACKFILL_CHUNK_SIZE).",
+)
+def migrate(status: bool, chunk_size: int | None) -> None:
+    """Apply pending schema migrations to the database and every shard."""
+    from .constants import MIGRATION_BACKFILL_CHUNK_SIZE
+    from .database import use_shard
+    from .migrations import applied_versions, apply, discover
+    from .sharding import shards
+
+    migrations = discover()
+    targets = [("main database", None)]
+    if shards.enabled:
+        targets += [(f"shard {index:03d}", database) for index, database in shards.existing()]
+    for label, database in targets:
+        if len(targets) > 1:
+            click.echo(f"== {label}")
+        with use_shard(database):
+            applied = applied_versions()
+            if status:
+                for migration in migrations:
+                    applied_at = applied.get(migration.version)
+                    state = f"applied {applied_at:%Y-%m-%d %H:%M}" if applied_at else "pending"
+                    click.echo(
+                        f"{migration.version:04d} {migration.name:<26} {state:<24} "
+                        f"{migration.description}"
+                    )
+                continue
+
+            todo = [migration for migration in migrations if migration.version not in applied]
+            if not todo:
+                click.echo("Database schema is up to date.")
+                continue
+            for migration in todo:
+                click.echo(f"Applying {migration.version:04d} {migration.name}...")
+                apply(migration, chunk_size or MIGRATION_BACKFILL_CHUNK_SIZE, database)
+            click.echo(f"Applied {len(todo)} migration(s).")
+
+
+@cli.command("shard-split")
+@click.option("--purge", is_flag=True, help="Delete copied rankings from the main database.")
+def shard_split(purge: bool) -> None:
+    """Copy the rankings in the main database into the per-user shards.
+
+    Set PWRANK_SHARD_DIR and PWRANK_SHARD_COUNT as the server will use them;
+    the split can be re-run and only copies rows missing from the shards.
+    """
+    from .sharding import shards
+
+    if not shards.enabled:
+        raise click.ClickException("Set PWRANK_SHARD_DIR to the shard directory first.")
+    copied = shards.split(
+        purge=purge,
+        progress=lambda ranking, index: click.echo(f"{ranking.id} -> shard {index:03d}"),
+    )
+    click.echo(
+        f"Copied {sum(copied.values())} ranking(s) into {len(copied)} of {shards.count} shards."
+    )
+
+
+@cli.command("sync-replica")
+@click.argument("path", type=click.Path(dir_okay=False))
+@click.option(
+    "--every",
+    type=float,
+    default=0,
+    help="Keep copying every N seconds, which simulates replication lag.",
+)
+def sync_replica(path: str, every: float) -> None:
+    """Copy the SQLite database to PATH for use as a local read replica.
+
+    Point PWRANK_DATABASE_REPLICA_URLS at sqlite:///PATH to try replica
+    routing without a replicated database server.
+    """
+    import sqlite3
+    import time
+
+    from peewee import SqliteDatabase
+
+    from .database import db_proxy
+
+    primary = db_proxy.obj
+    if not isinstance(primary, SqliteDatabase):
+        raise click.ClickException("Only SQLite databases can be copied; replicate others natively.")
+    while True:
+        target = sqlite3.connect(path)
+        try:
+            primary.connection().backup(target)
+        finally:
+            target.close()
+        click.echo(f"Copied {primary.database} to {path}.")
+        if every <= 0:
+            return
+        time.sleep(every)
+
+
+@cli.command("refit")
+@click.argument("ranking_ids", nargs=-1)
+@click.option("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+@click.option("--all", "force", is_flag=True, help="Also refit rankings whose snapshot is current.")
+def refit_models(ranking_ids: tuple[str, ...], workers: int | None, force: bool) -> None:
+    """Fit stale Bradley-Terry models in parallel and write their snapshots.
+
+    Without RANKING_IDS every ranking whose snapshot is missing or older
+    than its current version is refit; listed rankings are always refit.
+    """
+    import time
+
+    from .database import use_shard
+    from .model import Ranking
+    from .refit import RefitResult, refit, stale
+    from .sharding import shards
+    from .snapshots import model_snapshots
+
+    if model_snapshots.directory is None:
+        raise click.ClickException("Set PWRANK_MODEL_SNAPSHOT_DIR to store refit models.")
+    ids = [uuid.UUID(ranking_id) for ranking_id in ranking_ids]
+    databases = [None]
+    if shards.enabled:
+        databases += [database for _, database in shards.existing()]
+
+    def rankings():
+        for database in databases:
+            with use_shard(database):
+                query = Ranking.select()
+                if ids:
+                    query = query.where(Ranking.id.in_(ids))
+                for ranking in list(query):
+                    if stale(ranking, force or bool(ids)):
+                        yield ranking
+
+    def report(result: RefitResult) -> None:
+        outcome = f"failed: {result.error}" if result.error else f"{result.seconds:.3f}s"
+        click.echo(
+            f"{result.ranking_id} v{result.version}: {result.items} items, "
+            f"{result.comparisons} comparisons, {outcome}"
+        )
+
+    start = time.perf_counter()
+    results = refit(rankings(), workers, report)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    fitted = [result for result in results if result.fitted]
+    failed = sum(result.error is not None for result in results)
+    comparisons = sum(result.comparisons for result in fitted)
+    fit_seconds = sum(result.seconds for result in fitted)
+    click.echo(
+        f"Refit {len(fitted)} ranking(s) in {elapsed:.1f}s: "
+        f"{len(fitted) / elapsed:.2f} rankings/s, {comparisons / elapsed:.0f} comparisons/s, "
+        f"{fit_seconds:.1f}s of fitting."
+    )
+    if failed:
+        raise click.ClickException(f"{failed} ranking(s) could not be fitted.")
+
+
+@cli.command("thumbnails")
+@click.argument("ranking_id", required=False)
+def generate_thumbnails(ranking_id: str | None) -> None:
+    """Generate missing item thumbnails of one ranking, or of all rankings."""
+    from .database import use_shard
+    from .model import Ranking
+    from .sharding import shards
+    from .thumbnails import thumbnails
+
+    if not thumbnails.enabled:
+        raise click.ClickException("Set PWRANK_THUMBNAIL_DIR to enable thumbnails.")
+    databases = [None]
+    if shards.enabled:
+        databases += [database for _, database in shards.existing()]
+    for database in databases:
+        with use_shard(database):
+            query = Ranking.select(Ranking.id, Ranking.name)
+            if ranking_id is not None:
+                query = query.where(Ranking.id == uuid.UUID(ranking_id))
+            for ranking in query:
+                done = thumbnails.fill(ranking.id)
+                click.echo(f"{ranking.name}: {done} new thumbnail(s)")
+
+
+@cli.command("import-file")
+@click.argument("ranking_id")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "jsonl"]),
+    default=None,
+    help="File format; detected from the first line by default.",
+)
+def import_file(ranking_id: str, path: str, file_format: str | None) -> None:
+    """Import items into a ranking from a CSV or JSON Lines file."""
+    from .database import use_shard
+    from .datasource import DatasourceError, FileDatasource
+    from .model import LimitExceeded, Ranking
+    from .sharding import shards
+
+    try:
+        ranking_uuid = uuid.UUID(ranking_id)
+    except ValueError as e:
+        raise click.ClickException(f"`{ranking_id}` is not a ranking id.") from e
+    shard = shards.locate(ranking_uuid) if shards.enabled else None
+    with use_shard(shard):
+        ranking = Ranking.get_or_none(Ranking.id == ranking_uuid)
+        if ranking is None:
+            raise click.ClickException(f"Ranking `{ranking_id}` not found.")
+        with open(path, encoding="utf-8", newline="") as f:
+            try:
+                count = ranking.import_items(FileDatasource(f, file_format))
+            except (DatasourceError, LimitExceeded) as e:
+                raise click.ClickException(str(e)) from e
+    click.echo(f"Imported {count} items into {ranking.name}.")
+
+
 def main() -> None:
     cli(auto_envvar_prefix="PWRANK")
 
@@ -8,6 +8,7 @@ environment variables so deployments do not have to patch code.
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Repository root (…/pwrank)
@@ -15,19 +16,108 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 # Default SQLite database lives at the project root to keep behaviour stable
 # for existing deployments.
 DEFAULT_DB_PATH = PROJECT_ROOT / "db"
+# Shared model files belong on tmpfs where available.
+SHM_ROOT = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
 
 
 class Config:
     """Base configuration shared by all environments."""
 
     JWT_SECRET_KEY = os.getenv("PWRANK_JWT_SECRET", "change-me")
+    # Only the events stream also accepts ?jwt= (EventSource cannot send
+    # headers); elsewhere tokens would leak into logs and Referer headers.
+    JWT_TOKEN_LOCATION = ["headers"]
 
     # Peewee understands database URLs through playhouse.db_url.connect.
     DATABASE_URL = os.getenv(
         "PWRANK_DATABASE_URL", f"sqlite:///{DEFAULT_DB_PATH.as_posix()}"
     )
 
+    # Comma-separated read replicas of DATABASE_URL for GET requests, see
+    # webrankit.database. Clients read from the primary for a while after writing.
+    DATABASE_REPLICA_URLS = [
+        url.strip() for url in os.getenv("PWRANK_DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    READ_AFTER_WRITE_SECONDS = float(os.getenv("PWRANK_READ_AFTER_WRITE_SECONDS", "5"))
+    READ_AFTER_WRITE_DIR = os.getenv(
+        "PWRANK_READ_AFTER_WRITE_DIR", os.path.join(SHM_ROOT, "pwrank-writes")
+    )
+
+    # Rankings live in SHARD_COUNT per-user SQLite files here; empty keeps
+    # everything in DATABASE_URL. See webrankit.sharding.
+    SHARD_DIR = os.getenv("PWRANK_SHARD_DIR", "")
+    SHARD_COUNT = int(os.getenv("PWRANK_SHARD_COUNT", "16"))
+
     JSON_SORT_KEYS = False
+    # "auto" picks orjson when installed, see webrankit.serialization.
+    JSON_PROVIDER = os.getenv("PWRANK_JSON_PROVIDER", "auto")
+    # Arrays at least this long are streamed instead of encoded in one buffer.
+    JSON_STREAM_MIN_ITEMS = int(os.getenv("PWRANK_JSON_STREAM_MIN_ITEMS", "1000"))
+
+    # Upstream endpoints; override to point imports at local stub servers.
+    ANILIST_API_URL = os.getenv("PWRANK_ANILIST_API_URL", "https://graphql.anilist.co")
+    STEAM_COMMUNITY_URL = os.getenv("PWRANK_STEAM_COMMUNITY_URL", "https://steamcommunity.com")
+
+    # Requests slower than this are logged with their timing breakdown (0 disables).
+    SLOW_REQUEST_MS = float(os.getenv("PWRANK_SLOW_REQUEST_MS", "500"))
+    SERVER_TIMING = os.getenv("PWRANK_SERVER_TIMING", "1") == "1"
+    # /metrics is unauthenticated; enable it only where the API host is not
+    # public or the route is blocked at the proxy.
+    METRICS_ENDPOINT = os.getenv("PWRANK_METRICS_ENDPOINT", "0") == "1"
+
+    # Admins may profile single requests with `X-Pwrank-Profile: 1` when enabled.
+    PROFILING_ENABLED = os.getenv("PWRANK_PROFILING", "0") == "1"
+    PROFILE_DIR = os.getenv(
+        "PWRANK_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "pwrank-profiles")
+    )
+    PROFILE_MAX_FILES = int(os.getenv("PWRANK_PROFILE_MAX_FILES", "50"))
+
+    # Fitted models are persisted here for warm restarts; empty disables.
+    MODEL_SNAPSHOT_DIR = os.getenv(
+        "PWRANK_MODEL_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "pwrank-model-snapshots")
+    )
+
+    # Fits shared between worker processes via memory-mapped files; empty disables.
+    SHARED_MODEL_CACHE_DIR = os.getenv(
+        "PWRANK_SHARED_MODEL_CACHE_DIR", os.path.join(SHM_ROOT, "pwrank-models")
+    )
+
+    # WebP thumbnails of item images, served from /thumbnail; empty disables.
+    THUMBNAIL_DIR = os.getenv(
+        "PWRANK_THUMBNAIL_DIR", os.path.join(tempfile.gettempdir(), "pwrank-thumbnails")
+    )
+    THUMBNAIL_MAX_BYTES = int(os.getenv("PWRANK_THUMBNAIL_MAX_BYTES", str(1024**3)))
+    # Image hosts (domain suffixes) the server downloads from; "*" allows any.
+    THUMBNAIL_HOSTS = [
+        host.strip()
+        for host in os.getenv(
+            "PWRANK_THUMBNAIL_HOSTS", "anilist.co,steamstatic.com,akamaihd.net"
+        ).split(",")
+        if host.strip()
+    ]
+
+    # Per-user token buckets on votes and imports; 0 per minute disables.
+    VOTES_PER_MINUTE = float(os.getenv("PWRANK_VOTES_PER_MINUTE", "120"))
+    VOTE_BURST = int(os.getenv("PWRANK_VOTE_BURST", "30"))
+    IMPORTS_PER_MINUTE = float(os.getenv("PWRANK_IMPORTS_PER_MINUTE", "2"))
+    IMPORT_BURST = int(os.getenv("PWRANK_IMPORT_BURST", "5"))
+
+    # Elo/Glicko-2 rankings are refit exactly after this many version bumps.
+    ONLINE_REFIT_EVERY = int(os.getenv("PWRANK_ONLINE_REFIT_EVERY", "200"))
+
+    # Import job status shared by all workers on a host; empty keeps it in
+    # process memory, which only suits single-process servers.
+    IMPORT_JOB_DIR = os.getenv(
+        "PWRANK_IMPORT_JOB_DIR", os.path.join(SHM_ROOT, "pwrank-import-jobs")
+    )
+
+    # Seconds between keepalives/version checks on /ranking/<uid>/events.
+    EVENTS_POLL_INTERVAL = float(os.getenv("PWRANK_EVENTS_POLL_INTERVAL", "5"))
+
+    # Threads running Flask handlers under the ASGI entry point (webrankit.asgi).
+    ASGI_THREADS = int(os.getenv("PWRANK_ASGI_THREADS", "32"))
+    # Threads running Bradley-Terry fits for requests, see webrankit.fits.
+    FIT_THREADS = int(os.getenv("PWRANK_FIT_THREADS", "1"))
 
 
 class TestConfig(Config):
@@ -10,6 +10,7 @@ RATING_SCALE_MIN = 0.0  # Minimum rating value
 # Pagination defaults
 DEFAULT_PAGE_SIZE = 50
 MAX_PAGE_SIZE = 1000
+BULK_ITEMS_MAX = 500  # Items deleted or updated per bulk request
 
 # Item limits
 MIN_ITEMS_FOR_RANKING = 2  # Minimum items needed for Bradley-Terry model
@@ -18,6 +19,19 @@ MAX_ITEMS_PER_RANKING = 10000  # Maximum items per ranking to prevent abuse
 # API timeouts (in seconds)
 EXTERNAL_API_CONNECT_TIMEOUT = 3.05
 EXTERNAL_API_READ_TIMEOUT = 10.0
+EXTERNAL_API_MAX_RETRIES = 3
+EXTERNAL_API_CACHE_TTL = 600  # Reuse upstream responses for 10 minutes
+EXTERNAL_API_CACHE_MAX_ENTRIES = 256
+EXTERNAL_API_CACHE_MAX_BYTES = 8 * 1024 * 1024  # Larger streamed bodies are not cached
+EXTERNAL_API_MAX_REDIRECTS = 5  # Hops followed when each one is checked
+
+# Background imports
+IMPORT_JOB_WORKERS = 4
+IMPORT_JOB_TTL = 3600  # Keep finished job status for an hour
+IMPORT_CHUNK_SIZE = 500  # Items upserted per transaction
+
+# Schema migrations
+MIGRATION_BACKFILL_CHUNK_SIZE = 1000  # Rows updated per backfill transaction
 
 # Password requirements
 MIN_PASSWORD_LENGTH = 8
@@ -26,9 +40,54 @@ MAX_PASSWORD_LENGTH = 128
 # Comparison limits
 MAX_COMPARISON_COUNT_PER_ITEM_PAIR = 100  # Prevent spam comparisons
 
+# Per-user rate limits (token buckets; 0 per minute disables)
+VOTES_PER_MINUTE = 120
+VOTE_BURST = 30
+IMPORTS_PER_MINUTE = 2
+IMPORT_BURST = 5
+
+# Online rating engines (Elo/Glicko-2)
+ELO_K_FACTOR = 32.0
+GLICKO2_TAU = 0.5  # Constrains volatility changes
+ONLINE_DEFAULT_RATING = 1500.0
+ONLINE_DEFAULT_RD = 350.0
+ONLINE_DEFAULT_VOLATILITY = 0.06
+ONLINE_REFIT_EVERY = 200  # Ranking versions between background Bradley-Terry refits
+
+# Binary-search placement of new items: votes allowed beyond log2(items)
+PLACEMENT_EXTRA_VOTES = 2
+
+# Merge-sort cold start of freshly imported rankings
+COLD_START_MIN_ITEMS = 8  # Smaller rankings go straight to the model
+
+# Read replicas: clients read from the primary this long after writing
+READ_AFTER_WRITE_SECONDS = 5.0
+
+# Item image thumbnails
+THUMBNAIL_SIZES = {"small": 160, "large": 640}  # Widths for lists and the compare view
+THUMBNAIL_QUALITY = 80  # WebP quality
+THUMBNAIL_WORKERS = 4  # Concurrent image downloads
+THUMBNAIL_SOURCE_MAX_BYTES = 10 * 1024 * 1024  # Larger source images are skipped
+THUMBNAIL_MAX_BYTES = 1024 * 1024 * 1024  # Disk budget before LRU eviction
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600  # Cache lifetime of the immutable files
+THUMBNAIL_HOSTS = ("anilist.co", "steamstatic.com", "akamaihd.net")  # Image hosts fetched
+
+# ASGI serving: threads running Flask handlers per worker process
+ASGI_THREADS = 32
+# Threads running Bradley-Terry fits per process; R evaluates one at a time
+FIT_THREADS = 1
+
+# Per-user SQLite shards (when SHARD_DIR is set)
+SHARD_COUNT = 16
+
 # Cache TTL (in seconds)
 MODEL_CACHE_TTL = 300  # Cache Bradley-Terry model for 5 minutes
+MODEL_CACHE_MAX_ENTRIES = 128  # Fitted models kept per process
 RANKING_CACHE_TTL = 60  # Cache ranking data for 1 minute
+USER_CACHE_TTL = 30  # Bounds how long other workers see a changed or deleted user
+USER_CACHE_MAX_ENTRIES = 1024
+SHARED_MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Memory-mapped models shared by workers
+SHARED_MODEL_CACHE_TTL = 3600
 
 # Logging
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -40,15 +99,53 @@ __all__ = [
     "RATING_SCALE_MIN",
     "DEFAULT_PAGE_SIZE",
     "MAX_PAGE_SIZE",
+    "BULK_ITEMS_MAX",
     "MIN_ITEMS_FOR_RANKING",
     "MAX_ITEMS_PER_RANKING",
     "EXTERNAL_API_CONNECT_TIMEOUT",
     "EXTERNAL_API_READ_TIMEOUT",
+    "EXTERNAL_API_MAX_RETRIES",
+    "EXTERNAL_API_CACHE_TTL",
+    "EXTERNAL_API_CACHE_MAX_ENTRIES",
+    "EXTERNAL_API_CACHE_MAX_BYTES",
+    "EXTERNAL_API_MAX_REDIRECTS",
+    "IMPORT_JOB_WORKERS",
+    "IMPORT_JOB_TTL",
+    "IMPORT_CHUNK_SIZE",
+    "MIGRATION_BACKFILL_CHUNK_SIZE",
     "MIN_PASSWORD_LENGTH",
     "MAX_PASSWORD_LENGTH",
     "MAX_COMPARISON_COUNT_PER_ITEM_PAIR",
+    "VOTES_PER_MINUTE",
+    "VOTE_BURST",
+    "IMPORTS_PER_MINUTE",
+    "IMPORT_BURST",
+    "ELO_K_FACTOR",
+    "GLICKO2_TAU",
+    "ONLINE_DEFAULT_RATING",
+    "ONLINE_DEFAULT_RD",
+    "ONLINE_DEFAULT_VOLATILITY",
+    "ONLINE_REFIT_EVERY",
+    "PLACEMENT_EXTRA_VOTES",
+    "COLD_START_MIN_ITEMS",
+    "READ_AFTER_WRITE_SECONDS",
+    "ASGI_THREADS",
+    "FIT_THREADS",
+    "SHARD_COUNT",
+    "THUMBNAIL_SIZES",
+    "THUMBNAIL_QUALITY",
+    "THUMBNAIL_WORKERS",
+    "THUMBNAIL_SOURCE_MAX_BYTES",
+    "THUMBNAIL_MAX_BYTES",
+    "THUMBNAIL_MAX_AGE",
+    "THUMBNAIL_HOSTS",
     "MODEL_CACHE_TTL",
+    "MODEL_CACHE_MAX_ENTRIES",
     "RANKING_CACHE_TTL",
+    "USER_CACHE_TTL",
+    "USER_CACHE_MAX_ENTRIES",
+    "SHARED_MODEL_CACHE_MAX_BYTES",
+    "SHARED_MODEL_CACHE_TTL",
     "LOG_FORMAT",
     "LOG_DATE_FORMAT",
 ]
@@ -5,15 +5,229 @@ Database bootstrap helpers built around Peewee's DatabaseProxy.
 
 We connect on demand for each request so connection state stays healthy in
 long-lived processes (Gunicorn, poetry run, etc.).
+
+With ``DATABASE_REPLICA_URLS`` configured, ``GET``/``HEAD`` requests run
+their queries on a read replica (round robin) and everything else on the
+primary. A client that wrote within the last ``READ_AFTER_WRITE_SECONDS``
+reads from the primary too, so a vote is never followed by a ranking or
+comparison that misses it because of replication lag. Clients are told
+apart by the ``sub`` claim of their access token, and writes are recorded
+as marker files in ``READ_AFTER_WRITE_DIR`` so every worker on the host sees
+them (in process memory only when the directory is empty). Code running
+outside a request, such as background jobs and the CLI, always uses the
+primary.
+
+Rankings, items and comparisons may instead live in per-user SQLite shards,
+see ``webrankit.sharding``; accounts use ``account_db_proxy``, which never
+follows a shard.
 """
 
-from typing import Any, Dict
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
 
-from flask import Flask
-from peewee import Database, DatabaseProxy
+from flask import Flask, Response, g, request
+from flask_jwt_extended import decode_token
+from peewee import Database, DatabaseProxy, OperationalError
 from playhouse.db_url import connect
 
-db_proxy: DatabaseProxy = DatabaseProxy()
+from .constants import READ_AFTER_WRITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Replica the current context reads from; None means the primary.
+_replica: ContextVar[Optional[Database]] = ContextVar("pwrank_replica", default=None)
+# Shard holding the current user's rankings, see webrankit.sharding.
+_shard: ContextVar[Optional[Database]] = ContextVar("pwrank_shard", default=None)
+
+
+class RoutingDatabaseProxy(DatabaseProxy):
+    """``DatabaseProxy`` whose queries follow the current context's route.
+
+    Queries go to the current shard if there is one, else to the current
+    replica, else to the primary. ``obj`` is always the primary, so code
+    that needs the primary itself (schema management, instrumentation) can
+    keep using it directly.
+    """
+
+    follows_shard = True
+
+    def _target(self) -> Database:
+        if self.obj is None:
+            raise AttributeError("Cannot use uninitialized Proxy.")
+        if self.follows_shard:
+            shard = _shard.get()
+            if shard is not None:
+                return shard
+        return _replica.get() or self.obj
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._target(), attr)
+
+    def __enter__(self) -> Any:
+        return self._target().__enter__()
+
+    def __exit__(self, *exc_info: Any) -> Any:
+        return self._target().__exit__(*exc_info)
+
+
+class AccountDatabaseProxy(RoutingDatabaseProxy):
+    """Proxy for accounts, which stay in the main database when sharding."""
+
+    follows_shard = False
+
+
+db_proxy: RoutingDatabaseProxy = RoutingDatabaseProxy()
+account_db_proxy: AccountDatabaseProxy = AccountDatabaseProxy()
+replicas: List[Database] = []
+_next_replica = itertools.count()
+
+
+def _reset(var: ContextVar[Optional[Database]], token: Token) -> None:
+    try:
+        var.reset(token)
+    except ValueError:
+        # Streamed responses may finish in another context.
+        var.set(None)
+
+
+@contextmanager
+def routed_to(database: Optional[Database]) -> Iterator[None]:
+    """Read from replica ``database`` in this block (``None`` for the primary)."""
+    token = _replica.set(database)
+    try:
+        yield
+    finally:
+        _reset(_replica, token)
+
+
+def on_primary() -> ContextManager[None]:
+    """Send queries in this block to the primary, e.g. reads that must be current."""
+    return routed_to(None)
+
+
+@contextmanager
+def use_shard(database: Optional[Database]) -> Iterator[None]:
+    """Keep rankings, items and comparisons in ``database`` in this block.
+
+    ``None`` selects the main database.
+    """
+    token = _shard.set(database)
+    try:
+        yield
+    finally:
+        _reset(_shard, token)
+
+
+def current_shard() -> Optional[Database]:
+    """The shard of the current context, to carry into background work."""
+    return _shard.get()
+
+
+class RecentWrites:
+    """When each client last wrote, for read-your-writes routing."""
+
+    def __init__(
+        self, window: float = READ_AFTER_WRITE_SECONDS, directory: Optional[str] = None
+    ) -> None:
+        self.window = window
+        self.directory = Path(directory) if directory else None
+        self._written: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.time()
+
+    def configure(self, window: float, directory: Optional[str]) -> None:
+        self.window = window
+        self.directory = Path(directory) if directory else None
+
+    def record(self, key: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._written[key] = now
+            if now - self._last_prune > max(self.window, 1.0) * 10:
+                self._prune(now)
+        if self.directory is None:
+            return
+        path = self.directory / key
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path.touch()
+            os.utime(path, (now, now))
+        except OSError as e:
+            logger.warning(f"Could not record write marker {path}: {e}")
+
+    def recent(self, key: str) -> bool:
+        now = time.time()
+        written = self._written.get(key, 0.0)
+        if now - written < self.window:
+            return True
+        if self.directory is None:
+            return False
+        try:
+            written = (self.directory / key).stat().st_mtime
+        except OSError:
+            return False
+        return now - written < self.window
+
+    def _prune(self, now: float) -> None:
+        self._written = {
+            key: written for key, written in self._written.items() if now - written < self.window
+        }
+        self._last_prune = now
+        if self.directory is None:
+            return
+        for path in self.directory.glob("*"):
+            try:
+                if now - path.stat().st_mtime >= self.window:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+
+
+recent_writes = RecentWrites()
+
+
+def request_subject() -> Optional[str]:
+    """The ``sub`` of the request's access token, without loading the user."""
+    if "_pwrank_subject" in g:
+        return g._pwrank_subject
+    g._pwrank_subject = _decode_subject()
+    return g._pwrank_subject
+
+
+def _decode_subject() -> Optional[str]:
+    token = request.args.get("jwt")
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        token = header[len("Bearer "):]
+    if not token:
+        return None
+    try:
+        subject = decode_token(token, allow_expired=True).get("sub")
+    except Exception:  # noqa: BLE001 - jwt_required rejects the request later
+        return None
+    return str(subject) if subject else None
+
+
+def _choose_replica() -> Optional[Database]:
+    """The next replica that accepts a connection, or ``None`` for the primary."""
+    for _ in range(len(replicas)):
+        replica = replicas[next(_next_replica) % len(replicas)]
+        try:
+            replica.connect(reuse_if_open=True)
+        except OperationalError as e:
+            logger.warning(f"Replica {replica.database} unavailable, trying the next one: {e}")
+            continue
+        return replica
+    return None
 
 
 def init_app(app: Flask) -> Database:
@@ -21,16 +235,40 @@ def init_app(app: Flask) -> Database:
     database_url = app.config["DATABASE_URL"]
     database = connect(database_url)
     db_proxy.initialize(database)
+    account_db_proxy.initialize(database)
+    replicas[:] = [connect(url) for url in app.config.get("DATABASE_REPLICA_URLS", [])]
+    recent_writes.configure(
+        app.config.get("READ_AFTER_WRITE_SECONDS", READ_AFTER_WRITE_SECONDS),
+        app.config.get("READ_AFTER_WRITE_DIR"),
+    )
 
     @app.before_request
     def _open_connection() -> None:
+        if replicas:
+            client = request_subject()
+            if request.method in SAFE_METHODS and not (client and recent_writes.recent(client)):
+                replica = _choose_replica()
+                if replica is not None:
+                    g._pwrank_replica = _replica.set(replica)
+                    return
         if database.is_closed():
             database.connect(reuse_if_open=True)
 
+    @app.after_request
+    def _record_write(response: Response) -> Response:
+        client = request_subject() if replicas else None
+        if client and request.method not in SAFE_METHODS and response.status_code < 400:
+            recent_writes.record(client)
+        return response
+
     @app.teardown_request
     def _close_connection(exc: BaseException | None) -> None:
-        if not database.is_closed():
-            database.close()
+        token = g.pop("_pwrank_replica", None)
+        if token is not None:
+            _reset(_replica, token)
+        for db in [database, *replicas]:
+            if not db.is_closed():
+                db.close()
 
     @app.shell_context_processor
     def _shell_context() -> Dict[str, Any]:
@@ -39,4 +277,18 @@ def init_app(app: Flask) -> Database:
     return database
 
 
-__all__ = ["db_proxy", "init_app"]
+__all__ = [
+    "AccountDatabaseProxy",
+    "RecentWrites",
+    "RoutingDatabaseProxy",
+    "account_db_proxy",
+    "current_shard",
+    "db_proxy",
+    "init_app",
+    "on_primary",
+    "recent_writes",
+    "replicas",
+    "request_subject",
+    "routed_to",
+    "use_shard",
+]
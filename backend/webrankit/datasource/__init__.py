@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+"""External datasources that rankings can import items from."""
+
+from flask import Flask
+
+from .anilist import AniListDatasource, iter_items_from_anilist
+from .base import (
+    DATASOURCES,
+    Datasource,
+    DatasourceError,
+    ImportedItem,
+    datasource_names,
+    get_datasource,
+    register_datasource,
+)
+from .file import FileDatasource
+from .http import FetchError, HttpFetcher, fetcher
+from .jobs import ImportJob, ImportJobs, import_jobs
+from .steam import SteamDatasource, iter_items_from_steam
+
+
+def init_app(app: Flask) -> None:
+    """Apply app configuration to the shared fetcher and job pool."""
+    fetcher.configure(app.config)
+    import_jobs.init_app(app)
+
+
+__all__ = [
+    "DATASOURCES",
+    "AniListDatasource",
+    "Datasource",
+    "DatasourceError",
+    "FetchError",
+    "FileDatasource",
+    "HttpFetcher",
+    "ImportJob",
+    "ImportJobs",
+    "ImportedItem",
+    "SteamDatasource",
+    "datasource_names",
+    "fetcher",
+    "get_datasource",
+    "import_jobs",
+    "init_app",
+    "iter_items_from_anilist",
+    "iter_items_from_steam",
+    "register_datasource",
+]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterator, Mapping, Sequence
+
+from .base import Datasource, DatasourceError, ImportedItem, register_datasource
+from .http import FetchError, fetcher, setting
+
+logger = logging.getLogger(__name__)
+
+ANILIST_API_URL = "https://graphql.anilist.co"
+ANILIST_PAGE_SIZE = 50  # AniList's maximum perPage
+
+QUERY = """
+query ($username: String, $statuses: [MediaListStatus], $page: Int, $perPage: Int) {
+  Page(page: $page, perPage: $perPage) {
+    pageInfo { hasNextPage }
+    mediaList(userName: $username, status_in: $statuses, type: ANIME) {
+      score
+      media {
+        title { userPreferred }
+        coverImage { extraLarge }
+      }
+    }
+  }
+}
+"""
+
+
+def iter_items_from_anilist(
+    username: str, statuses: Sequence[str], per_page: int = ANILIST_PAGE_SIZE
+) -> Iterator[ImportedItem]:
+    """Yield the user's anime list one GraphQL page at a time."""
+    url = setting("ANILIST_API_URL", ANILIST_API_URL)
+    page = 1
+    count = 0
+    while True:
+        variables = {
+            "username": username,
+            "statuses": list(statuses),
+            "page": page,
+            "perPage": per_page,
+        }
+        try:
+            response = fetcher.post(url, json_body={"query": QUERY, "variables": variables})
+        except FetchError as e:
+            logger.error(f"AniList request failed for user '{username}': {e}")
+            raise
+
+        try:
+            data = (response.json().get("data") or {}).get("Page") or {}
+        except ValueError as e:
+            logger.error(f"Failed to parse AniList response as JSON: {e}")
+            return
+
+        for entry in data.get("mediaList") or []:
+            try:
+                media = entry["media"]
+                yield ImportedItem(
+                    label=media["title"]["userPreferred"],
+                    img_url=media["coverImage"]["extraLarge"] or "",
+                    init_rating=entry.get("score") or 0,
+                )
+                count += 1
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Missing required field in AniList entry: {e} - Skipping entry")
+
+        if not (data.get("pageInfo") or {}).get("hasNextPage"):
+            break
+        page += 1
+
+    logger.info(f"Fetched {count} entries in {page} page(s) from AniList for user '{username}'")
+
+
+@register_datasource
+class AniListDatasource(Datasource):
+    name = "anilist"
+
+    def __init__(self, username: str, statuses: Sequence[str]) -> None:
+        self.username = username
+        self.statuses = list(statuses)
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "AniListDatasource":
+        username = payload.get("anilist_username")
+        if not username:
+            raise DatasourceError("anilist_username is required.")
+        return cls(username, payload.get("anilist_statuses") or [])
+
+    def iter_items(self) -> Iterator[ImportedItem]:
+        return iter_items_from_anilist(self.username, self.statuses)
+
+
+__all__ = ["ANILIST_API_URL", "AniListDatasource", "iter_items_from_anilist"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+"""
+Datasource plugin interface.
+
+A datasource turns request parameters into a stream of ``ImportedItem``
+records. Sources register themselves by name with ``@register_datasource``;
+``Ranking.datasource`` selects which one a ranking imports from.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Iterator, List, Mapping, Optional, Type
+
+
+class DatasourceError(ValueError):
+    """Invalid import parameters; the message is shown to the client."""
+
+
+@dataclass
+class ImportedItem:
+    label: str
+    img_url: str = ""
+    init_rating: float = 0
+
+
+class Datasource(ABC):
+    """Base class for item sources.
+
+    ``iter_items`` should yield items as soon as they are available (page by
+    page for paginated APIs) so imports never hold a whole library in
+    memory. Sources whose items arrive best-first without scores set
+    ``ordinal``; their initial ratings are derived from position once the
+    import has seen every item.
+    """
+
+    name: ClassVar[str] = ""
+    ordinal: ClassVar[bool] = False
+
+    @classmethod
+    @abstractmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "Datasource":
+        """Build a source from import request parameters.
+
+        Raises ``DatasourceError`` when they are invalid.
+        """
+
+    @abstractmethod
+    def iter_items(self) -> Iterator[ImportedItem]:
+        """Yield the items to import."""
+
+
+DATASOURCES: Dict[str, Type[Datasource]] = {}
+
+
+def register_datasource(cls: Type[Datasource]) -> Type[Datasource]:
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} must define a datasource name")
+    DATASOURCES[cls.name] = cls
+    return cls
+
+
+def get_datasource(name: str) -> Optional[Type[Datasource]]:
+    return DATASOURCES.get(name)
+
+
+def datasource_names() -> List[str]:
+    return sorted(DATASOURCES)
+
+
+__all__ = [
+    "DATASOURCES",
+    "Datasource",
+    "DatasourceError",
+    "ImportedItem",
+    "datasource_names",
+    "get_datasource",
+    "register_datasource",
+]
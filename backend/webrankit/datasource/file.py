@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+"""
+Import from CSV or JSON Lines files.
+
+CSV follows resorter's input format: one item per line, a name and an
+optional rating (``Akira`` and ``"Akira", 10`` are both valid), no header.
+A first row whose rating column is not numeric (e.g. resorter's own
+``"Media","Quantile"`` output header) is skipped. JSON Lines files hold one
+object per line with ``label`` (or ``name``) and optional ``init_rating``
+(or ``rating``) and ``img_url``.
+"""
+
+import csv
+import io
+import json
+import logging
+from itertools import chain
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from ..constants import RATING_SCALE_MAX, RATING_SCALE_MIN
+from .base import Datasource, DatasourceError, ImportedItem, register_datasource
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+
+
+def _rating(value: Any) -> Optional[float]:
+    if value is None or str(value).strip() == "":
+        return None
+    rating = float(value)
+    return min(max(rating, RATING_SCALE_MIN), RATING_SCALE_MAX)
+
+
+def iter_csv_items(lines: Iterable[str]) -> Iterator[ImportedItem]:
+    for row_number, row in enumerate(csv.reader(lines, skipinitialspace=True), 1):
+        if not row or not row[0].strip():
+            continue
+        label = row[0].strip()
+        try:
+            rating = _rating(row[1]) if len(row) > 1 else None
+        except ValueError:
+            if row_number == 1:
+                continue  # header row
+            logger.warning(f"Non-numeric rating on CSV line {row_number} - Skipping row")
+            continue
+        yield ImportedItem(label=label, init_rating=rating or 0)
+
+
+def iter_jsonl_items(lines: Iterable[str]) -> Iterator[ImportedItem]:
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            label = str(record.get("label") or record.get("name") or "").strip()
+            rating = _rating(record.get("init_rating", record.get("rating")))
+        except (ValueError, AttributeError, TypeError) as e:
+            logger.warning(f"Invalid JSON Lines record on line {line_number}: {e} - Skipping record")
+            continue
+        if not label:
+            continue
+        yield ImportedItem(
+            label=label,
+            img_url=str(record.get("img_url") or ""),
+            init_rating=rating or 0,
+        )
+
+
+@register_datasource
+class FileDatasource(Datasource):
+    name = "file"
+
+    def __init__(self, lines: Iterable[str], file_format: Optional[str] = None) -> None:
+        lines = iter(lines)
+        if file_format is None:
+            first = next(lines, "")
+            file_format = "jsonl" if first.lstrip().startswith("{") else "csv"
+            lines = chain([first], lines)
+        if file_format not in FORMATS:
+            raise DatasourceError(f"file_format must be one of: {', '.join(FORMATS)}.")
+        self.lines = lines
+        self.file_format = file_format
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "FileDatasource":
+        contents = payload.get("file_contents")
+        if not contents or not isinstance(contents, str):
+            raise DatasourceError("file_contents is required.")
+        return cls(io.StringIO(contents), payload.get("file_format") or None)
+
+    def iter_items(self) -> Iterator[ImportedItem]:
+        if self.file_format == "jsonl":
+            return iter_jsonl_items(self.lines)
+        return iter_csv_items(self.lines)
+
+
+__all__ = ["FileDatasource", "iter_csv_items", "iter_jsonl_items"]
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+"""
+HTTP access for external datasources.
+
+``HttpFetcher`` wraps ``requests`` with what upstream APIs need from us:
+
+* a TTL response cache, so repeated imports of the same profile are free;
+* conditional revalidation (``If-None-Match``/``If-Modified-Since``) once an
+  entry expires, so unchanged upstream data costs a 304;
+* retries with exponential backoff and jitter on timeouts, connection
+  errors, 429 and 5xx, honouring ``Retry-After``.
+
+Sessions are per thread because ``requests.Session`` is not thread-safe and
+imports run concurrently on the job pool.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+from flask import current_app, has_app_context
+
+from ..constants import (
+    EXTERNAL_API_CACHE_MAX_BYTES,
+    EXTERNAL_API_CACHE_MAX_ENTRIES,
+    EXTERNAL_API_CACHE_TTL,
+    EXTERNAL_API_CONNECT_TIMEOUT,
+    EXTERNAL_API_MAX_REDIRECTS,
+    EXTERNAL_API_MAX_RETRIES,
+    EXTERNAL_API_READ_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def setting(name: str, default: Any) -> Any:
+    """Read ``name`` from the active app config, falling back to ``default``."""
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+class FetchError(Exception):
+    """Raised when an upstream request fails after all retries."""
+
+
+@dataclass
+class FetchedResponse:
+    status: int
+    content: bytes
+    headers: Mapping[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+@dataclass
+class _CacheEntry:
+    expires: float
+    response: FetchedResponse
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class HttpFetcher:
+    """Cached, retrying HTTP client shared by all datasources."""
+
+    def __init__(
+        self,
+        cache_ttl: float = EXTERNAL_API_CACHE_TTL,
+        max_entries: int = EXTERNAL_API_CACHE_MAX_ENTRIES,
+        max_retries: int = EXTERNAL_API_MAX_RETRIES,
+        max_cache_bytes: int = EXTERNAL_API_CACHE_MAX_BYTES,
+        backoff: float = 0.5,
+        timeout: Tuple[float, float] = (EXTERNAL_API_CONNECT_TIMEOUT, EXTERNAL_API_READ_TIMEOUT),
+    ) -> None:
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self.max_retries = max_retries
+        self.max_cache_bytes = max_cache_bytes
+        self.backoff = backoff
+        self.timeout = timeout
+        self._cache: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, config: Mapping[str, Any]) -> None:
+        """Apply ``EXTERNAL_API_*`` settings from a Flask config."""
+        self.cache_ttl = config.get("EXTERNAL_API_CACHE_TTL", self.cache_ttl)
+        self.max_retries = config.get("EXTERNAL_API_MAX_RETRIES", self.max_retries)
+        self.backoff = config.get("EXTERNAL_API_BACKOFF", self.backoff)
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def get(self, url: str, **kwargs: Any) -> FetchedResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> FetchedResponse:
+        return self.request("POST", url, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        json_body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        cache: bool = True,
+    ) -> FetchedResponse:
+        """Perform a request, serving from or revalidating the cache."""
+        key = self._cache_key(method, url, json_body)
+        entry = self._cache.get(key) if cache else None
+        if entry is not None and entry.expires > time.monotonic():
+            return self._from_cache(entry)
+
+        request_headers = self._conditional_headers(entry, headers)
+        response = self._send(method, url, json_body, request_headers)
+        if response.status_code == 304 and entry is not None:
+            logger.debug(f"Revalidated cached response for {url}")
+            entry.expires = time.monotonic() + self.cache_ttl
+            return self._from_cache(entry)
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            raise FetchError(f"{e} - Response: {response.text[:200]}") from e
+
+        fetched = FetchedResponse(response.status_code, response.content, dict(response.headers))
+        if cache:
+            self._store(key, fetched, response.headers)
+        return fetched
+
+    def stream(
+        self,
+        url: str,
+        chunk_size: int = 64 * 1024,
+        cache: bool = True,
+        follow: Optional[Callable[[str], bool]] = None,
+    ) -> Iterator[bytes]:
+        """Yield the body of a GET in chunks as it arrives.
+
+        Cached bodies are replayed in chunks. A fresh body is cached once it
+        has been read completely, unless it exceeds ``max_cache_bytes``.
+        Only establishing the response is retried; once bytes have been
+        yielded a failure is raised to the caller.
+
+        With ``follow``, redirects are followed only to URLs it accepts,
+        up to ``EXTERNAL_API_MAX_REDIRECTS`` hops; otherwise
+        ``FetchError`` is raised.
+        """
+        key = self._cache_key("GET", url, None)
+        entry = self._cache.get(key) if cache else None
+        if entry is not None and entry.expires > time.monotonic():
+            yield from _chunks(entry.response.content, chunk_size)
+            return
+
+        response = self._send(
+            "GET",
+            url,
+            None,
+            self._conditional_headers(entry, None),
+            stream=True,
+            allow_redirects=follow is None,
+        )
+        hops = 0
+        while follow is not None and response.is_redirect:
+            target = urljoin(response.url, response.headers["Location"])
+            response.close()
+            hops += 1
+            if hops > EXTERNAL_API_MAX_REDIRECTS or not follow(target):
+                raise FetchError(f"Refusing to follow redirect from {url} to {target}")
+            response = self._send("GET", target, None, {}, stream=True, allow_redirects=False)
+        try:
+            if response.status_code == 304 and entry is not None:
+                entry.expires = time.monotonic() + self.cache_ttl
+                yield from _chunks(entry.response.content, chunk_size)
+                return
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                raise FetchError(str(e)) from e
+
+            body: Optional[list[bytes]] = [] if cache else None
+            size = 0
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if body is not None:
+                        size += len(chunk)
+                        if size > self.max_cache_bytes:
+                            body = None
+                        else:
+                            body.append(chunk)
+                    yield chunk
+            except requests.RequestException as e:
+                raise FetchError(f"Reading {url} failed: {e}") from e
+            if body is not None:
+                fetched = FetchedResponse(response.status_code, b"".join(body), dict(response.headers))
+                self._store(key, fetched, response.headers)
+        finally:
+            response.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        json_body: Any,
+        headers: Dict[str, str],
+        stream: bool = False,
+        allow_redirects: bool = True,
+    ) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    json=json_body,
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=stream,
+                    allow_redirects=allow_redirects,
+                )
+            except (requests.Timeout, requests.ConnectionError) as e:
+                if attempt >= self.max_retries:
+                    raise FetchError(f"{method} {url} failed: {e}") from e
+                delay = self._delay(attempt, None)
+                logger.warning(f"{method} {url} failed ({e}); retrying in {delay:.2f}s")
+            except requests.RequestException as e:
+                raise FetchError(f"{method} {url} failed: {e}") from e
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"{method} {url} returned {response.status_code}; retrying in {delay:.2f}s")
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    @staticmethod
+    def _from_cache(entry: _CacheEntry) -> FetchedResponse:
+        cached = entry.response
+        return FetchedResponse(cached.status, cached.content, cached.headers, from_cache=True)
+
+    @staticmethod
+    def _conditional_headers(
+        entry: Optional[_CacheEntry], headers: Optional[Dict[str, str]]
+    ) -> Dict[str, str]:
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+        return request_headers
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        return self.backoff * (2**attempt) * (0.5 + random.random())
+
+    def _store(self, key: str, fetched: FetchedResponse, headers: Mapping[str, str]) -> None:
+        entry = _CacheEntry(
+            expires=time.monotonic() + self.cache_ttl,
+            response=fetched,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+        )
+        with self._lock:
+            self._cache.pop(key, None)
+            self._cache[key] = entry
+            while len(self._cache) > self.max_entries:
+                self._cache.pop(next(iter(self._cache)))
+
+    @staticmethod
+    def _cache_key(method: str, url: str, json_body: Any) -> str:
+        body = json.dumps(json_body, sort_keys=True) if json_body is not None else ""
+        return hashlib.sha1(f"{method} {url} {body}".encode()).hexdigest()
+
+
+def _chunks(content: bytes, size: int) -> Iterator[bytes]:
+    for start in range(0, len(content), size):
+        yield content[start : start + size]
+
+
+fetcher = HttpFetcher()
+
+
+__all__ = ["FetchError", "FetchedResponse", "HttpFetcher", "fetcher", "setting"]
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+"""
+Background import jobs.
+
+Imports talk to slow upstream services, so request handlers only enqueue a
+job and return its id; a small thread pool does the fetching and database
+writes inside an application context. ``ImportJobResource`` serves job
+state, which is also written to one JSON file per job in ``IMPORT_JOB_DIR``
+so that whichever worker answers the status poll finds it. With an empty
+directory, state stays in the memory of the process that accepted the
+import, so only single-process servers may leave it unset.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask
+
+from ..constants import IMPORT_JOB_TTL, IMPORT_JOB_WORKERS
+from ..database import current_shard, db_proxy, use_shard
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class ImportJob:
+    ranking_id: str
+    user_id: str
+    datasource: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    item_count: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "ranking_id": self.ranking_id,
+            "datasource": self.datasource,
+            "status": self.status,
+            "item_count": self.item_count,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ImportJobs:
+    """Runs import callables on a thread pool and tracks their status."""
+
+    def __init__(
+        self,
+        max_workers: int = IMPORT_JOB_WORKERS,
+        ttl: float = IMPORT_JOB_TTL,
+        directory: Optional[str] = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.directory = Path(directory) if directory else None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.max_workers = app.config.get("IMPORT_JOB_WORKERS", self.max_workers)
+        self.ttl = app.config.get("IMPORT_JOB_TTL", self.ttl)
+        directory = app.config.get("IMPORT_JOB_DIR")
+        self.directory = Path(directory) if directory else None
+
+    def submit(self, app: Flask, job: ImportJob, func: Callable[[], int]) -> ImportJob:
+        """Queue ``func`` (returning the resulting item count) as ``job``."""
+        self._prune()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="import"
+                )
+            self._jobs[job.id] = job
+        self._store(job)
+        self._executor.submit(self._run, app, current_shard(), job, func)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """The job ``job_id``, submitted by this or any other worker."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        path = self._path(job_id)
+        if path is None:
+            return None
+        try:
+            return ImportJob(**json.loads(path.read_text()))
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable import job state {path}: {e}")
+            return None
+
+    def _path(self, job_id: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        try:
+            # Ids arrive from URLs; never let one name another path.
+            return self.directory / f"{uuid.UUID(hex=job_id).hex}.json"
+        except ValueError:
+            return None
+
+    def _store(self, job: ImportJob) -> None:
+        path = self._path(job.id)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".job-")
+            try:
+                with os.fdopen(fd, "w") as fh:
+                    json.dump(asdict(job), fh)
+                os.replace(tmp, path)
+            except OSError:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write import job state {path}: {e}")
+
+    def _run(self, app: Flask, shard: Any, job: ImportJob, func: Callable[[], int]) -> None:
+        job.status = RUNNING
+        self._store(job)
+        with app.app_context(), use_shard(shard):
+            db_proxy.connect(reuse_if_open=True)
+            try:
+                job.item_count = func()
+                job.status = SUCCEEDED
+                logger.info(f"Import job {job.id} for ranking {job.ranking_id} finished")
+            except Exception as e:  # noqa: BLE001 - reported through the job
+                logger.exception(f"Import job {job.id} for ranking {job.ranking_id} failed")
+                job.error = str(e)
+                job.status = FAILED
+            finally:
+                job.finished_at = time.time()
+                self._store(job)
+                if not db_proxy.is_closed():
+                    db_proxy.close()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.done and job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.directory is None:
+            return
+        # Files are rewritten on every status change, so a stale one belongs
+        # to a job finished long ago or to a worker that died running it.
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+
+
+import_jobs = ImportJobs()
+
+
+__all__ = ["FAILED", "ImportJob", "ImportJobs", "QUEUED", "RUNNING", "SUCCEEDED", "import_jobs"]
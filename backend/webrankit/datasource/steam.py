@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+"""
+Steam library import.
+
+The games page embeds the whole library as ``var rgGames = [...];`` inside a
+script tag. Rather than building an HTML tree of the page, the response is
+scanned as it downloads: bytes are skipped until the marker, then the array
+is decoded one game object at a time, so only the current element and a
+small window of text are held in memory.
+"""
+
+import codecs
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, Mapping
+
+from .base import Datasource, DatasourceError, ImportedItem, register_datasource
+from .http import FetchError, fetcher, setting
+
+logger = logging.getLogger(__name__)
+
+STEAM_COMMUNITY_URL = "https://steamcommunity.com"
+RG_GAMES_MARKER = b"var rgGames = "
+
+# Consumed text is dropped from the decode buffer once it grows past this.
+_COMPACT_AT = 64 * 1024
+_WHITESPACE = " \t\r\n"
+
+
+class SteamParseError(ValueError):
+    """The ``rgGames`` payload is missing or malformed."""
+
+
+def _after_marker(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Skip everything up to and including ``RG_GAMES_MARKER``."""
+    keep = len(RG_GAMES_MARKER) - 1
+    tail = b""
+    for chunk in chunks:
+        window = tail + chunk
+        idx = window.find(RG_GAMES_MARKER)
+        if idx != -1:
+            yield window[idx + len(RG_GAMES_MARKER) :]
+            yield from chunks
+            return
+        tail = window[-keep:]
+    raise SteamParseError("No rgGames payload found")
+
+
+def iter_rg_games(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Lazily decode the objects of the ``rgGames`` array in a games page."""
+    source = _after_marker(iter(chunks))
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buf = ""
+    pos = 0
+    exhausted = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, exhausted
+        if exhausted:
+            return False
+        if pos > _COMPACT_AT:
+            buf, pos = buf[pos:], 0
+        try:
+            buf += utf8.decode(next(source))
+        except StopIteration:
+            buf += utf8.decode(b"", final=True)
+            exhausted = True
+        return True
+
+    def skip(chars: str) -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    skip(_WHITESPACE)
+    if pos >= len(buf) or buf[pos] != "[":
+        raise SteamParseError("rgGames is not a JSON array")
+    pos += 1
+
+    while True:
+        skip(_WHITESPACE + ",")
+        if pos >= len(buf):
+            raise SteamParseError("Unterminated rgGames array")
+        if buf[pos] == "]":
+            return
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                # Most likely the element is cut off at the buffer end.
+                if not fill():
+                    raise SteamParseError(f"Malformed rgGames payload: {e}") from e
+                continue
+            if end == len(buf) and fill():
+                # A number at the buffer end may continue in the next chunk.
+                continue
+            break
+        pos = end
+        yield obj
+
+
+def _game_record(app: Dict) -> ImportedItem:
+    return ImportedItem(
+        label=app["name"],
+        img_url=app["logo"].replace("capsule_184x69", "header"),
+    )
+
+
+def iter_items_from_steam(steam_id: str) -> Iterator[ImportedItem]:
+    """Stream the library in the page's playtime order, most played first."""
+    base_url = setting("STEAM_COMMUNITY_URL", STEAM_COMMUNITY_URL)
+    url = f"{base_url}/id/{steam_id}/games/?tab=all&sort=playtime"
+
+    count = 0
+    chunks = fetcher.stream(url)
+    try:
+        for app in iter_rg_games(chunks):
+            try:
+                record = _game_record(app)
+            except (KeyError, TypeError, AttributeError) as e:
+                logger.warning(f"Missing required field in Steam game data: {e} - Skipping game")
+                continue
+            count += 1
+            yield record
+        # Read the short remainder of the page so the fetcher can cache it.
+        for _ in chunks:
+            pass
+    except FetchError as e:
+        logger.error(f"Steam request failed for user '{steam_id}': {e}")
+        raise
+    except SteamParseError as e:
+        logger.warning(f"No usable games data in Steam profile for '{steam_id}': {e}")
+        return
+
+    logger.info(f"Extracted {count} valid games from Steam for '{steam_id}'")
+
+
+@register_datasource
+class SteamDatasource(Datasource):
+    name = "steam"
+    # Games come most-played first; ratings follow from position.
+    ordinal = True
+
+    def __init__(self, steam_id: str) -> None:
+        self.steam_id = steam_id
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "SteamDatasource":
+        steam_id = payload.get("steam_id")
+        if not steam_id:
+            raise DatasourceError("steam_id is required.")
+        return cls(steam_id)
+
+    def iter_items(self) -> Iterator[ImportedItem]:
+        return iter_items_from_steam(self.steam_id)
+
+
+__all__ = [
+    "STEAM_COMMUNITY_URL",
+    "SteamDatasource",
+    "SteamParseError",
+    "iter_items_from_steam",
+    "iter_rg_games",
+]
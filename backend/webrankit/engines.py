@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+"""
+Online rating engines.
+
+Fitting Bradley-Terry in R after every vote gets slow on big rankings. A
+ranking can instead use ``elo`` or ``glicko2``: each vote updates the two
+items' stored ratings in constant time (``Comparison.compare``), and the
+model served to the resources is built from those ratings without a fit.
+
+Ratings use the usual 1500-centred scale, which is the Bradley-Terry
+ability scale multiplied by 400 / ln(10), so abilities and standard errors
+convert directly and responses keep the shape of the ``bt`` engine. Elo has
+no uncertainty of its own; its standard error is approximated from the
+number of games played.
+
+Online updates depend on vote order and drift from the exact fit, so every
+``ONLINE_REFIT_EVERY`` ranking versions an exact fit is run in the
+background and its abilities replace the online ratings.
+"""
+
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional, Set, Tuple
+
+from flask import Flask, current_app
+
+from .constants import (
+    ELO_K_FACTOR,
+    GLICKO2_TAU,
+    ONLINE_DEFAULT_RATING,
+    ONLINE_DEFAULT_RD,
+    ONLINE_DEFAULT_VOLATILITY,
+    ONLINE_REFIT_EVERY,
+)
+from .database import current_shard, db_proxy, use_shard
+
+logger = logging.getLogger(__name__)
+
+BT = "bt"
+ELO = "elo"
+GLICKO2 = "glicko2"
+ENGINES = (BT, ELO, GLICKO2)
+
+# Rating points per unit of Bradley-Terry ability (Glicko-2's scale factor).
+SCALE = 400 / math.log(10)
+
+_CONVERGENCE = 1e-6
+
+
+@dataclass
+class OnlineRating:
+    rating: float = ONLINE_DEFAULT_RATING
+    rd: float = ONLINE_DEFAULT_RD
+    volatility: float = ONLINE_DEFAULT_VOLATILITY
+    games: int = 0
+
+
+def ability(rating: OnlineRating) -> float:
+    return (rating.rating - ONLINE_DEFAULT_RATING) / SCALE
+
+
+def ability_stderr(engine: str, rating: OnlineRating) -> float:
+    if engine == GLICKO2:
+        return rating.rd / SCALE
+    # One game carries at most 1/4 unit of Fisher information about the
+    # ability difference, so this is a lower bound on the Elo uncertainty.
+    return 2 / math.sqrt(rating.games + 1)
+
+
+def from_ability(ability_value: float, stderr: float, previous: OnlineRating) -> OnlineRating:
+    """``previous`` with rating and deviation replaced by fitted values."""
+    rd = stderr * SCALE if math.isfinite(stderr) else previous.rd
+    return OnlineRating(
+        ONLINE_DEFAULT_RATING + ability_value * SCALE,
+        min(rd, ONLINE_DEFAULT_RD),
+        previous.volatility,
+        previous.games,
+    )
+
+
+def elo_update(
+    first: OnlineRating, second: OnlineRating, score: float, k: float = ELO_K_FACTOR
+) -> Tuple[OnlineRating, OnlineRating]:
+    """``score`` is 1 if ``first`` won, 0 if it lost and 0.5 for a draw."""
+    expected = 1 / (1 + 10 ** ((second.rating - first.rating) / 400))
+    change = k * (score - expected)
+    return (
+        OnlineRating(first.rating + change, first.rd, first.volatility, first.games + 1),
+        OnlineRating(second.rating - change, second.rd, second.volatility, second.games + 1),
+    )
+
+
+def _g(phi: float) -> float:
+    return 1 / math.sqrt(1 + 3 * phi * phi / (math.pi * math.pi))
+
+
+def _glicko2_single(
+    player: OnlineRating, opponent: OnlineRating, score: float, tau: float
+) -> OnlineRating:
+    """Glicko-2 update of ``player`` for a rating period of one game."""
+    mu = (player.rating - ONLINE_DEFAULT_RATING) / SCALE
+    phi = player.rd / SCALE
+    mu_j = (opponent.rating - ONLINE_DEFAULT_RATING) / SCALE
+    g = _g(opponent.rd / SCALE)
+    expected = 1 / (1 + math.exp(-g * (mu - mu_j)))
+    v = 1 / (g * g * expected * (1 - expected))
+    delta = v * g * (score - expected)
+
+    # New volatility: root of f by the Illinois method (Glickman, step 5).
+    a = math.log(player.volatility**2)
+
+    def f(x: float) -> float:
+        ex = math.exp(x)
+        return ex * (delta * delta - phi * phi - v - ex) / (
+            2 * (phi * phi + v + ex) ** 2
+        ) - (x - a) / (tau * tau)
+
+    upper = a
+    if delta * delta > phi * phi + v:
+        lower = math.log(delta * delta - phi * phi - v)
+    else:
+        k = 1
+        while f(a - k * tau) < 0:
+            k += 1
+        lower = a - k * tau
+    f_upper, f_lower = f(upper), f(lower)
+    while abs(lower - upper) > _CONVERGENCE:
+        c = upper + (upper - lower) * f_upper / (f_lower - f_upper)
+        f_c = f(c)
+        if f_c * f_lower <= 0:
+            upper, f_upper = lower, f_lower
+        else:
+            f_upper /= 2
+        lower, f_lower = c, f_c
+    volatility = math.exp(upper / 2)
+
+    phi_star = math.sqrt(phi * phi + volatility * volatility)
+    phi_new = 1 / math.sqrt(1 / (phi_star * phi_star) + 1 / v)
+    mu_new = mu + phi_new * phi_new * g * (score - expected)
+    return OnlineRating(
+        ONLINE_DEFAULT_RATING + mu_new * SCALE, phi_new * SCALE, volatility, player.games + 1
+    )
+
+
+def glicko2_update(
+    first: OnlineRating, second: OnlineRating, score: float, tau: float = GLICKO2_TAU
+) -> Tuple[OnlineRating, OnlineRating]:
+    """Both sides of one game, each against the other's pre-game rating."""
+    return (
+        _glicko2_single(first, second, score, tau),
+        _glicko2_single(second, first, 1 - score, tau),
+    )
+
+
+def update(
+    engine: str, first: OnlineRating, second: OnlineRating, score: float
+) -> Tuple[OnlineRating, OnlineRating]:
+    if engine == ELO:
+        return elo_update(first, second, score)
+    if engine == GLICKO2:
+        return glicko2_update(first, second, score)
+    raise ValueError(f"`{engine}` is not an online engine")
+
+
+class RefitScheduler:
+    """Runs exact refits for online rankings on one background thread.
+
+    A ranking with a refit already queued or running is not queued again.
+    """
+
+    def __init__(self, every: int = ONLINE_REFIT_EVERY) -> None:
+        self.every = every
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.every = app.config.get("ONLINE_REFIT_EVERY", self.every)
+
+    def due(self, version: int, refit_version: int) -> bool:
+        """Whether a ranking last refit at ``refit_version`` needs another."""
+        return refit_version == 0 or version - refit_version >= self.every
+
+    def request(self, ranking_id: Hashable, func: Callable[[], None]) -> bool:
+        """Queue ``func`` for ``ranking_id``; returns whether it was queued."""
+        app = current_app._get_current_object()
+        with self._lock:
+            if ranking_id in self._pending:
+                return False
+            self._pending.add(ranking_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refit")
+        self._executor.submit(self._run, app, current_shard(), ranking_id, func)
+        return True
+
+    def _run(
+        self, app: Flask, shard: Optional[Any], ranking_id: Hashable, func: Callable[[], None]
+    ) -> None:
+        with app.app_context(), use_shard(shard):
+            db_proxy.connect(reuse_if_open=True)
+            try:
+                func()
+            except Exception:  # noqa: BLE001 - online ratings stay usable
+                logger.exception(f"Background refit of ranking {ranking_id} failed")
+            finally:
+                with self._lock:
+                    self._pending.discard(ranking_id)
+                if not db_proxy.is_closed():
+                    db_proxy.close()
+
+
+online_refits = RefitScheduler()
+
+
+__all__ = [
+    "BT",
+    "ELO",
+    "ENGINES",
+    "GLICKO2",
+    "OnlineRating",
+    "RefitScheduler",
+    "ability",
+    "ability_stderr",
+    "elo_update",
+    "from_ability",
+    "glicko2_update",
+    "online_refits",
+    "update",
+]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+"""
+Push notifications for ranking changes.
+
+Whenever a model is fitted for a ranking that has live subscribers, the new
+coefficients are compared against the last published state and only items
+whose rank or displayed rating changed are pushed. Subscribers are queues
+owned by the server-sent-events endpoint; nothing is computed for rankings
+nobody is watching.
+
+The broker is per process. Subscribers additionally poll the ranking version
+so writes handled by another worker still reach them (see
+``RankingEventsResource``).
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from .pairwise import PairwiseModel, rating_fields
+
+logger = logging.getLogger(__name__)
+
+# item id -> (rank, curr_rating, stderr, ability)
+Snapshot = Dict[str, Tuple[int, float, float, float]]
+
+
+def _snapshot(model: PairwiseModel) -> Snapshot:
+    coefficients = model.coefficients or []
+    total = len(coefficients)
+    snapshot: Snapshot = {}
+    for idx, (ability, stderr, item_id) in enumerate(coefficients):
+        fields = rating_fields(idx, total, ability, stderr)
+        snapshot[str(item_id)] = (
+            total - idx,
+            fields["curr_rating"],
+            fields["stderr"],
+            fields["ability"],
+        )
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Dict[str, List[Any]]:
+    """Items that are new or changed in ``new``, plus ids that disappeared."""
+    changed = [
+        {
+            "id": item_id,
+            "rank": values[0],
+            "curr_rating": values[1],
+            "stderr": values[2],
+            "ability": values[3],
+        }
+        for item_id, values in new.items()
+        if old.get(item_id) != values
+    ]
+    removed = [item_id for item_id in old if item_id not in new]
+    return {"items": changed, "removed": removed}
+
+
+class RankingEvents:
+    """Per-process publish/subscribe hub keyed by ranking id."""
+
+    def __init__(self, max_queue: int = 64) -> None:
+        self.max_queue = max_queue
+        self._subscribers: Dict[Hashable, Set[queue.Queue]] = {}
+        self._snapshots: Dict[Hashable, Tuple[int, Snapshot]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, ranking_id: Hashable, subscriber: Optional[queue.Queue] = None) -> queue.Queue:
+        """Register ``subscriber``, by default a new bounded queue, for the ranking."""
+        if subscriber is None:
+            subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(ranking_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, ranking_id: Hashable, subscriber: queue.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(ranking_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[ranking_id]
+                self._snapshots.pop(ranking_id, None)
+
+    def has_subscribers(self, ranking_id: Hashable) -> bool:
+        return bool(self._subscribers.get(ranking_id))
+
+    def last_version(self, ranking_id: Hashable) -> Optional[int]:
+        entry = self._snapshots.get(ranking_id)
+        return entry[0] if entry else None
+
+    def publish_model(self, ranking_id: Hashable, version: int, model: PairwiseModel) -> None:
+        """Diff ``model`` against the last published state and notify subscribers.
+
+        The first model seen for a ranking only establishes the baseline.
+        Versions older than the baseline are ignored.
+        """
+        if not self.has_subscribers(ranking_id):
+            return
+
+        snapshot = _snapshot(model)
+        with self._lock:
+            previous = self._snapshots.get(ranking_id)
+            if previous is not None and previous[0] >= version:
+                return
+            self._snapshots[ranking_id] = (version, snapshot)
+            subscribers = list(self._subscribers.get(ranking_id, ()))
+
+        if previous is None:
+            return
+        diff = diff_snapshots(previous[1], snapshot)
+        if not diff["items"] and not diff["removed"]:
+            return
+
+        event = {"version": version, **diff}
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Slow client: tell it to refetch instead of buffering forever.
+                logger.debug(f"Dropping diff for slow subscriber of ranking {ranking_id}")
+                _drain(subscriber)
+                subscriber.put_nowait({"version": version, "resync": True})
+
+
+def _drain(subscriber: queue.Queue) -> None:
+    try:
+        while True:
+            subscriber.get_nowait()
+    except queue.Empty:
+        pass
+
+
+ranking_events = RankingEvents()
+
+
+__all__ = ["RankingEvents", "diff_snapshots", "ranking_events"]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+"""
+Bradley-Terry fits on a dedicated thread pool.
+
+Request handlers do not run R themselves: ``Ranking.get_pairwise_model``
+reads the comparisons on the request thread and hands the fit to
+``model_fits``. At most ``FIT_THREADS`` fits run at once per process, so a
+burst of cold rankings queues here rather than competing with ordinary
+requests for the CPU, and requests for the same ranking version wait for
+a single fit instead of each starting one.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Hashable, Optional
+
+from flask import Flask
+
+from .constants import FIT_THREADS
+from .pairwise import PairwiseModel
+
+
+class FitPool:
+    """Runs ``PairwiseModel.update_model`` on a bounded pool of threads."""
+
+    def __init__(self, threads: int = FIT_THREADS) -> None:
+        self.threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.threads = app.config.get("FIT_THREADS", self.threads)
+
+    def fit(self, key: Hashable, model: PairwiseModel) -> PairwiseModel:
+        """Fit ``model`` and wait for it; a fit already running under
+        ``key`` is shared instead."""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.threads, thread_name_prefix="fit"
+                    )
+                future = self._executor.submit(self._fit, model)
+                self._pending[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future.result()
+
+    @staticmethod
+    def _fit(model: PairwiseModel) -> PairwiseModel:
+        model.update_model()
+        return model
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+
+model_fits = FitPool()
+
+
+__all__ = ["FitPool", "model_fits"]
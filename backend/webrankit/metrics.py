@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+"""
+Request instrumentation.
+
+Every request collects a breakdown of where its time went: SQL queries (via
+hooks on the primary and replica databases), model fits, cache lookups and
+response serialization. The breakdown is returned in a ``Server-Timing``
+header, requests slower than ``SLOW_REQUEST_MS`` are logged with it, and
+process-wide totals are served in Prometheus text format on ``/metrics``
+when ``METRICS_ENDPOINT`` is set. The endpoint has no authentication, so it
+is off by default.
+
+Timings cover work done before the response is returned; the encoding of
+streamed bodies happens afterwards and is not included. Metrics are per
+process, so scrape every worker.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+
+from .database import db_proxy, replicas
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._help[name] = ("counter", help_text)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str) -> None:
+        self._help[name] = ("histogram", help_text)
+        self._histograms.setdefault(name, {})
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(DURATION_BUCKETS)
+            histogram.observe(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text) in self._help.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for labels, value in self._counters[name].items():
+                        lines.append(f"{name}{_labels(labels)} {value:g}")
+                    continue
+                for labels, histogram in self._histograms[name].items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+registry = MetricsRegistry()
+registry.counter("pwrank_http_requests_total", "HTTP requests by endpoint and status.")
+registry.histogram("pwrank_http_request_duration_seconds", "Time to produce a response.")
+registry.counter("pwrank_db_queries_total", "SQL statements executed by database role.")
+registry.histogram("pwrank_db_query_duration_seconds", "SQL statement execution time.")
+registry.histogram("pwrank_fit_duration_seconds", "Bradley-Terry model fit time.")
+registry.counter("pwrank_cache_requests_total", "Cache lookups by cache and result.")
+registry.histogram("pwrank_serialize_duration_seconds", "JSON response encoding time.")
+
+
+class RequestTimings:
+    """Per-request accumulator, stored on ``flask.g``."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.queries = 0
+        self.replica_queries = 0
+        self.cache: Dict[str, str] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = []
+        if self.queries:
+            desc = f"{self.queries} queries"
+            if self.replica_queries:
+                desc += f", {self.replica_queries} on replica"
+            parts.append(f'db;dur={self.durations.get("db", 0.0) * 1000:.1f};desc="{desc}"')
+        for name, seconds in self.durations.items():
+            if name != "db":
+                parts.append(f"{name};dur={seconds * 1000:.1f}")
+        for name, result in self.cache.items():
+            parts.append(f'cache-{name};desc="{result}"')
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    if not has_request_context():
+        return None
+    return g.get("_request_timings")
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Time a block as ``name`` in Server-Timing and ``pwrank_<name>_duration_seconds``.
+
+    The histogram must have been declared on ``registry``.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe(f"pwrank_{name}_duration_seconds", elapsed)
+        timings = current_timings()
+        if timings is not None:
+            timings.add(name, elapsed)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    result = "hit" if hit else "miss"
+    registry.inc("pwrank_cache_requests_total", cache=cache, result=result)
+    timings = current_timings()
+    if timings is not None:
+        timings.cache[cache] = result
+
+
+def instrument_database(database: Any, role: str) -> None:
+    """Count and time the statements ``database`` executes, labelled by ``role``."""
+    if getattr(database, "_pwrank_instrumented", False):
+        return
+    execute_sql = database.execute_sql
+
+    def instrumented_execute_sql(sql: str, params: Any = None, *args: Any, **kwargs: Any):
+        start = time.perf_counter()
+        try:
+            return execute_sql(sql, params, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.inc("pwrank_db_queries_total", database=role)
+            registry.observe("pwrank_db_query_duration_seconds", elapsed, database=role)
+            timings = current_timings()
+            if timings is not None:
+                timings.queries += 1
+                if role == "replica":
+                    timings.replica_queries += 1
+                timings.add("db", elapsed)
+
+    database.execute_sql = instrumented_execute_sql
+    database._pwrank_instrumented = True
+
+
+def init_app(app: Flask) -> None:
+    """Hook request timing into ``app`` and the databases behind ``db_proxy``."""
+    instrument_database(db_proxy.obj, "primary")
+    for replica in replicas:
+        instrument_database(replica, "replica")
+
+    @app.before_request
+    def _start_timing() -> None:
+        g._request_timings = RequestTimings()
+
+    @app.after_request
+    def _finish_timing(response: Response) -> Response:
+        timings = current_timings()
+        if timings is None:
+            return response
+        total = time.perf_counter() - timings.started
+        endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+        registry.inc(
+            "pwrank_http_requests_total",
+            method=request.method,
+            endpoint=endpoint,
+            status=str(response.status_code),
+        )
+        registry.observe("pwrank_http_request_duration_seconds", total, endpoint=endpoint)
+
+        header = timings.server_timing(total)
+        if app.config.get("SERVER_TIMING", True):
+            response.headers["Server-Timing"] = header
+            # Let the cross-origin frontend's devtools show the breakdown.
+            response.headers.setdefault("Timing-Allow-Origin", "*")
+        threshold = app.config.get("SLOW_REQUEST_MS", 0)
+        if threshold and total * 1000 >= threshold:
+            logger.warning(
+                f"Slow request {request.method} {request.path} -> {response.status_code} "
+                f"in {total * 1000:.0f}ms: {header}"
+            )
+        return response
+
+    if app.config.get("METRICS_ENDPOINT", False):
+
+        @app.route("/metrics")
+        def metrics() -> Response:
+            return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+__all__ = [
+    "MetricsRegistry",
+    "RequestTimings",
+    "current_timings",
+    "init_app",
+    "instrument_database",
+    "record_cache",
+    "registry",
+    "timed",
+]
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+"""
+Versioned schema migrations.
+
+``init-db`` creates the current schema and records every migration as
+applied. Databases created before a schema change are brought up to date
+with ``backend migrate``, which runs the pending modules of this package in
+version order and records each one in the ``schema_migration`` table.
+
+A migration is a module named ``m<version>_<name>.py`` with a docstring
+and a ``migrate(ctx)`` function. Steps must be safe to re-run, since a
+database created by ``init-db`` at a newer release already has the columns
+an older migration adds. ``MigrationContext`` provides the building blocks
+that keep a live database usable while a migration runs:
+
+* ``add_column`` adds nullable columns or columns with a constant
+  ``DEFAULT``, which SQLite and PostgreSQL 11+ do without rewriting rows.
+* ``add_index`` builds indexes with ``CONCURRENTLY`` on PostgreSQL.
+* ``backfill`` updates rows in primary-key chunks, one short transaction
+  per chunk, so writers are never blocked for long.
+"""
+
+import importlib
+import logging
+import pkgutil
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from peewee import (
+    SQL,
+    CharField,
+    Database,
+    DateTimeField,
+    Field,
+    IntegerField,
+    Model,
+    PostgresqlDatabase,
+    SqliteDatabase,
+)
+from playhouse.migrate import SchemaMigrator
+
+from ..constants import MIGRATION_BACKFILL_CHUNK_SIZE
+from ..database import db_proxy
+from ..model.base import BaseModel, utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaMigration(BaseModel):
+    version = IntegerField(primary_key=True)
+    name = CharField()
+    applied_at = DateTimeField(default=utcnow)
+
+    class Meta:
+        table_name = "schema_migration"
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    description: str
+    migrate: Callable[["MigrationContext"], None]
+
+
+class MigrationContext:
+    """Online schema operations on ``database``."""
+
+    def __init__(self, database: Database, chunk_size: int = MIGRATION_BACKFILL_CHUNK_SIZE) -> None:
+        self.database = database
+        self.migrator = SchemaMigrator.from_database(database)
+        self.chunk_size = chunk_size
+
+    def columns(self, table: str) -> Set[str]:
+        return {column.name for column in self.database.get_columns(table)}
+
+    def add_column(self, table: str, name: str, field: Field, default: Any = None) -> bool:
+        """Add ``name`` unless present; returns whether it was added.
+
+        ``field`` must be nullable. A constant ``default`` is declared in
+        the DDL, so existing rows read it without being rewritten.
+        """
+        if name in self.columns(table):
+            return False
+        if not field.null:
+            raise ValueError(f"{table}.{name} must be added as a nullable column")
+        if default is not None:
+            field.constraints = [SQL(f"DEFAULT {self._literal(default)}")]
+        self.migrator.add_column(table, name, field).run()
+        logger.info(f"Added column {table}.{name}")
+        return True
+
+    def add_index(self, table: str, columns: Sequence[str], unique: bool = False) -> bool:
+        """Create an index on ``columns`` unless present; returns whether it was created."""
+        name = "_".join([table, *columns])
+        if any(index.name == name for index in self.database.get_indexes(table)):
+            return False
+        if isinstance(self.database, PostgresqlDatabase):
+            # Built without blocking writes; cannot run inside a transaction.
+            quoted = ", ".join(f'"{column}"' for column in columns)
+            self.database.execute_sql(
+                f'CREATE {"UNIQUE " if unique else ""}INDEX CONCURRENTLY IF NOT EXISTS '
+                f'"{name}" ON "{table}" ({quoted})'
+            )
+        else:
+            self.migrator.add_index(table, columns, unique).run()
+        logger.info(f"Created index {name}")
+        return True
+
+    def backfill(
+        self,
+        model: type[Model],
+        update: Callable[[List[Any]], Any],
+        where: Optional[Any] = None,
+    ) -> int:
+        """Run ``update(ids)`` for every chunk of primary keys matching ``where``.
+
+        ``update`` returns a query limited to ``ids``. Chunks are walked in
+        primary-key order, each in its own transaction. Returns the number
+        of rows visited.
+        """
+        pk = model._meta.primary_key
+        last = None
+        total = 0
+        while True:
+            query = model.select(pk).order_by(pk).limit(self.chunk_size)
+            if where is not None:
+                query = query.where(where)
+            if last is not None:
+                query = query.where(pk > last)
+            ids = [row[0] for row in query.tuples()]
+            if not ids:
+                return total
+            with self.database.atomic():
+                update(ids).execute()
+            total += len(ids)
+            last = ids[-1]
+            logger.info(f"Backfilled {total} rows of {model._meta.table_name}")
+
+    def is_sqlite(self) -> bool:
+        return isinstance(self.database, SqliteDatabase)
+
+    @staticmethod
+    def _literal(value: Any) -> str:
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+
+def _load(module: ModuleType) -> Migration:
+    version, name = module.__name__.rsplit(".", 1)[1][1:].split("_", 1)
+    return Migration(
+        version=int(version),
+        name=name,
+        description=(module.__doc__ or name).strip().splitlines()[0],
+        migrate=module.migrate,
+    )
+
+
+def discover() -> List[Migration]:
+    """All migrations of this package, in version order."""
+    migrations = [
+        _load(importlib.import_module(f"{__name__}.{info.name}"))
+        for info in pkgutil.iter_modules(__path__)
+        if info.name.startswith("m") and info.name[1:5].isdigit()
+    ]
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+def applied_versions() -> Dict[int, Any]:
+    """Applied versions and when they were applied."""
+    db_proxy.create_tables([SchemaMigration])
+    return {row.version: row.applied_at for row in SchemaMigration.select()}
+
+
+def _record(migration: Migration) -> None:
+    SchemaMigration.insert(
+        version=migration.version, name=migration.name
+    ).on_conflict_ignore().execute()
+
+
+def apply(
+    migration: Migration,
+    chunk_size: int = MIGRATION_BACKFILL_CHUNK_SIZE,
+    database: Optional[Database] = None,
+) -> None:
+    """Apply ``migration`` to ``database``, by default the main database.
+
+    Run shards' migrations inside ``use_shard`` so models and the recorded
+    version follow ``database``.
+    """
+    logger.info(f"Applying migration {migration.version:04d} {migration.name}")
+    migration.migrate(MigrationContext(database or db_proxy.obj, chunk_size))
+    _record(migration)
+
+
+def stamp_all() -> None:
+    """Record every migration as applied, for a schema created from the models."""
+    db_proxy.create_tables([SchemaMigration])
+    for migration in discover():
+        _record(migration)
+
+
+__all__ = [
+    "Migration",
+    "MigrationContext",
+    "SchemaMigration",
+    "applied_versions",
+    "apply",
+    "discover",
+    "stamp_all",
+]
@@ -0,0 +1,20 @@
+"""Add Ranking.version and Ranking.updated_at for model caching and conditional GETs."""
+
+from __future__ import annotations
+
+from peewee import DateTimeField, IntegerField
+
+from ..model import Ranking
+from ..model.base import utcnow
+from . import MigrationContext
+
+
+def migrate(ctx: MigrationContext) -> None:
+    ctx.add_column("ranking", "version", IntegerField(null=True), default=0)
+    ctx.add_column("ranking", "updated_at", DateTimeField(null=True))
+    now = utcnow()
+    ctx.backfill(
+        Ranking,
+        lambda ids: Ranking.update(updated_at=now).where(Ranking.id.in_(ids)),
+        where=Ranking.updated_at.is_null(),
+    )
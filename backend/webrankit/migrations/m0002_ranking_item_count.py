@@ -0,0 +1,16 @@
+"""Add the Ranking.item_count counter used to enforce MAX_ITEMS_PER_RANKING."""
+
+from __future__ import annotations
+
+from peewee import IntegerField, fn
+
+from ..model import Item, Ranking
+from . import MigrationContext
+
+
+def migrate(ctx: MigrationContext) -> None:
+    ctx.add_column("ranking", "item_count", IntegerField(null=True), default=0)
+    counted = Item.select(fn.COUNT(Item.id)).where(Item.ranking == Ranking.id)
+    ctx.backfill(
+        Ranking, lambda ids: Ranking.update(item_count=counted).where(Ranking.id.in_(ids))
+    )
@@ -0,0 +1,17 @@
+"""Add the rating engine to rankings and online rating state to items."""
+
+from __future__ import annotations
+
+from peewee import CharField, FloatField, IntegerField
+
+from ..engines import BT
+from . import MigrationContext
+
+
+def migrate(ctx: MigrationContext) -> None:
+    ctx.add_column("ranking", "engine", CharField(null=True), default=BT)
+    ctx.add_column("ranking", "refit_version", IntegerField(null=True), default=0)
+    ctx.add_column("item", "online_rating", FloatField(null=True))
+    ctx.add_column("item", "online_rd", FloatField(null=True))
+    ctx.add_column("item", "online_volatility", FloatField(null=True))
+    ctx.add_column("item", "online_games", IntegerField(null=True), default=0)
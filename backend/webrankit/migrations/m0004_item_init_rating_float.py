@@ -0,0 +1,16 @@
+"""Store Item.init_rating as a float, keeping rescaled import ratings exact."""
+
+from __future__ import annotations
+
+from peewee import FloatField
+
+from . import MigrationContext
+
+
+def migrate(ctx: MigrationContext) -> None:
+    if ctx.is_sqlite():
+        # SQLite keeps non-integral values in an INTEGER-affinity column as
+        # REAL, so no table rebuild is needed.
+        return
+    # Rewrites the table on PostgreSQL and MySQL; run it in a quiet period.
+    ctx.migrator.alter_column_type("item", "init_rating", FloatField(default=0)).run()
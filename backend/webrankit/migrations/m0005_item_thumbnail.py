@@ -0,0 +1,12 @@
+"""Add Item.thumbnail, the digest of an item's generated image thumbnails."""
+
+from __future__ import annotations
+
+from peewee import CharField
+
+from . import MigrationContext
+
+
+def migrate(ctx: MigrationContext) -> None:
+    # Existing items stay NULL until `backend thumbnails` or an import fills them.
+    ctx.add_column("item", "thumbnail", CharField(null=True))
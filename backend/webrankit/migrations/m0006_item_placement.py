@@ -0,0 +1,14 @@
+"""Add binary-search placement state to items."""
+
+from __future__ import annotations
+
+from peewee import CharField, IntegerField
+
+from . import MigrationContext
+
+
+def migrate(ctx: MigrationContext) -> None:
+    # NULL means placed, which is right for every existing item.
+    ctx.add_column("item", "place_votes", IntegerField(null=True))
+    ctx.add_column("item", "place_above", CharField(null=True))
+    ctx.add_column("item", "place_below", CharField(null=True))
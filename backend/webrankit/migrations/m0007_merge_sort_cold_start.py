@@ -0,0 +1,16 @@
+"""Add merge-sort cold-start state to rankings and items."""
+
+from __future__ import annotations
+
+from peewee import IntegerField
+
+from . import MigrationContext
+
+
+def migrate(ctx: MigrationContext) -> None:
+    # NULL means votes are chosen by the model, as they were before.
+    for column in ("sort_width", "sort_size", "sort_lo", "sort_i", "sort_j"):
+        ctx.add_column("ranking", column, IntegerField(null=True))
+    ctx.add_column("item", "sort_pos", IntegerField(null=True))
+    ctx.add_column("item", "sort_next", IntegerField(null=True))
+    ctx.add_index("item", ["ranking_id", "sort_pos"])
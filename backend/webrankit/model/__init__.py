@@ -1,5 +1,5 @@
 from .base import BaseModel, UUIDModel
-from .comparison import Comparison, Item, Ranking
+from .comparison import Comparison, Item, LimitExceeded, Ranking
 from .user import User
 
-__all__ = ["BaseModel", "UUIDModel", "Comparison", "Item", "Ranking", "User"]
+__all__ = ["BaseModel", "UUIDModel", "Comparison", "Item", "LimitExceeded", "Ranking", "User"]
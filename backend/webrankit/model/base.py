@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime, timezone
 
 from peewee import BinaryUUIDField, Model
 
 from ..database import db_proxy
 
 
+def utcnow() -> datetime:
+    """Naive UTC timestamp, the form peewee's DateTimeField round-trips."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class BaseModel(Model):
     class Meta:
         database = db_proxy
@@ -16,4 +22,4 @@ class UUIDModel(BaseModel):
     id = BinaryUUIDField(primary_key=True, default=uuid.uuid4)
 
 
-__all__ = ["BaseModel", "UUIDModel"]
+__all__ = ["BaseModel", "UUIDModel", "utcnow"]
@@ -1,24 +1,72 @@
 from __future__ import annotations
 
-from typing import Sequence
+import logging
+import math
+import uuid
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
 
 from peewee import (
     CharField,
     CompositeKey,
+    DateTimeField,
+    FloatField,
     ForeignKeyField,
     IntegerField,
 )
 
-from ..extract import extract_items_from_anilist, extract_items_from_steam
-from ..pairwise import PairwiseModel
-from .base import BaseModel, UUIDModel
+from ..cache import model_cache
+from ..constants import (
+    COLD_START_MIN_ITEMS,
+    IMPORT_CHUNK_SIZE,
+    MAX_COMPARISON_COUNT_PER_ITEM_PAIR,
+    MAX_ITEMS_PER_RANKING,
+    MIN_ITEMS_FOR_RANKING,
+    PLACEMENT_EXTRA_VOTES,
+)
+from ..database import db_proxy
+from ..datasource import Datasource, ImportedItem
+from ..engines import BT, OnlineRating, ability, ability_stderr, from_ability, online_refits
+from ..engines import update as update_online_ratings
+from ..events import ranking_events
+from ..fits import model_fits
+from ..metrics import timed
+from ..pairwise import Coefficients, ComparisonRow, PairwiseModel
+from ..shared_cache import shared_model_cache
+from ..snapshots import model_snapshots
+from .base import BaseModel, UUIDModel, utcnow
 from .user import User
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LimitExceeded(Exception):
+    """A write would take a ranking past one of its size limits."""
+
 
 class Ranking(UUIDModel):
     user = ForeignKeyField(User, backref="rankings")
     name = CharField()
     datasource = CharField(default="")
+    # Bumped on every item or comparison write; drives model caching and ETags.
+    version = IntegerField(default=0)
+    updated_at = DateTimeField(default=utcnow)
+    # Maintained alongside item writes so the size limit needs no COUNT(*).
+    item_count = IntegerField(default=0)
+    # "bt" fits Bradley-Terry per version; "elo"/"glicko2" rate online.
+    engine = CharField(default=BT)
+    # Version of the last exact refit of an online engine's ratings.
+    refit_version = IntegerField(default=0)
+    # Merge-sort cold start, see start_sort: width of the runs being merged
+    # (None when votes are chosen by the model), number of positions, start
+    # of the current merge and the next position in each of its two runs.
+    sort_width = IntegerField(null=True)
+    sort_size = IntegerField(null=True)
+    sort_lo = IntegerField(null=True)
+    sort_i = IntegerField(null=True)
+    sort_j = IntegerField(null=True)
 
     class Meta:
         indexes = (
@@ -26,85 +74,528 @@ class Ranking(UUIDModel):
             (("user", "name"), False),
         )
 
+    @classmethod
+    def bump_version(cls, ranking_id) -> None:
+        cls.update(version=cls.version + 1, updated_at=utcnow()).where(
+            cls.id == ranking_id
+        ).execute()
+
+    @classmethod
+    def reserve_items(cls, ranking_id, count: int) -> int:
+        """Count up to ``count`` new items against the limit; returns how many fit."""
+        while count > 0:
+            # Conditional increment, so concurrent writers cannot overshoot.
+            fits = cls.item_count + count <= MAX_ITEMS_PER_RANKING
+            if cls.update(item_count=cls.item_count + count).where(
+                (cls.id == ranking_id) & fits
+            ).execute():
+                return count
+            current = cls.select(cls.item_count).where(cls.id == ranking_id).scalar()
+            if current is None:
+                return 0
+            count = min(count, MAX_ITEMS_PER_RANKING - current)
+        return 0
+
+    @classmethod
+    def release_items(cls, ranking_id, count: int = 1) -> None:
+        cls.update(item_count=cls.item_count - count).where(cls.id == ranking_id).execute()
+
+    def current_version(self) -> int:
+        """Version as stored right now, ignoring this instance's copy."""
+        return (
+            Ranking.select(Ranking.version).where(Ranking.id == self.id).scalar() or 0
+        )
+
     def compare_by_init_ratings(self) -> None:
         items_by_rating = list(self.items.order_by(Item.init_rating))
+        compared = self._compared_item_ids()
         for item1, item2 in zip(items_by_rating, items_by_rating[1:]):
-            if not (item1.has_comparisons() and item2.has_comparisons()):
+            if not (item1.id in compared and item2.id in compared):
                 Comparison.compare_by_init_rating(item1, item2)
+                compared.update((item1.id, item2.id))
+        Ranking.bump_version(self.id)
+
+    @property
+    def sorting(self) -> bool:
+        return self.sort_width is not None
+
+    def start_sort(self) -> bool:
+        """Choose the next votes as a merge sort of the items, best first.
+
+        A fresh ranking only has init-rating seeds, and sampling by
+        uncertainty needs far more than ``n log n`` votes to order it.
+        Instead, each vote takes one step of a bottom-up merge sort, whose
+        state is kept in the ``sort_*`` columns and ``Item.sort_pos``, so a
+        vote writes a handful of rows and needs no model fit. Votes are
+        ordinary comparisons: a mistaken one only misplaces an item within
+        one merge, and the model fitted to all of them once the order is
+        complete takes over from there. Returns whether the sort started.
+        """
+        ids = [
+            item_id
+            for (item_id,) in Item.select(Item.id)
+            .where(Item.ranking == self)
+            .order_by(Item.init_rating.desc(), Item.label)
+            .tuples()
+        ]
+        if len(ids) < COLD_START_MIN_ITEMS:
+            return False
+        with db_proxy.atomic():
+            Item.update(sort_pos=None, sort_next=None).where(Item.ranking == self).execute()
+            Item.bulk_update(
+                [Item(id=item_id, sort_pos=pos) for pos, item_id in enumerate(ids)],
+                fields=[Item.sort_pos],
+                batch_size=IMPORT_CHUNK_SIZE,
+            )
+            self._save_sort((1, len(ids), 0, 0, 1))
+        logger.info(f"Started merge sort of {len(ids)} items in ranking {self.id}")
+        return True
+
+    def sort_pair(self) -> Optional[Tuple[str, str]]:
+        """Ids of the two items the merge sort compares next.
+
+        ``None`` when not sorting, or when one of them has been deleted
+        since; ``advance_sort`` then moves past it.
+        """
+        if not self.sorting:
+            return None
+        found = dict(
+            Item.select(Item.sort_pos, Item.id)
+            .where((Item.ranking == self) & Item.sort_pos.in_([self.sort_i, self.sort_j]))
+            .tuples()
+        )
+        if len(found) != 2:
+            return None
+        return str(found[self.sort_i]), str(found[self.sort_j])
+
+    def record_sort_vote(self, item1: Item, item2: Item, score: float) -> bool:
+        """Take the merge step decided by ``item1`` scoring ``score`` against ``item2``.
+
+        Votes on any other pair are ignored. Returns whether the sort moved.
+        """
+        pair = self.sort_pair()
+        if pair is None or set(pair) != {str(item1.id), str(item2.id)}:
+            return False
+        # Draws keep the left item first, so equal items stay in input order.
+        left_won = score == 0.5 or (score > 0.5) == (pair[0] == str(item1.id))
+        width, size, lo, i, j = state = self._sort_state()
+        out = i + j - width - lo
+        with db_proxy.atomic() as transaction:
+            taken = (width, size, lo, i + 1, j) if left_won else (width, size, lo, i, j + 1)
+            if not self._save_sort(taken, expected=state):
+                transaction.rollback()
+                return False  # A concurrent vote took this step.
+            Item.update(sort_next=out).where(
+                (Item.ranking == self) & (Item.sort_pos == (i if left_won else j))
+            ).execute()
+            self._save_sort(self._advance_sort(taken))
+        return True
+
+    def advance_sort(self) -> None:
+        """Move the merge sort past deleted items and steps needing no vote."""
+        if not self.sorting:
+            return
+        with db_proxy.atomic():
+            state = self._sort_state()
+            self._save_sort(self._advance_sort(state), expected=state)
+
+    def current_sort_width(self) -> Optional[int]:
+        """``sort_width`` as stored right now, ignoring this instance's copy."""
+        return Ranking.select(Ranking.sort_width).where(Ranking.id == self.id).scalar()
+
+    def _sort_state(self) -> Tuple[int, int, int, int, int]:
+        return self.sort_width, self.sort_size, self.sort_lo, self.sort_i, self.sort_j
+
+    def _advance_sort(self, state: Tuple[int, ...]) -> Optional[Tuple[int, ...]]:
+        """The state after every step up to the next vote; ``None`` once sorted."""
+        width, size, lo, i, j = state
+        while True:
+            mid = min(lo + width, size)
+            high = min(lo + 2 * width, size)
+            if i < mid and j < high:
+                present = {
+                    pos
+                    for (pos,) in Item.select(Item.sort_pos)
+                    .where((Item.ranking == self) & Item.sort_pos.in_([i, j]))
+                    .tuples()
+                }
+                if len(present) == 2:
+                    return width, size, lo, i, j
+                # A deleted item leaves its position empty in later passes too.
+                if i not in present:
+                    i += 1
+                else:
+                    j += 1
+                continue
+            # One run is used up; the rest of the other follows unchanged.
+            out = i + j - width - lo
+            start, end = (i, mid) if i < mid else (j, high)
+            if start < end:
+                Item.update(sort_next=Item.sort_pos - start + out).where(
+                    (Item.ranking == self)
+                    & (Item.sort_pos >= start)
+                    & (Item.sort_pos < end)
+                ).execute()
+            lo = high
+            if lo >= size:
+                Item.update(sort_pos=Item.sort_next, sort_next=None).where(
+                    Item.ranking == self
+                ).execute()
+                width *= 2
+                if width >= size:
+                    logger.info(f"Finished merge sort of ranking {self.id}")
+                    Item.update(sort_pos=None).where(Item.ranking == self).execute()
+                    return None
+                lo = 0
+            i, j = lo, lo + width
+
+    def _save_sort(
+        self,
+        state: Optional[Tuple[int, ...]],
+        expected: Optional[Tuple[int, ...]] = None,
+    ) -> bool:
+        fields = [Ranking.sort_width, Ranking.sort_size, Ranking.sort_lo, Ranking.sort_i, Ranking.sort_j]
+        values = state or (None,) * len(fields)
+        query = Ranking.update(dict(zip(fields, values))).where(Ranking.id == self.id)
+        if expected is not None:
+            for field, value in zip(fields, expected):
+                query = query.where(field == value)
+        if not query.execute():
+            return False
+        for field, value in zip(fields, values):
+            setattr(self, field.name, value)
+        return True
+
+    def placement_pair(self, model: PairwiseModel) -> Optional[Tuple[str, str]]:
+        """The next vote placing a newly added item, or ``None`` if there is none.
+
+        Coefficients are sorted by ability, so the items an unplaced item
+        last beat and lost to bound a range of positions, and it meets the
+        not yet met item in the middle of that range. Bounds are item ids,
+        not abilities, so they follow the fit as votes come in. A noisy vote
+        that leaves the bounds ordered the wrong way round in a later fit
+        reopens the range between them instead of ending the search.
+        """
+        if not model.coefficients:
+            return None
+        unplaced = self._unplaced_items()
+        skip = {str(item.id) for item in unplaced}
+        for item in unplaced:
+            opponent = _placement_opponent(item, model.coefficients, skip)
+            if opponent is not None:
+                return str(item.id), opponent
+        return None
+
+    def settle_placements(self, model: PairwiseModel) -> int:
+        """Mark items whose placement search has ended as placed; returns how many."""
+        if not model.coefficients:
+            return 0
+        unplaced = self._unplaced_items()
+        skip = {str(item.id) for item in unplaced}
+        settled = [
+            item.id
+            for item in unplaced
+            if _placement_opponent(item, model.coefficients, skip) is None
+        ]
+        if settled:
+            Item.update(place_votes=None, place_above=None, place_below=None).where(
+                Item.id.in_(settled)
+            ).execute()
+        return len(settled)
+
+    def _unplaced_items(self) -> List[Item]:
+        """Items still being placed, those with the fewest placement votes first."""
+        return list(
+            Item.select(Item.id, Item.place_votes, Item.place_above, Item.place_below)
+            .where((Item.ranking == self) & Item.place_votes.is_null(False))
+            .order_by(Item.place_votes, Item.id)
+        )
+
+    def _compared_item_ids(self) -> Set[uuid.UUID]:
+        """Ids of items in at least one comparison, in a single query."""
+        query = (
+            Comparison.select(Comparison.item1.alias("item_id"))
+            .where(Comparison.ranking == self)
+            .union(
+                Comparison.select(Comparison.item2.alias("item_id")).where(
+                    Comparison.ranking == self
+                )
+            )
+        )
+        return {item_id for (item_id,) in query.tuples()}
 
     def get_pairwise_model(self) -> PairwiseModel:
-        model = PairwiseModel()
-        for comp in self.comparisons:
-            id1, id2 = str(comp.item1.id), str(comp.item2.id)
-            model.draw(id1, id2, comp.draw_count)
-            model.win(id1, id2, comp.win1_count)
-            model.win(id2, id1, comp.win2_count)
-        if self.comparisons.count():
-            model.update_model()
+        version = self.current_version()
+        cached = model_cache.get(self.id, version)
+        if cached is not None:
+            return cached
+        if self.engine != BT:
+            return self._online_model(version)
+        cached = shared_model_cache.get(self.id, version)
+        if cached is not None:
+            model_cache.put(self.id, version, cached)
+            return cached
+        cached = model_snapshots.load(self.id, version)
+        if cached is not None:
+            shared_model_cache.put(self.id, version, cached)
+            model_cache.put(self.id, version, cached)
+            return cached
+
+        model = self._fit_model(version)
+        if model.coefficients is not None:
+            model_snapshots.save(self.id, version, model)
+            shared_model_cache.put(self.id, version, model)
+        model_cache.put(self.id, version, model)
+        ranking_events.publish_model(self.id, version, model)
         return model
 
-    def add_items_from_anilist(self, username: str, statuses: Sequence[str]) -> None:
-        medialist = extract_items_from_anilist(username, statuses)
-        if not medialist:
-            return
-        for media in medialist:
-            score = media.get("score") or 0
-            title = media["media"]["title"]["userPreferred"]
-            img = media["media"]["coverImage"]["extraLarge"]
-            existing_item = Item.get_or_none(ranking=self, label=title)
-            if existing_item is not None:
-                existing_item.init_rating = score
-                existing_item.img_url = img
-                existing_item.save()
-            else:
-                Item.create(
-                    ranking=self,
-                    init_rating=score,
-                    label=title,
-                    img_url=img,
+    def _fit_model(self, version: int) -> PairwiseModel:
+        """An exact Bradley-Terry fit of all comparisons, bypassing caches."""
+        model = PairwiseModel.from_comparisons(self.comparison_rows())
+        if model.items:
+            with timed("fit"):
+                model = model_fits.fit((self.id, version), model)
+        return model
+
+    def comparison_rows(self) -> List[ComparisonRow]:
+        """The ranking's comparisons as plain tuples, for fitting."""
+        query = Comparison.select(
+            Comparison.item1,
+            Comparison.item2,
+            Comparison.win1_count,
+            Comparison.win2_count,
+            Comparison.draw_count,
+        ).where(Comparison.ranking == self)
+        return [(str(id1), str(id2), *counts) for id1, id2, *counts in query.tuples()]
+
+    def _online_model(self, version: int) -> PairwiseModel:
+        """A model built from the items' online ratings, without fitting."""
+        items = list(Item.select(Item.id, *ONLINE_FIELDS).where(Item.ranking == self))
+        if len(items) < MIN_ITEMS_FOR_RANKING:
+            model = PairwiseModel()
+        else:
+            ratings = [item.online() for item in items]
+            model = PairwiseModel.from_coefficients(
+                Coefficients(
+                    [ability(rating) for rating in ratings],
+                    [ability_stderr(self.engine, rating) for rating in ratings],
+                    [str(item.id) for item in items],
                 )
-        self.compare_by_init_ratings()
+            )
+        model_cache.put(self.id, version, model)
+        ranking_events.publish_model(self.id, version, model)
+        if online_refits.due(version, self.refit_version) and self.comparisons.exists():
+            online_refits.request(self.id, self.refit_online_ratings)
+        return model
+
+    def refit_online_ratings(self) -> None:
+        """Replace the online ratings with an exact Bradley-Terry fit.
 
-    def add_items_from_steam(self, steam_id: str) -> None:
-        medialist = extract_items_from_steam(steam_id)
-        if not medialist:
+        Votes recorded while the fit runs are overwritten; the online
+        updates that follow start from the corrected ratings.
+        """
+        version = self.current_version()
+        model = self._fit_model(version)
+        if model.coefficients is None:
             return
-        total = len(medialist) or 1
-        for idx, media in enumerate(medialist):
-            score = ((total - idx) / total) * 10
-            title = media["label"]
-            img = media["img_url"]
-            existing_item = Item.get_or_none(ranking=self, label=title)
-            if existing_item is not None:
-                existing_item.init_rating = score
-                existing_item.img_url = img
-                existing_item.save()
+        # Bradley-Terry abilities are relative to one item; centre them on 0.
+        mean = sum(model.coefficients.abilities) / len(model.coefficients)
+        items = {
+            str(item.id): item
+            for item in Item.select(Item.id, *ONLINE_FIELDS).where(Item.ranking == self)
+        }
+        updated = []
+        for ability_value, stderr, item_id in model.coefficients:
+            item = items.get(item_id)
+            if item is not None:
+                item.set_online(from_ability(ability_value - mean, stderr, item.online()))
+                updated.append(item)
+        with db_proxy.atomic():
+            Item.bulk_update(updated, fields=ONLINE_FIELDS, batch_size=IMPORT_CHUNK_SIZE)
+            Ranking.update(refit_version=version).where(Ranking.id == self.id).execute()
+            Ranking.bump_version(self.id)
+        logger.info(f"Refit online ratings of ranking {self.id} at version {version}")
+
+    def import_items(self, source: Datasource, chunk_size: int = IMPORT_CHUNK_SIZE) -> int:
+        """Upsert items streamed from ``source`` in chunks; returns how many were seen.
+
+        Each chunk is written in one transaction and bumps the version, so
+        items show up while a long import is still running. Items are
+        matched to existing ones by label. New items beyond
+        ``MAX_ITEMS_PER_RANKING`` are dropped and ``LimitExceeded`` is raised
+        once the items that fit have been imported.
+        """
+        imported_ids: List[uuid.UUID] = []
+        total = 0
+        dropped = 0
+        for chunk in _chunked(source.iter_items(), chunk_size):
+            if source.ordinal:
+                # Store the position for now; rescaled once the total is known.
+                for item in chunk:
+                    item.init_rating = total
+                    total += 1
             else:
-                Item.create(
-                    ranking=self,
-                    init_rating=score,
-                    label=title,
-                    img_url=img,
-                )
+                total += len(chunk)
+            with db_proxy.atomic():
+                ids, dropped = self._upsert_items(chunk)
+            if source.ordinal:
+                imported_ids.extend(ids)
+            Ranking.bump_version(self.id)
+            logger.debug(f"Imported {total} items into ranking {self.id} so far")
+            if dropped:
+                break
+
+        if not total:
+            return 0
+        if source.ordinal:
+            # Highest position scores 10, lowest 10/total, as percentiles.
+            rating = (total - Item.init_rating) * 10 / total
+            for ids in _chunked(imported_ids, chunk_size):
+                Item.update(init_rating=rating).where(Item.id.in_(ids)).execute()
         self.compare_by_init_ratings()
+        logger.info(f"Imported {total} items from {source.name} into ranking {self.id}")
+        if dropped:
+            raise LimitExceeded(
+                f"Ranking reached the limit of {MAX_ITEMS_PER_RANKING} items; "
+                f"the rest of {source.name} was not imported."
+            )
+        return total
+
+    def _upsert_items(self, chunk: List[ImportedItem]) -> tuple[List[uuid.UUID], int]:
+        """Returns the ids written and how many new items did not fit."""
+        by_label = {item.label: item for item in chunk}
+        existing = {
+            item.label: item
+            for item in Item.select(Item.id, Item.label, Item.img_url, Item.thumbnail).where(
+                (Item.ranking == self) & Item.label.in_(list(by_label))
+            )
+        }
+
+        updated = []
+        for label, item in existing.items():
+            item.init_rating = by_label[label].init_rating
+            if item.img_url != by_label[label].img_url:
+                item.img_url = by_label[label].img_url
+                item.thumbnail = None
+            updated.append(item)
+        if updated:
+            Item.bulk_update(updated, fields=[Item.init_rating, Item.img_url, Item.thumbnail])
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "ranking": self.id,
+                "label": label,
+                "img_url": item.img_url,
+                "init_rating": item.init_rating,
+            }
+            for label, item in by_label.items()
+            if label not in existing
+        ]
+        dropped = len(rows) - Ranking.reserve_items(self.id, len(rows))
+        if dropped:
+            rows = rows[: len(rows) - dropped]
+        if rows:
+            Item.insert_many(rows).execute()
+        return [item.id for item in updated] + [row["id"] for row in rows], dropped
+
+
+def _chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _placement_opponent(item: Item, coefficients: Coefficients, skip: Set[str]) -> Optional[str]:
+    """The placed item ``item`` should meet next, or ``None`` once it is placed."""
+    if item.place_votes >= math.ceil(math.log2(len(coefficients) + 1)) + PLACEMENT_EXTRA_VOTES:
+        return None
+    above = coefficients.position(item.place_above) if item.place_above else None
+    below = coefficients.position(item.place_below) if item.place_below else None
+    low = -1 if above is None else above
+    high = len(coefficients) if below is None else below
+    if low > high:
+        low, high = high, low
+    met = {str(item_id) for item_id in item.compared_item_ids()}
+    candidates = [
+        item_id
+        for item_id in coefficients.ids[low + 1:high]
+        if item_id not in skip and item_id not in met
+    ]
+    return candidates[len(candidates) // 2] if candidates else None
 
 
 class Item(UUIDModel):
     ranking = ForeignKeyField(Ranking, backref="items")
     label = CharField(default="")
     img_url = CharField(default="")
-    init_rating = IntegerField(default=0)  # TODO: Change to FloatField in migration
+    # SHA-256 of the image behind img_url once thumbnails exist ("" if unusable).
+    thumbnail = CharField(null=True)
+    init_rating = FloatField(default=0)
+    # Elo/Glicko-2 state, used by rankings with an online engine.
+    online_rating = FloatField(null=True)
+    online_rd = FloatField(null=True)
+    online_volatility = FloatField(null=True)
+    online_games = IntegerField(default=0)
+    # Binary-search placement of items added to a ranked list: votes cast so
+    # far (None once placed) and the items it last beat and lost to.
+    place_votes = IntegerField(null=True)
+    place_above = CharField(null=True)
+    place_below = CharField(null=True)
+    # Position in the merge-sort cold start, in this pass and the next.
+    sort_pos = IntegerField(null=True)
+    sort_next = IntegerField(null=True)
 
     class Meta:
         indexes = (
             # Index for checking duplicate item labels per ranking
             # Also speeds up item lookups by ranking
             (("ranking", "label"), False),
+            # Looks up the pair a merge-sort step compares
+            (("ranking", "sort_pos"), False),
         )
 
     def has_comparisons(self) -> bool:
         return bool(self.comparisons_i1.count() or self.comparisons_i2.count())
 
+    def compared_item_ids(self) -> Set[uuid.UUID]:
+        """Ids of the items this one has been compared with."""
+        query = (
+            Comparison.select(Comparison.item2.alias("item_id"))
+            .where(Comparison.item1 == self.id)
+            .union(
+                Comparison.select(Comparison.item1.alias("item_id")).where(
+                    Comparison.item2 == self.id
+                )
+            )
+        )
+        return {item_id for (item_id,) in query.tuples()}
+
+    def record_placement(self, opponent: Item, score: float) -> None:
+        """Narrow this unplaced item's range with its ``score`` against ``opponent``."""
+        changes = {Item.place_votes: Item.place_votes + 1}
+        if score >= 0.5:
+            changes[Item.place_above] = str(opponent.id)
+        if score <= 0.5:
+            changes[Item.place_below] = str(opponent.id)
+        Item.update(changes).where((Item.id == self.id) & Item.place_votes.is_null(False)).execute()
+
+    def online(self) -> OnlineRating:
+        if self.online_rating is None:
+            return OnlineRating(games=self.online_games or 0)
+        return OnlineRating(
+            self.online_rating, self.online_rd, self.online_volatility, self.online_games
+        )
+
+    def set_online(self, rating: OnlineRating) -> None:
+        self.online_rating = rating.rating
+        self.online_rd = rating.rd
+        self.online_volatility = rating.volatility
+        self.online_games = rating.games
+
+
+ONLINE_FIELDS = [Item.online_rating, Item.online_rd, Item.online_volatility, Item.online_games]
+
 
 class Comparison(BaseModel):
     class Meta:
@@ -126,13 +617,38 @@ class Comparison(BaseModel):
     def compare(cls, item1: Item, item2: Item, winner_id: str) -> "Comparison":
         item1, item2 = sorted([item1, item2], key=lambda item: str(item.id))
         comp, _ = cls.get_or_create(item1=item1, item2=item2, ranking=item1.ranking)
+        # The pair's row is already loaded, so the limit costs no extra query.
+        total = comp.win1_count + comp.win2_count + comp.draw_count
+        if total >= MAX_COMPARISON_COUNT_PER_ITEM_PAIR:
+            raise LimitExceeded(
+                f"These items have already been compared "
+                f"{MAX_COMPARISON_COUNT_PER_ITEM_PAIR} times."
+            )
         if str(item1.id) == str(winner_id):
             comp.win1_count += 1
+            score = 1.0
         elif str(item2.id) == str(winner_id):
             comp.win2_count += 1
+            score = 0.0
         else:
             comp.draw_count += 1
+            score = 0.5
         comp.save()
+        if item1.ranking.sorting:
+            item1.ranking.record_sort_vote(item1, item2, score)
+        for item, other, item_score in ((item1, item2, score), (item2, item1, 1.0 - score)):
+            if item.place_votes is not None and other.place_votes is None:
+                item.record_placement(other, item_score)
+        engine = item1.ranking.engine
+        if engine != BT:
+            # Constant-time online update; no refit until the next correction.
+            ratings = update_online_ratings(engine, item1.online(), item2.online(), score)
+            for item, rating in zip((item1, item2), ratings):
+                item.set_online(rating)
+                Item.update(
+                    {field: getattr(item, field.name) for field in ONLINE_FIELDS}
+                ).where(Item.id == item.id).execute()
+        Ranking.bump_version(comp.ranking_id)
         return comp
 
     @classmethod
@@ -149,4 +665,4 @@ class Comparison(BaseModel):
         return comp
 
 
-__all__ = ["Comparison", "Item", "Ranking"]
+__all__ = ["Comparison", "Item", "LimitExceeded", "Ranking"]
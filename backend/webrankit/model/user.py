@@ -6,6 +6,7 @@ from typing import Final
 from passlib.hash import pbkdf2_sha256
 from peewee import CharField
 
+from ..database import account_db_proxy
 from .base import UUIDModel
 
 ADMIN_EMAIL: Final[str | None] = os.getenv("PWRANK_ADMIN_EMAIL")
@@ -15,6 +16,10 @@ class User(UUIDModel):
     email = CharField(default="", unique=True)
     password = CharField(default="")
 
+    class Meta:
+        # Accounts stay in the main database when rankings are sharded.
+        database = account_db_proxy
+
     def is_admin(self) -> bool:
         if ADMIN_EMAIL:
             return self.email.lower() == ADMIN_EMAIL.lower()
@@ -3,8 +3,9 @@ from __future__ import annotations
 import logging
 import math
 import random
-from operator import itemgetter
-from typing import Any, List, Optional, Tuple
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import rpy2
 from rpy2.rlike.container import OrdDict
@@ -18,13 +19,132 @@ logger = logging.getLogger(__name__)
 _r_bt2 = packages.importr('BradleyTerry2')
 _r_base = packages.importr('base')
 
+def rating_fields(idx: int, total: int, ability: float, stderr: float) -> Dict[str, float]:
+    """Display values for the coefficient at sorted position ``idx``."""
+    stderr_value = float(stderr)
+    if math.isnan(stderr_value):
+        stderr_value = 0.0
+    # Use percentile rank (0-10 scale), ensuring lowest item gets > 0
+    rating = ((idx + 1) / max(total, 1)) * 10
+    return {
+        "curr_rating": round(rating, 2),
+        "stderr": round(stderr_value, 2),
+        "ability": round(float(ability), 3),
+    }
+
+
+Coefficient = Tuple[float, float, str]  # (ability, stderr, item)
+ComparisonRow = Tuple[str, str, int, int, int]  # (item1, item2, win1, win2, draws)
+
+
+class Coefficients:
+    """Fitted abilities sorted ascending, stored as parallel float64 arrays.
+
+    The arrays are ``array('d')`` or read-only ``memoryview`` casts of a
+    shared memory mapping. Position in them is the item's rank from the
+    bottom. Iterating or indexing yields ``(ability, stderr, item)`` tuples.
+    Lookups by item go through an id -> position map that is rebuilt
+    lazily, so pickles only carry the arrays and the id list.
+    """
+
+    __slots__ = ("abilities", "stderrs", "ids", "_positions", "_max_stderr")
+
+    def __init__(self, abilities: Iterable[float], stderrs: Iterable[float], ids: Iterable[str]) -> None:
+        rows = sorted(zip((float(a) for a in abilities), (float(e) for e in stderrs), map(str, ids)))
+        self.abilities = array("d", (row[0] for row in rows))
+        self.stderrs = array("d", (row[1] for row in rows))
+        self.ids: List[str] = [row[2] for row in rows]
+        self._positions: Optional[Dict[str, int]] = None
+        self._max_stderr: Optional[int] = None
+
+    @classmethod
+    def from_arrays(
+        cls, abilities: array | memoryview, stderrs: array | memoryview, ids: List[str]
+    ) -> "Coefficients":
+        """Wrap arrays that are already sorted by ability, without copying."""
+        coefficients = cls.__new__(cls)
+        coefficients.abilities = abilities
+        coefficients.stderrs = stderrs
+        coefficients.ids = ids
+        coefficients._positions = None
+        coefficients._max_stderr = None
+        return coefficients
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Coefficient]:
+        return zip(self.abilities, self.stderrs, self.ids)
+
+    def __getitem__(self, idx: int) -> Coefficient:
+        return self.abilities[idx], self.stderrs[idx], self.ids[idx]
+
+    def __getstate__(self) -> Tuple[bytes, bytes, List[str]]:
+        return self.abilities.tobytes(), self.stderrs.tobytes(), self.ids
+
+    def __setstate__(self, state: Tuple[bytes, bytes, List[str]]) -> None:
+        abilities, stderrs, self.ids = state
+        self.abilities = array("d")
+        self.abilities.frombytes(abilities)
+        self.stderrs = array("d")
+        self.stderrs.frombytes(stderrs)
+        self._positions = None
+        self._max_stderr = None
+
+    def position(self, item_id: str) -> Optional[int]:
+        if self._positions is None:
+            self._positions = {item: idx for idx, item in enumerate(self.ids)}
+        return self._positions.get(item_id)
+
+    def get(self, item_id: str) -> Optional[Coefficient]:
+        idx = self.position(item_id)
+        return None if idx is None else self[idx]
+
+    def rank_of_ability(self, ability: float) -> int:
+        """How many items have a lower ability than ``ability``."""
+        return bisect_left(self.abilities, ability)
+
+    def percentile(self, item_id: str) -> Optional[float]:
+        idx = self.position(item_id)
+        return None if idx is None else (idx + 1) / len(self)
+
+    def max_stderr_position(self) -> int:
+        """Position of the least certain item; NaN errors are skipped."""
+        if self._max_stderr is None:
+            best, best_value = 0, -math.inf
+            for idx, value in enumerate(self.stderrs):
+                if value > best_value:
+                    best, best_value = idx, value
+            self._max_stderr = best
+        return self._max_stderr
+
+
 class PairwiseModel:
     def __init__(self) -> None:
         self.model: Optional[Any] = None
-        self.coefficients: Optional[List[Tuple[float, float, str]]] = None  # (ability, stderr, item), sorted by ability
+        self.coefficients: Optional[Coefficients] = None
         self.items: List[str] = []
         self.comparison_items: List[List[str]] = [[], []]
         self.comparison_wins: List[List[int]] = [[], []]
+        self._comparison_idx: Dict[Tuple[str, str], int] = {}
+        self._item_set: set[str] = set()
+
+    @classmethod
+    def from_coefficients(cls, coefficients: Coefficients) -> "PairwiseModel":
+        """A fitted model restored without its comparisons or R object."""
+        model = cls()
+        model.coefficients = coefficients
+        return model
+
+    @classmethod
+    def from_comparisons(cls, rows: Iterable[ComparisonRow]) -> "PairwiseModel":
+        """An unfitted model of ``(item1, item2, win1, win2, draws)`` rows."""
+        model = cls()
+        for id1, id2, win1, win2, draws in rows:
+            model.draw(id1, id2, draws)
+            model.win(id1, id2, win1)
+            model.win(id2, id1, win2)
+        return model
 
     def update_model(self) -> None:
         r_BTm = r('function(df) { BTm(cbind(win1, win2), Label.1, Label.2, data=df) }')
@@ -33,15 +153,12 @@ class PairwiseModel:
         coeff = _r_bt2.BTabilities(self.model)
         abilities = coeff.rx(True, 1)
         stderrs = coeff.rx(True, 2)
-        self.coefficients = sorted(zip(abilities, stderrs, coeff.rownames))
+        self.coefficients = Coefficients(abilities, stderrs, coeff.rownames)
 
-    def coeff_by_id(self, item_id: str) -> Optional[Tuple[float, float, str]]:
+    def coeff_by_id(self, item_id: str) -> Optional[Coefficient]:
         if self.coefficients is None:
             return None
-        for coeff in self.coefficients:
-            if coeff[2] == item_id:
-                return coeff
-        return None
+        return self.coefficients.get(item_id)
 
     def next_comparison(self) -> Tuple[str, str]:
         """Select next comparison pair.
@@ -69,43 +186,43 @@ class PairwiseModel:
     def optimal_comparison(self) -> Tuple[str, str]:
         if self.coefficients is None:
             raise ValueError("Model not trained yet")
-        highest_stderr_item = max(self.coefficients, key=itemgetter(1))
-        item1_idx = self.coefficients.index(highest_stderr_item)
-        return (self.coefficients[item1_idx][2], self.coefficients[self._less_certain_neighbour(item1_idx)][2])
+        item1_idx = self.coefficients.max_stderr_position()
+        ids = self.coefficients.ids
+        return (ids[item1_idx], ids[self._less_certain_neighbour(item1_idx)])
 
     def random_comparison(self) -> Tuple[str, str]:
         if self.coefficients is None:
             raise ValueError("Model not trained yet")
-        rand_item = random.choice(self.coefficients)
-        item1_idx = self.coefficients.index(rand_item)
-        return (self.coefficients[item1_idx][2], self.coefficients[self._less_certain_neighbour(item1_idx)][2])
+        item1_idx = random.randrange(len(self.coefficients))
+        ids = self.coefficients.ids
+        return (ids[item1_idx], ids[self._less_certain_neighbour(item1_idx)])
 
     def _less_certain_neighbour(self, item1_idx: int) -> int:
         if self.coefficients is None:
             raise ValueError("Model not trained yet")
+        stderrs = self.coefficients.stderrs
         if item1_idx == 0:
             return 1
-        elif item1_idx == len(self.coefficients) - 1:
+        elif item1_idx == len(stderrs) - 1:
             return item1_idx - 1
-        elif self.coefficients[item1_idx - 1][1] > self.coefficients[item1_idx + 1][1]:
+        elif stderrs[item1_idx - 1] > stderrs[item1_idx + 1]:
             return item1_idx - 1
         else:
             return item1_idx + 1
 
     def _get_comparison_idx(self, item1: str, item2: str) -> int:
         first, second = min(item1, item2), max(item1, item2)
-        comparisons = enumerate(zip(*self.comparison_items))
-        idx = next((i for i, pair in comparisons if pair == (first, second)), None)
+        idx = self._comparison_idx.get((first, second))
         if idx is None:
-            idx = len(self.comparison_items[0])
+            idx = self._comparison_idx[(first, second)] = len(self.comparison_items[0])
             self.comparison_items[0].append(first)
             self.comparison_items[1].append(second)
             self.comparison_wins[0].append(0)
             self.comparison_wins[1].append(0)
-            if first not in self.items:
-                self.items.append(first)
-            if second not in self.items:
-                self.items.append(second)
+            for item in (first, second):
+                if item not in self._item_set:
+                    self._item_set.add(item)
+                    self.items.append(item)
         return idx
 
     def _comparisons_dataframe(self) -> DataFrame:
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+"""
+On-demand request profiling.
+
+With ``PROFILING_ENABLED`` set, an admin can send ``X-Pwrank-Profile: 1`` on
+any request to have it run under cProfile. Time spent in the R fitting
+backend shows up under the rpy2 calls that invoke it. Streamed bodies are
+profiled until the response is closed.
+
+Profiles are written to ``PROFILE_DIR`` as pstats files with a JSON sidecar
+describing the request, pruned to the newest ``PROFILE_MAX_FILES``, and the
+profiled response carries the id in ``X-Pwrank-Profile-Id``. They are
+listed and downloaded through the admin-only ``/admin/profiles``
+endpoints; load them with ``pstats`` or snakeviz.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, Response, current_app, g, request
+from flask_jwt_extended import current_user, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Pwrank-Profile"
+PROFILE_ID_HEADER = "X-Pwrank-Profile-Id"
+
+
+def _requested_by_admin() -> bool:
+    if request.headers.get(PROFILE_HEADER) != "1":
+        return False
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return False
+    return current_user is not None and current_user.is_admin()
+
+
+def profile_dir() -> Path:
+    return Path(current_app.config["PROFILE_DIR"])
+
+
+def _profile_path(directory: Path, profile_id: str, suffix: str) -> Optional[Path]:
+    # Ids are generated here; refuse anything that could escape the directory.
+    if not profile_id or not all(ch.isalnum() or ch == "-" for ch in profile_id):
+        return None
+    return directory / f"{profile_id}{suffix}"
+
+
+def stats_path(profile_id: str) -> Optional[Path]:
+    return _profile_path(profile_dir(), profile_id, ".pstats")
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Metadata of stored profiles, newest first."""
+    profiles = []
+    for path in sorted(profile_dir().glob("*.json"), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def stats_text(profile_id: str, limit: int = 50) -> Optional[str]:
+    path = stats_path(profile_id)
+    if path is None or not path.exists():
+        return None
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _save(app: Flask, profiler: cProfile.Profile, meta: Dict[str, Any]) -> None:
+    directory = Path(app.config["PROFILE_DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f"{meta['id']}.pstats")
+    (directory / f"{meta['id']}.json").write_text(json.dumps(meta))
+    logger.info(
+        f"Saved profile {meta['id']} for {meta['method']} {meta['path']} "
+        f"({meta['duration_ms']:.0f}ms)"
+    )
+
+    keep = app.config.get("PROFILE_MAX_FILES", 50)
+    for old in sorted(directory.glob("*.json"), reverse=True)[keep:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".pstats").unlink(missing_ok=True)
+
+
+def init_app(app: Flask) -> None:
+    """Profile admin requests that ask for it, if ``PROFILING_ENABLED``."""
+    if not app.config.get("PROFILING_ENABLED"):
+        return
+
+    @app.before_request
+    def _start_profile() -> None:
+        if not _requested_by_admin():
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except (ValueError, RuntimeError):
+            # Python 3.12+ allows a single active profiler per process.
+            logger.warning(f"Another profile is running; not profiling {request.path}")
+            return
+        g._profile = {
+            "profiler": profiler,
+            "id": f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            "started": time.perf_counter(),
+            "user": current_user.email,
+        }
+
+    @app.after_request
+    def _stop_profile(response: Response) -> Response:
+        state = g.pop("_profile", None)
+        if state is None:
+            return response
+        meta = {
+            "id": state["id"],
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "user": state["user"],
+            "created_at": time.time(),
+        }
+
+        def finish() -> None:
+            state["profiler"].disable()
+            meta["duration_ms"] = (time.perf_counter() - state["started"]) * 1000
+            try:
+                _save(app, state["profiler"], meta)
+            except OSError:
+                logger.exception(f"Could not store profile {meta['id']}")
+
+        if response.is_streamed and not response.direct_passthrough:
+            response.call_on_close(finish)
+        else:
+            finish()
+        response.headers[PROFILE_ID_HEADER] = state["id"]
+        return response
+
+
+__all__ = [
+    "PROFILE_HEADER",
+    "PROFILE_ID_HEADER",
+    "init_app",
+    "list_profiles",
+    "profile_dir",
+    "stats_path",
+    "stats_text",
+]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+"""
+Per-user rate limits for write-heavy endpoints.
+
+Each limited endpoint group ("vote", "import") has a token bucket per user:
+``burst`` requests may be made at once, refilled at ``per_minute``. A request
+that finds the bucket empty gets a 429 with ``Retry-After``. Buckets live in
+process memory, so with several workers a user's effective limit scales
+with the number of workers they are balanced over.
+"""
+
+import math
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from flask import Flask
+from flask_jwt_extended import current_user
+
+from .constants import IMPORT_BURST, IMPORTS_PER_MINUTE, VOTE_BURST, VOTES_PER_MINUTE
+
+# Seconds between sweeps that drop buckets which have refilled completely.
+PRUNE_INTERVAL = 300.0
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by user; ``per_minute=0`` disables the limit."""
+
+    def __init__(self, per_minute: float, burst: int) -> None:
+        self.configure(per_minute, burst)
+        self._buckets: Dict[Hashable, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def configure(self, per_minute: float, burst: int) -> None:
+        self.rate = per_minute / 60.0
+        self.burst = max(burst, 1)
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for ``key``; returns 0, or seconds until one is available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            if now - self._last_prune > PRUNE_INTERVAL:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        full_after = self.burst / self.rate
+        self._buckets = {
+            key: (tokens, updated)
+            for key, (tokens, updated) in self._buckets.items()
+            if now - updated < full_after
+        }
+        self._last_prune = now
+
+
+class RateLimits:
+    """The named limiters used by ``rate_limited``."""
+
+    def __init__(self) -> None:
+        self.limiters = {
+            "vote": TokenBucketLimiter(VOTES_PER_MINUTE, VOTE_BURST),
+            "import": TokenBucketLimiter(IMPORTS_PER_MINUTE, IMPORT_BURST),
+        }
+
+    def init_app(self, app: Flask) -> None:
+        self.limiters["vote"].configure(
+            app.config.get("VOTES_PER_MINUTE", VOTES_PER_MINUTE),
+            app.config.get("VOTE_BURST", VOTE_BURST),
+        )
+        self.limiters["import"].configure(
+            app.config.get("IMPORTS_PER_MINUTE", IMPORTS_PER_MINUTE),
+            app.config.get("IMPORT_BURST", IMPORT_BURST),
+        )
+
+
+rate_limits = RateLimits()
+
+
+def rate_limited(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Limit a ``jwt_required`` resource method per ``current_user``."""
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any):
+            retry_after = rate_limits.limiters[name].acquire(current_user.id)
+            if retry_after:
+                return (
+                    {"message": f"Too many {name} requests; try again shortly."},
+                    429,
+                    {"Retry-After": str(math.ceil(retry_after))},
+                )
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["RateLimits", "TokenBucketLimiter", "rate_limited", "rate_limits"]
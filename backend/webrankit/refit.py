@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+"""
+Offline refits of Bradley-Terry models.
+
+Models are otherwise fitted lazily, by the first request after a ranking
+changes, so after a deploy or a quiet night the first visitors of every
+ranking wait for R. ``backend refit`` instead fits every ranking whose
+snapshot is missing or older than its version, in a pool of worker
+processes with one R session each, and writes the snapshots that request
+handlers load on a cache miss (see ``webrankit.snapshots``).
+
+Comparisons are read in the parent process, so workers need neither the
+database nor the Flask app. At most two rankings per worker are in flight,
+which bounds how many rankings' comparisons are held in memory.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .engines import BT
+from .model import Ranking
+from .pairwise import Coefficients, ComparisonRow, PairwiseModel
+from .snapshots import model_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefitResult:
+    ranking_id: str
+    version: int
+    items: int
+    comparisons: int
+    seconds: float
+    coefficients: Optional[Coefficients] = None
+    error: Optional[str] = None
+
+    @property
+    def fitted(self) -> bool:
+        """Whether a model came out, i.e. the ranking had comparisons."""
+        return self.error is None and self.coefficients is not None
+
+
+def fit(ranking_id: str, version: int, rows: List[ComparisonRow]) -> RefitResult:
+    """Fit one ranking's comparisons; runs in a worker process."""
+    model = PairwiseModel.from_comparisons(rows)
+    result = RefitResult(ranking_id, version, len(model.items), len(rows), 0.0)
+    start = time.perf_counter()
+    try:
+        if model.items:
+            model.update_model()
+    except Exception as e:  # noqa: BLE001 - R errors; reported per ranking
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    result.coefficients = model.coefficients
+    return result
+
+
+def stale(ranking: Ranking, force: bool = False) -> bool:
+    """Whether ``ranking`` needs a refit for its snapshot to be current."""
+    if ranking.engine != BT:
+        return False  # Online engines are rated without fitting.
+    if not ranking.comparisons.exists():
+        return False  # Nothing to fit, and no snapshot would be written.
+    return force or model_snapshots.version(ranking.id) != ranking.version
+
+
+def refit(
+    rankings: Iterable[Ranking],
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[RefitResult], None]] = None,
+) -> List[RefitResult]:
+    """Fit ``rankings`` in a process pool and save their snapshots.
+
+    Each ranking's comparisons are read when it is submitted, in the
+    caller's database context, and its snapshot is written when its fit
+    returns. Returns the results in completion order.
+    """
+    workers = workers or os.cpu_count() or 1
+    results: List[RefitResult] = []
+    pending: Dict[Future, Ranking] = {}
+
+    def collect(done: Iterable[Future]) -> None:
+        for future in done:
+            ranking = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:  # noqa: BLE001 - a crashed worker fails its ranking only
+                result = RefitResult(str(ranking.id), ranking.version, 0, 0, 0.0, error=str(e))
+            if result.fitted:
+                model_snapshots.save(
+                    ranking.id, result.version, PairwiseModel.from_coefficients(result.coefficients)
+                )
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    # Spawned workers start their own R session; forking one is unsafe.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for ranking in rankings:
+            while len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            # The version is read first: a vote landing in between makes the
+            # snapshot stale, never wrong for the version it is stored under.
+            version = ranking.current_version()
+            future = pool.submit(fit, str(ranking.id), version, ranking.comparison_rows())
+            pending[future] = ranking
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    return results
+
+
+__all__ = ["RefitResult", "fit", "refit", "stale"]
@@ -4,9 +4,13 @@ from flask_restful import Api
 
 from .auth import AuthResource
 from .compare import CompareResource
-from .item import ItemCollectionResource, ItemResource
+from .events import RankingEventsResource
+from .imports import ImportJobResource
+from .item import ItemBulkResource, ItemCollectionResource, ItemResource
+from .profiles import ProfileCollectionResource, ProfileResource
 from .ranking import RankingCollectionResource, RankingResource
 from .statistics import RankingStatisticsResource
+from .thumbnails import ThumbnailResource
 from .user import UserCollectionResource, UserResource
 
 
@@ -17,9 +21,15 @@ def register_resources(api: Api) -> None:
     api.add_resource(RankingResource, "/ranking/<uuid:uid>")
     api.add_resource(RankingCollectionResource, "/ranking")
     api.add_resource(RankingStatisticsResource, "/ranking/<uuid:uid>/statistics")
+    api.add_resource(RankingEventsResource, "/ranking/<uuid:uid>/events")
     api.add_resource(ItemCollectionResource, "/ranking/<uuid:ranking_uid>/items")
+    api.add_resource(ItemBulkResource, "/ranking/<uuid:ranking_uid>/items/bulk")
     api.add_resource(ItemResource, "/item/<uuid:uid>")
     api.add_resource(CompareResource, "/compare/<uuid:ranking_uid>")
+    api.add_resource(ImportJobResource, "/import/<string:job_id>")
+    api.add_resource(ThumbnailResource, "/thumbnail/<string:name>")
+    api.add_resource(ProfileCollectionResource, "/admin/profiles")
+    api.add_resource(ProfileResource, "/admin/profiles/<string:profile_id>")
 
 
 __all__ = [
@@ -29,8 +39,14 @@ __all__ = [
     "RankingResource",
     "RankingCollectionResource",
     "RankingStatisticsResource",
+    "RankingEventsResource",
     "ItemResource",
     "ItemCollectionResource",
+    "ItemBulkResource",
     "CompareResource",
+    "ImportJobResource",
+    "ThumbnailResource",
+    "ProfileCollectionResource",
+    "ProfileResource",
     "register_resources",
 ]
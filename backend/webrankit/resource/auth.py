@@ -4,7 +4,7 @@ from functools import wraps
 from typing import Any, Callable, Dict
 from uuid import UUID
 
-from flask import jsonify, request
+from flask import g, jsonify, request
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
@@ -13,6 +13,8 @@ from flask_jwt_extended import (
 )
 from flask_restful import Resource
 
+from ..cache import user_cache
+from ..database import on_primary
 from ..extensions import jwt
 from ..model import User
 
@@ -24,8 +26,22 @@ def user_identity_lookup(user: User) -> str:
 
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header: Dict[str, Any], jwt_data: Dict[str, Any]) -> User | None:
-    user_id_from_token = jwt_data["sub"]
-    return User.get_or_none(id=UUID(user_id_from_token))
+    user_id = UUID(jwt_data["sub"])
+    # The token may be verified more than once per request; resolve it once.
+    resolved = g.setdefault("_pwrank_users", {})
+    if user_id in resolved:
+        return resolved[user_id]
+    user = user_cache.get(user_id, 0)
+    if user is None:
+        user = User.get_or_none(id=user_id)
+        if user is None:
+            # A replica may not have caught up with a just-created account.
+            with on_primary():
+                user = User.get_or_none(id=user_id)
+        if user is not None:
+            user_cache.put(user_id, 0, user)
+    resolved[user_id] = user
+    return user
 
 
 def admin_required(func: Callable[..., Any]) -> Callable[..., Any]:
@@ -4,44 +4,72 @@ from typing import Any, Dict
 from uuid import UUID
 
 from flask import jsonify, request
-from flask_jwt_extended import current_user, jwt_required
+from flask_jwt_extended import jwt_required
 from flask_restful import Resource
 
-from ..model import Comparison, Item, Ranking
+from ..database import on_primary
+from ..model import Comparison, LimitExceeded
+from ..ratelimit import rate_limited
+from ..thumbnails import thumbnails
+from .ownership import load_items, load_owned_ranking
+
+
+def _serialize_comparison(comp: Comparison) -> Dict[str, Any]:
+    return {
+        "item1": str(comp.item1_id),
+        "item2": str(comp.item2_id),
+        "win1_count": comp.win1_count,
+        "win2_count": comp.win2_count,
+        "draw_count": comp.draw_count,
+    }
 
 
 class CompareResource(Resource):
     @jwt_required()
     def get(self, ranking_uid: str) -> tuple[Dict[str, Any], int]:
-        ranking = Ranking.get_or_none(Ranking.id == ranking_uid)
-        if ranking is None:
-            return {"message": f"Ranking `{ranking_uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
+        ranking, error = load_owned_ranking(ranking_uid)
+        if error:
+            return error
 
-        model = ranking.get_pairwise_model()
-        if not getattr(model, "coefficients", None):
-            return {"message": "Not enough comparisons to suggest a next item."}, 409
+        placement = False
+        item_ids = ranking.sort_pair()
+        if item_ids is None and ranking.sorting:
+            # An item of the next merge step was deleted; skip past it.
+            with on_primary():
+                ranking.advance_sort()
+                item_ids = ranking.sort_pair()
+        if item_ids is None:
+            model = ranking.get_pairwise_model()
+            if not getattr(model, "coefficients", None):
+                return {"message": "Not enough comparisons to suggest a next item."}, 409
 
-        item_ids = model.next_comparison()
-        item1 = Item.get_or_none(Item.id == UUID(item_ids[0]))
-        item2 = Item.get_or_none(Item.id == UUID(item_ids[1]))
-        if item1 is None or item2 is None:
+            # Newly added items are placed before the usual uncertainty sampling.
+            item_ids = ranking.placement_pair(model)
+            placement = item_ids is not None
+            if not placement:
+                item_ids = model.next_comparison()
+        items = load_items([UUID(item_ids[0]), UUID(item_ids[1])])
+        if len(items) != 2:
             return {"message": "Comparison items could not be found."}, 404
+        item1, item2 = items
 
         comparison = [
-            {"id": str(item1.id), "label": item1.label, "img_url": item1.img_url},
-            {"id": str(item2.id), "label": item2.label, "img_url": item2.img_url},
+            {
+                "id": str(item.id),
+                "label": item.label,
+                "img_url": item.img_url,
+                "thumb_url": thumbnails.url(item.thumbnail, "large"),
+            }
+            for item in (item1, item2)
         ]
-        return jsonify(comparison=comparison)
+        return jsonify(comparison=comparison, placement=placement, sorting=ranking.sorting)
 
     @jwt_required()
+    @rate_limited("vote")
     def post(self, ranking_uid: str) -> tuple[Dict[str, Any], int]:
-        ranking = Ranking.get_or_none(Ranking.id == ranking_uid)
-        if ranking is None:
-            return {"message": f"Ranking `{ranking_uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
+        ranking, error = load_owned_ranking(ranking_uid)
+        if error:
+            return error
 
         payload = request.get_json(silent=True) or {}
         winitem = payload.get("winitem")
@@ -49,27 +77,36 @@ class CompareResource(Resource):
         if not winitem or not loseitem:
             return {"message": "Both winitem and loseitem are required."}, 400
 
-        item1 = Item.get_or_none(Item.id == UUID(winitem))
-        item2 = Item.get_or_none(Item.id == UUID(loseitem))
-        if item1 is None or item2 is None:
+        # One query for both items, their rankings joined in for compare().
+        items = load_items([UUID(winitem), UUID(loseitem)])
+        if len(items) != 2:
             return {"message": "One or more comparison items were not found."}, 404
+        item1, item2 = items
         if item1.id == item2.id:
             return {"message": "Cannot compare an item against itself."}, 400
-        if item1.ranking.id != ranking.id or item2.ranking.id != ranking.id:
+        if item1.ranking_id != ranking.id or item2.ranking_id != ranking.id:
             return {"message": "Items must belong to the specified ranking."}, 400
 
-        comp = Comparison.compare(item1, item2, str(item1.id))
+        try:
+            comp = Comparison.compare(item1, item2, str(item1.id))
+        except LimitExceeded as e:
+            return {"message": str(e)}, 409
+        if ranking.sorting and ranking.current_sort_width() is not None:
+            # No fit per vote while sorting; the model takes over once sorted.
+            return jsonify(
+                comparison_count=ranking.comparisons.count(),
+                comparison=_serialize_comparison(comp),
+                coefficients=[],
+            )
         model = ranking.get_pairwise_model()
+        ranking.settle_placements(model)
         return jsonify(
             comparison_count=ranking.comparisons.count(),
-            comparison={
-                "item1": str(comp.item1.id),
-                "item2": str(comp.item2.id),
-                "win1_count": comp.win1_count,
-                "win2_count": comp.win2_count,
-                "draw_count": comp.draw_count,
-            },
-            coefficients=str(getattr(model, "coefficients", "")),
+            comparison=_serialize_comparison(comp),
+            coefficients=[
+                {"id": item_id, "ability": ability, "stderr": stderr}
+                for ability, stderr, item_id in (model.coefficients or [])
+            ],
         )
 
 
@@ -0,0 +1,68 @@
+"""Conditional GET support based on the ranking version."""
+
+from __future__ import annotations
+
+from datetime import timezone
+from functools import wraps
+from typing import Any, Callable
+
+from flask import Response, request
+from flask_jwt_extended import current_user
+
+from ..model import Ranking
+
+
+def _validators(ranking: Ranking) -> tuple[str, Any]:
+    etag = f"{ranking.id}-{ranking.version}"
+    last_modified = ranking.updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+    return etag, last_modified
+
+
+def _not_modified(etag: str, last_modified: Any) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def ranking_conditional(uid_arg: str) -> Callable[..., Any]:
+    """Answer GETs with 304 when the client already has the current version.
+
+    Only the version columns are loaded before deciding, so an unchanged
+    ranking costs a single primary-key query. Missing or foreign rankings
+    fall through to the wrapped handler, which reports the error itself.
+    Must be applied below ``jwt_required``.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any):
+            ranking = (
+                Ranking.select(Ranking.id, Ranking.user, Ranking.version, Ranking.updated_at)
+                .where(Ranking.id == kwargs[uid_arg])
+                .get_or_none()
+            )
+            if ranking is None or ranking.user_id != current_user.id:
+                return func(*args, **kwargs)
+
+            etag, last_modified = _validators(ranking)
+            if _not_modified(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = func(*args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["ranking_conditional"]
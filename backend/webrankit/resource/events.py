@@ -0,0 +1,128 @@
+"""Server-sent events for live ranking updates."""
+
+from __future__ import annotations
+
+import queue
+from typing import Any, Dict, Iterator, Optional
+
+from flask import Response, current_app, request, stream_with_context
+from flask_jwt_extended import jwt_required
+from flask_restful import Resource
+
+from ..database import current_shard, db_proxy
+from ..events import ranking_events
+from ..model import Ranking
+from .ownership import load_owned_ranking
+
+# WSGI environ key under which the ASGI server takes over event streams.
+DEFER_STREAM = "pwrank.defer_event_stream"
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {current_app.json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _release_connection() -> None:
+    # The stream outlives the request; don't pin a connection while idle.
+    if not db_proxy.is_closed():
+        db_proxy.close()
+
+
+class EventStream:
+    """One subscriber's stream; ``open``/``poll``/``render`` need an app context.
+
+    Iterating blocks on the subscriber queue, which is how WSGI servers
+    run it. The ASGI entry point (``webrankit.asgi``) waits for events on
+    its event loop instead and only calls into the stream to render them.
+    """
+
+    def __init__(self, ranking: Ranking, last_event_id: Optional[int], poll_interval: float) -> None:
+        self.ranking = ranking
+        self.last_event_id = last_event_id
+        self.poll_interval = poll_interval
+        # Background callers must reach the shard the request was routed to.
+        self.shard = current_shard()
+        self.subscriber: Optional[queue.Queue] = None
+
+    def open(self, subscriber: Optional[queue.Queue] = None) -> str:
+        """Subscribe and return the first chunk."""
+        self.subscriber = ranking_events.subscribe(self.ranking.id, subscriber)
+        version = self.ranking.current_version()
+        ranking_events.publish_model(self.ranking.id, version, self.ranking.get_pairwise_model())
+        _release_connection()
+        if self.last_event_id is not None and self.last_event_id != version:
+            return _sse("resync", {"version": version}, version)
+        return ": connected\n\n"
+
+    def poll(self) -> str:
+        """Keepalive after ``poll_interval`` without events."""
+        # Writes served by other workers never reach our broker; notice
+        # them through the version instead.
+        version = self.ranking.current_version()
+        if version != ranking_events.last_version(self.ranking.id):
+            ranking_events.publish_model(
+                self.ranking.id, version, self.ranking.get_pairwise_model()
+            )
+        _release_connection()
+        return ": keepalive\n\n"
+
+    def render(self, event: Dict[str, Any]) -> str:
+        kind = "resync" if event.get("resync") else "ranking"
+        return _sse(kind, event, event["version"])
+
+    def close(self) -> None:
+        if self.subscriber is not None:
+            ranking_events.unsubscribe(self.ranking.id, self.subscriber)
+            self.subscriber = None
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            yield self.open()
+            while True:
+                try:
+                    event = self.subscriber.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    yield self.poll()
+                    continue
+                yield self.render(event)
+        finally:
+            self.close()
+
+
+class RankingEventsResource(Resource):
+    """Stream of rank/rating diffs for one ranking.
+
+    Each ``ranking`` event carries ``items`` (changed entries with ``rank``,
+    ``curr_rating``, ``stderr`` and ``ability``) and ``removed`` item ids.
+    A ``resync`` event asks the client to refetch the full ranking, e.g.
+    after reconnecting with a stale ``Last-Event-ID``.
+    """
+
+    # EventSource cannot send headers; accept ?jwt= on this route only.
+    @jwt_required(locations=["query_string", "headers"])
+    def get(self, uid: str):
+        ranking, error = load_owned_ranking(uid)
+        if error:
+            return error
+
+        stream = EventStream(
+            ranking,
+            request.headers.get("Last-Event-ID", type=int),
+            current_app.config["EVENTS_POLL_INTERVAL"],
+        )
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        defer = request.environ.get(DEFER_STREAM)
+        if defer is not None:
+            defer(stream)
+            return Response(mimetype="text/event-stream", headers=headers)
+        return Response(
+            stream_with_context(iter(stream)), mimetype="text/event-stream", headers=headers
+        )
+
+
+__all__ = ["DEFER_STREAM", "EventStream", "RankingEventsResource"]
@@ -0,0 +1,21 @@
+"""Status of background datasource imports."""
+
+from __future__ import annotations
+
+from flask import jsonify
+from flask_jwt_extended import current_user, jwt_required
+from flask_restful import Resource
+
+from ..datasource import import_jobs
+
+
+class ImportJobResource(Resource):
+    @jwt_required()
+    def get(self, job_id: str):
+        job = import_jobs.get(job_id)
+        if job is None or job.user_id != str(current_user.id):
+            return {"message": f"Import job `{job_id}` not found."}, 404
+        return jsonify(job=job.to_json())
+
+
+__all__ = ["ImportJobResource"]
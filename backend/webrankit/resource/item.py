@@ -3,49 +3,98 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
 
 from flask import jsonify, request
 from flask_jwt_extended import current_user, jwt_required
 from flask_restful import Resource
 
+from ..constants import BULK_ITEMS_MAX, MAX_ITEMS_PER_RANKING
+from ..database import db_proxy
 from ..model import Comparison, Item, Ranking
+from ..serialization import STREAM, json_array_response
+from ..thumbnails import thumbnails
+from .conditional import ranking_conditional
+from .ownership import Error, load_owned_item, load_owned_ranking
 
 logger = logging.getLogger(__name__)
 
 
+def _item_changes(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Error]]:
+    """Validated field updates from an item payload, or the 400 response."""
+    changes: Dict[str, Any] = {}
+
+    # Update label if provided
+    if "label" in payload:
+        label = (payload.get("label") or "").strip()
+        if not label:
+            return {}, ({"message": "Item label cannot be empty."}, 400)
+        if len(label) > 200:
+            return {}, ({"message": "Item label must be 200 characters or less."}, 400)
+        changes["label"] = label
+
+    # Update img_url if provided
+    if "img_url" in payload:
+        img_url = (payload.get("img_url") or "").strip()
+        if len(img_url) > 500:
+            return {}, ({"message": "Image URL must be 500 characters or less."}, 400)
+        changes["img_url"] = img_url
+
+    # Update init_rating if provided
+    if "init_rating" in payload:
+        try:
+            init_rating = int(payload["init_rating"])
+        except (ValueError, TypeError):
+            return {}, ({"message": "Initial rating must be a valid integer."}, 400)
+        if init_rating < 0 or init_rating > 10:
+            return {}, ({"message": "Initial rating must be between 0 and 10."}, 400)
+        changes["init_rating"] = init_rating
+
+    return changes, None
+
+
+def _apply_changes(item: Item, changes: Dict[str, Any]) -> bool:
+    """Set ``changes`` on ``item``; returns whether its image changed."""
+    image_changed = "img_url" in changes and changes["img_url"] != item.img_url
+    for field, value in changes.items():
+        setattr(item, field, value)
+    if image_changed:
+        item.thumbnail = None
+    return image_changed
+
+
 class ItemCollectionResource(Resource):
     """Operations on items within a ranking."""
 
     @jwt_required()
+    @ranking_conditional("ranking_uid")
     def get(self, ranking_uid: str) -> tuple[Dict[str, Any], int]:
         """List all items in a ranking."""
-        ranking = Ranking.get_or_none(Ranking.id == ranking_uid)
-        if ranking is None:
-            return {"message": f"Ranking `{ranking_uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
-
-        items = [
-            {
-                "id": str(item.id),
-                "label": item.label,
-                "img_url": item.img_url,
-                "init_rating": item.init_rating,
-            }
-            for item in ranking.items
-        ]
-
-        return jsonify(items=items)
+        ranking, error = load_owned_ranking(ranking_uid)
+        if error:
+            return error
+
+        def items():
+            for item in ranking.items:
+                yield {
+                    "id": item.id,
+                    "label": item.label,
+                    "img_url": item.img_url,
+                    "thumb_url": thumbnails.url(item.thumbnail),
+                    "init_rating": item.init_rating,
+                }
+
+        return json_array_response(
+            {"items": STREAM}, items(), count=ranking.items.count()
+        )
 
     @jwt_required()
     def post(self, ranking_uid: str) -> tuple[Dict[str, Any], int]:
         """Create a new item in a ranking."""
-        ranking = Ranking.get_or_none(Ranking.id == ranking_uid)
-        if ranking is None:
-            return {"message": f"Ranking `{ranking_uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
+        ranking, error = load_owned_ranking(ranking_uid)
+        if error:
+            return error
 
         payload = request.get_json(silent=True) or {}
         label = (payload.get("label") or "").strip()
@@ -77,15 +126,24 @@ class ItemCollectionResource(Resource):
         except (ValueError, TypeError):
             return {"message": "Initial rating must be a valid integer."}, 400
 
-        # Create item
-        item = Item.create(
-            ranking=ranking,
-            label=label,
-            img_url=img_url,
-            init_rating=init_rating,
-        )
+        # Create item, if the ranking has room for it
+        with db_proxy.atomic():
+            if not Ranking.reserve_items(ranking.id, 1):
+                return {
+                    "message": f"Ranking already has the maximum of {MAX_ITEMS_PER_RANKING} items."
+                }, 409
+            item = Item.create(
+                ranking=ranking,
+                label=label,
+                img_url=img_url,
+                init_rating=init_rating,
+                # Placed by binary search in the compare flow.
+                place_votes=0,
+            )
         # Seed comparisons to ensure new items enter the model
         ranking.compare_by_init_ratings()
+        if img_url:
+            thumbnails.request(ranking.id)
 
         logger.info(
             f"Created item '{label}' in ranking {ranking_uid} by user {current_user.id}"
@@ -96,6 +154,7 @@ class ItemCollectionResource(Resource):
                 "id": str(item.id),
                 "label": item.label,
                 "img_url": item.img_url,
+                "thumb_url": thumbnails.url(item.thumbnail),
                 "init_rating": item.init_rating,
             }
         ), 201
@@ -107,41 +166,35 @@ class ItemResource(Resource):
     @jwt_required()
     def get(self, uid: str) -> tuple[Dict[str, Any], int]:
         """Get a specific item."""
-        item = Item.get_or_none(Item.id == uid)
-        if item is None:
-            return {"message": f"Item `{uid}` not found."}, 404
-        if item.ranking.user.id != current_user.id:
-            return {"message": "Item belongs to another user's ranking."}, 403
+        item, error = load_owned_item(uid)
+        if error:
+            return error
 
         return jsonify(
             item={
                 "id": str(item.id),
                 "label": item.label,
                 "img_url": item.img_url,
+                "thumb_url": thumbnails.url(item.thumbnail),
                 "init_rating": item.init_rating,
-                "ranking_id": str(item.ranking.id),
+                "ranking_id": str(item.ranking_id),
             }
         )
 
     @jwt_required()
     def put(self, uid: str) -> tuple[Dict[str, Any], int]:
         """Update an item."""
-        item = Item.get_or_none(Item.id == uid)
-        if item is None:
-            return {"message": f"Item `{uid}` not found."}, 404
-        if item.ranking.user.id != current_user.id:
-            return {"message": "Item belongs to another user's ranking."}, 403
+        item, error = load_owned_item(uid)
+        if error:
+            return error
 
         payload = request.get_json(silent=True) or {}
+        changes, error = _item_changes(payload)
+        if error:
+            return error
 
-        # Update label if provided
-        if "label" in payload:
-            label = (payload.get("label") or "").strip()
-            if not label:
-                return {"message": "Item label cannot be empty."}, 400
-            if len(label) > 200:
-                return {"message": "Item label must be 200 characters or less."}, 400
-
+        label = changes.get("label")
+        if label is not None:
             # Check for duplicate label in same ranking (excluding current item)
             existing_item = Item.get_or_none(
                 (Item.ranking == item.ranking)
@@ -153,26 +206,11 @@ class ItemResource(Resource):
                     "message": f"An item with label '{label}' already exists in this ranking."
                 }, 409
 
-            item.label = label
-
-        # Update img_url if provided
-        if "img_url" in payload:
-            img_url = (payload.get("img_url") or "").strip()
-            if len(img_url) > 500:
-                return {"message": "Image URL must be 500 characters or less."}, 400
-            item.img_url = img_url
-
-        # Update init_rating if provided
-        if "init_rating" in payload:
-            try:
-                init_rating = int(payload["init_rating"])
-                if init_rating < 0 or init_rating > 10:
-                    return {"message": "Initial rating must be between 0 and 10."}, 400
-                item.init_rating = init_rating
-            except (ValueError, TypeError):
-                return {"message": "Initial rating must be a valid integer."}, 400
-
+        image_changed = _apply_changes(item, changes)
         item.save()
+        Ranking.bump_version(item.ranking_id)
+        if image_changed and item.img_url:
+            thumbnails.request(item.ranking_id)
 
         logger.info(f"Updated item {uid} by user {current_user.id}")
 
@@ -181,6 +219,7 @@ class ItemResource(Resource):
                 "id": str(item.id),
                 "label": item.label,
                 "img_url": item.img_url,
+                "thumb_url": thumbnails.url(item.thumbnail),
                 "init_rating": item.init_rating,
             }
         )
@@ -188,14 +227,12 @@ class ItemResource(Resource):
     @jwt_required()
     def delete(self, uid: str) -> tuple[Dict[str, Any], int]:
         """Delete an item."""
-        item = Item.get_or_none(Item.id == uid)
-        if item is None:
-            return {"message": f"Item `{uid}` not found."}, 404
-        if item.ranking.user.id != current_user.id:
-            return {"message": "Item belongs to another user's ranking."}, 403
+        item, error = load_owned_item(uid)
+        if error:
+            return error
 
         label = item.label
-        ranking_id = str(item.ranking.id)
+        ranking_id = str(item.ranking_id)
 
         # Delete all comparisons involving this item
         Comparison.delete().where(
@@ -204,6 +241,8 @@ class ItemResource(Resource):
 
         # Delete the item
         item.delete_instance()
+        Ranking.release_items(item.ranking_id)
+        Ranking.bump_version(item.ranking_id)
 
         logger.info(
             f"Deleted item '{label}' from ranking {ranking_id} by user {current_user.id}"
@@ -212,4 +251,104 @@ class ItemResource(Resource):
         return {"message": f"Item '{label}' deleted successfully."}, 200
 
 
-__all__ = ["ItemResource", "ItemCollectionResource"]
+class ItemBulkResource(Resource):
+    """Delete or update many items of a ranking in one transaction."""
+
+    @jwt_required()
+    def post(self, ranking_uid: str) -> tuple[Dict[str, Any], int]:
+        """Apply ``{"delete": [ids], "update": [{"id": ..., fields...}]}``.
+
+        Either every change is applied or, on any error, none is. The
+        ranking version is bumped once, so the fitted model is invalidated
+        once per batch instead of once per item.
+        """
+        ranking, error = load_owned_ranking(ranking_uid)
+        if error:
+            return error
+
+        payload = request.get_json(silent=True) or {}
+        delete_ids = payload.get("delete") or []
+        updates = payload.get("update") or []
+        if not isinstance(delete_ids, list) or not isinstance(updates, list):
+            return {"message": "`delete` and `update` must be lists."}, 400
+        if len(delete_ids) + len(updates) > BULK_ITEMS_MAX:
+            return {"message": f"At most {BULK_ITEMS_MAX} items can be changed at once."}, 400
+
+        try:
+            delete_ids = list(dict.fromkeys(UUID(str(item_id)) for item_id in delete_ids))
+            changes_by_id: Dict[UUID, Dict[str, Any]] = {}
+            for update in updates:
+                changes, error = _item_changes(update)
+                if error:
+                    return error
+                changes_by_id[UUID(str(update.get("id")))] = changes
+        except (ValueError, AttributeError):
+            return {"message": "Item ids must be valid UUIDs."}, 400
+        if set(delete_ids) & set(changes_by_id):
+            return {"message": "An item cannot be both updated and deleted."}, 400
+
+        wanted = delete_ids + list(changes_by_id)
+        items = {
+            item.id: item
+            for item in Item.select().where(
+                (Item.ranking == ranking) & Item.id.in_(wanted)
+            )
+        }
+        missing = [str(item_id) for item_id in wanted if item_id not in items]
+        if missing:
+            return {"message": f"Items not found in this ranking: {', '.join(missing)}."}, 404
+
+        updated: List[Item] = []
+        fields = set()
+        images_changed = False
+        for item_id, changes in changes_by_id.items():
+            if _apply_changes(items[item_id], changes):
+                images_changed = True
+                fields.add("thumbnail")
+            fields.update(changes)
+            updated.append(items[item_id])
+
+        relabelled = [item for item in updated if "label" in changes_by_id[item.id]]
+        labels = [item.label for item in relabelled]
+        if len(labels) != len(set(labels)):
+            return {"message": "Updated labels must be unique."}, 409
+        if labels:
+            # Items keeping their label in this batch still clash; only
+            # renamed and deleted items give theirs up.
+            released = [item.id for item in relabelled] + delete_ids
+            clash = (
+                Item.select(Item.label)
+                .where(
+                    (Item.ranking == ranking)
+                    & Item.label.in_(labels)
+                    & Item.id.not_in(released)
+                )
+                .first()
+            )
+            if clash is not None:
+                return {
+                    "message": f"An item with label '{clash.label}' already exists in this ranking."
+                }, 409
+
+        with db_proxy.atomic():
+            if delete_ids:
+                # One cascade for the batch; both item columns are indexed.
+                Comparison.delete().where(
+                    Comparison.item1.in_(delete_ids) | Comparison.item2.in_(delete_ids)
+                ).execute()
+                Item.delete().where(Item.id.in_(delete_ids)).execute()
+                Ranking.release_items(ranking.id, len(delete_ids))
+            if updated:
+                Item.bulk_update(updated, fields=[getattr(Item, name) for name in fields])
+            Ranking.bump_version(ranking.id)
+        if images_changed:
+            thumbnails.request(ranking.id)
+
+        logger.info(
+            f"Bulk change in ranking {ranking.id} by user {current_user.id}: "
+            f"{len(delete_ids)} deleted, {len(updated)} updated"
+        )
+        return jsonify(deleted=len(delete_ids), updated=len(updated))
+
+
+__all__ = ["ItemBulkResource", "ItemResource", "ItemCollectionResource"]
@@ -0,0 +1,48 @@
+"""Loading rankings and items together with their ownership check."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask_jwt_extended import current_user
+
+from ..model import Item, Ranking
+
+Error = Tuple[Dict[str, Any], int]
+
+
+def load_owned_ranking(uid: Any) -> Tuple[Optional[Ranking], Optional[Error]]:
+    """The ranking and ``None``, or ``None`` and the 404/403 response.
+
+    Ownership is checked against the ``user_id`` column, so this costs
+    one query and never loads the owner.
+    """
+    ranking = Ranking.get_or_none(Ranking.id == uid)
+    if ranking is None:
+        return None, ({"message": f"Ranking `{uid}` not found."}, 404)
+    if ranking.user_id != current_user.id:
+        return None, ({"message": "Ranking belongs to another user."}, 403)
+    return ranking, None
+
+
+def load_items(ids: Iterable[Any]) -> List[Item]:
+    """Items with their ranking joined in, in the order of ``ids``."""
+    ids = list(ids)
+    found = {
+        item.id: item
+        for item in Item.select(Item, Ranking).join(Ranking).where(Item.id.in_(ids))
+    }
+    return [found[item_id] for item_id in ids if item_id in found]
+
+
+def load_owned_item(uid: Any) -> Tuple[Optional[Item], Optional[Error]]:
+    """The item, with its ranking, and ``None``; or ``None`` and the 404/403 response."""
+    items = load_items([uid])
+    if not items:
+        return None, ({"message": f"Item `{uid}` not found."}, 404)
+    if items[0].ranking.user_id != current_user.id:
+        return None, ({"message": "Item belongs to another user's ranking."}, 403)
+    return items[0], None
+
+
+__all__ = ["load_items", "load_owned_item", "load_owned_ranking"]
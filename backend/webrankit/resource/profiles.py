@@ -0,0 +1,30 @@
+"""Admin access to stored request profiles."""
+
+from __future__ import annotations
+
+from flask import Response, jsonify, request, send_file
+from flask_restful import Resource
+
+from ..profiling import list_profiles, stats_path, stats_text
+from .auth import admin_required
+
+
+class ProfileCollectionResource(Resource):
+    @admin_required
+    def get(self):
+        return jsonify(profiles=list_profiles())
+
+
+class ProfileResource(Resource):
+    @admin_required
+    def get(self, profile_id: str):
+        """The raw pstats file, or a cumulative-time summary with ``?format=text``."""
+        path = stats_path(profile_id)
+        if path is None or not path.exists():
+            return {"message": f"Profile `{profile_id}` not found."}, 404
+        if request.args.get("format") == "text":
+            return Response(stats_text(profile_id), mimetype="text/plain")
+        return send_file(path, as_attachment=True, download_name=path.name)
+
+
+__all__ = ["ProfileCollectionResource", "ProfileResource"]
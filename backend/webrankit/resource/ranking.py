@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-import math
 from typing import Any, Dict
 
-from flask import jsonify, request
+from flask import current_app, jsonify, request
 from flask_jwt_extended import current_user, jwt_required
 from flask_restful import Resource
 
+from ..datasource import DatasourceError, ImportJob, get_datasource, import_jobs
+from ..engines import BT, ENGINES
 from ..model import Comparison, Item, Ranking
+from ..pairwise import rating_fields
+from ..ratelimit import rate_limited
+from ..serialization import STREAM, json_array_response
+from ..shared_cache import shared_model_cache
+from ..snapshots import model_snapshots
+from ..thumbnails import thumbnails
+from .conditional import ranking_conditional
+from .ownership import load_owned_ranking
 
 
 def _serialize_ranking_summary(ranking: Ranking) -> Dict[str, Any]:
@@ -15,22 +24,22 @@ def _serialize_ranking_summary(ranking: Ranking) -> Dict[str, Any]:
         "id": str(ranking.id),
         "name": ranking.name,
         "datasource": ranking.datasource,
+        "engine": ranking.engine,
         "item_count": ranking.items.count(),
         "comp_count": ranking.comparisons.count(),
+        "sorting": ranking.sorting,
     }
 
 
 class RankingResource(Resource):
     @jwt_required()
+    @ranking_conditional("uid")
     def get(self, uid: str):
-        ranking = Ranking.get_or_none(Ranking.id == uid)
-        if ranking is None:
-            return {"message": f"Ranking `{uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
+        ranking, error = load_owned_ranking(uid)
+        if error:
+            return error
 
         ranking_json = _serialize_ranking_summary(ranking)
-        ranking_json["items"] = []
 
         model = ranking.get_pairwise_model()
 
@@ -43,85 +52,109 @@ class RankingResource(Resource):
             item_comparison_counts[item1_id] = item_comparison_counts.get(item1_id, 0) + total_comps
             item_comparison_counts[item2_id] = item_comparison_counts.get(item2_id, 0) + total_comps
 
-        for item in ranking.items:
-            entry = {
-                "id": str(item.id),
-                "label": item.label,
-                "img_url": item.img_url,
-                "init_rating": item.init_rating,
-                "curr_rating": None,
-                "stderr": 0,
-                "ability": None,
-                "comparisons_count": 0,
-            }
-            if getattr(model, "coefficients", None):
-                coeff = model.coeff_by_id(str(item.id))
-                if coeff:
-                    ability, stderr, _ = coeff
-                    stderr_value = float(stderr)
-                    if math.isnan(stderr_value):
-                        stderr_value = 0.0
-                    idx = model.coefficients.index(coeff)
-                    total = max(len(model.coefficients), 1)
-                    # Use percentile rank (0-10 scale), ensuring lowest item gets > 0
-                    rating = ((idx + 1) / total) * 10
-                    entry["curr_rating"] = round(rating, 2)
-                    entry["stderr"] = round(stderr_value, 2)
-                    entry["ability"] = round(float(ability), 3)
-
-            entry["comparisons_count"] = item_comparison_counts.get(str(item.id), 0)
-            ranking_json["items"].append(entry)
-
-        return jsonify(ranking=ranking_json)
+        def entries():
+            for item in ranking.items:
+                item_id = str(item.id)
+                entry = {
+                    "id": item.id,
+                    "label": item.label,
+                    "img_url": item.img_url,
+                    "thumb_url": thumbnails.url(item.thumbnail),
+                    "init_rating": item.init_rating,
+                    "curr_rating": None,
+                    "stderr": 0,
+                    "ability": None,
+                    "comparisons_count": 0,
+                }
+                coefficients = model.coefficients
+                idx = coefficients.position(item_id) if coefficients else None
+                if idx is not None:
+                    entry.update(
+                        rating_fields(
+                            idx,
+                            len(coefficients),
+                            coefficients.abilities[idx],
+                            coefficients.stderrs[idx],
+                        )
+                    )
+
+                entry["comparisons_count"] = item_comparison_counts.get(item_id, 0)
+                yield entry
+
+        return json_array_response(
+            {"ranking": {**ranking_json, "items": STREAM}},
+            entries(),
+            count=ranking_json["item_count"],
+        )
 
     @jwt_required()
+    @rate_limited("import")
     def post(self, uid: str):
-        ranking = Ranking.get_or_none(Ranking.id == uid)
-        if ranking is None:
-            return {"message": f"Ranking `{uid}` not found."}, 404
+        ranking, error = load_owned_ranking(uid)
+        if error:
+            return error
 
         payload = request.get_json(silent=True) or {}
         datasource = ranking.datasource
-
-        if datasource == "anilist":
-            username = payload.get("anilist_username")
-            statuses = payload.get("anilist_statuses") or []
-            if not username:
-                return {"message": "anilist_username is required."}, 400
-            ranking.add_items_from_anilist(username, statuses)
-        elif datasource == "steam":
-            steam_id = payload.get("steam_id")
-            if not steam_id:
-                return {"message": "steam_id is required."}, 400
-            ranking.add_items_from_steam(steam_id)
-        else:
+        source_cls = get_datasource(datasource)
+        if source_cls is None:
             return {"message": f"Unknown datasource `{datasource}`"}, 400
-
-        return jsonify(message=f"Ranking now has {ranking.items.count()} items.")
+        try:
+            source = source_cls.from_payload(payload)
+        except DatasourceError as e:
+            return {"message": str(e)}, 400
+
+        def run_import() -> int:
+            # Rankings without votes are ordered by a merge sort first.
+            fresh = not ranking.comparisons.exists()
+            try:
+                ranking.import_items(source)
+            finally:
+                thumbnails.request(ranking.id)
+            if fresh:
+                ranking.start_sort()
+            return ranking.items.count()
+
+        job = ImportJob(
+            ranking_id=str(ranking.id), user_id=str(current_user.id), datasource=datasource
+        )
+        import_jobs.submit(current_app._get_current_object(), job, run_import)
+        return (
+            {"message": "Import started.", "job": job.to_json()},
+            202,
+            {"Location": f"/import/{job.id}"},
+        )
 
     @jwt_required()
     def delete(self, uid: str):
-        ranking = Ranking.get_or_none(Ranking.id == uid)
-        if ranking is None:
-            return {"message": f"Ranking `{uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
+        ranking, error = load_owned_ranking(uid)
+        if error:
+            return error
         deleted_rows = ranking.delete_instance(recursive=True)
+        model_snapshots.delete(ranking.id)
+        shared_model_cache.invalidate(ranking.id)
         return jsonify(message=f"Deleted {deleted_rows} ranking(s).")
 
     @jwt_required()
     def put(self, uid: str):
-        ranking = Ranking.get_or_none(Ranking.id == uid)
-        if ranking is None:
-            return {"message": f"Ranking `{uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
+        ranking, error = load_owned_ranking(uid)
+        if error:
+            return error
 
         payload = request.get_json(silent=True) or {}
         name = payload.get("name")
-        if name:
-            ranking.name = name
+        engine = payload.get("engine")
+        if engine is not None and engine not in ENGINES:
+            return {"message": f"Engine must be one of: {', '.join(ENGINES)}."}, 400
+        if name or (engine and engine != ranking.engine):
+            if name:
+                ranking.name = name
+            if engine and engine != ranking.engine:
+                ranking.engine = engine
+                # Seed the new engine's ratings from a fresh exact fit.
+                ranking.refit_version = 0
             ranking.save()
+            Ranking.bump_version(ranking.id)
         return jsonify(message=f"Ranking {ranking.id} updated.", ranking=_serialize_ranking_summary(ranking))
 
 
@@ -135,6 +168,9 @@ class RankingCollectionResource(Resource):
             return {"message": "Ranking name is required."}, 400
         if not datasource:
             return {"message": "Datasource is required."}, 400
+        engine = payload.get("engine") or BT
+        if engine not in ENGINES:
+            return {"message": f"Engine must be one of: {', '.join(ENGINES)}."}, 400
 
         # Check for duplicate name per user, not globally
         if Ranking.get_or_none(
@@ -142,7 +178,9 @@ class RankingCollectionResource(Resource):
         ):
             return {"message": "You already have a ranking with this name."}, 409
 
-        ranking = Ranking.create(user=current_user, name=name, datasource=datasource)
+        ranking = Ranking.create(
+            user=current_user, name=name, datasource=datasource, engine=engine
+        )
         return jsonify(message=f"Ranking {ranking.name} created.", ranking=_serialize_ranking_summary(ranking))
 
     @jwt_required()
@@ -6,10 +6,12 @@ import logging
 from typing import Any, Dict
 
 from flask import jsonify
-from flask_jwt_extended import current_user, jwt_required
+from flask_jwt_extended import jwt_required
 from flask_restful import Resource
 
-from ..model import Comparison, Item, Ranking
+from ..model import Comparison, Item
+from .conditional import ranking_conditional
+from .ownership import load_owned_ranking
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +20,11 @@ class RankingStatisticsResource(Resource):
     """Detailed statistics for a ranking."""
 
     @jwt_required()
+    @ranking_conditional("uid")
     def get(self, uid: str) -> tuple[Dict[str, Any], int]:
-        ranking = Ranking.get_or_none(Ranking.id == uid)
-        if ranking is None:
-            return {"message": f"Ranking `{uid}` not found."}, 404
-        if ranking.user.id != current_user.id:
-            return {"message": "Ranking belongs to another user."}, 403
+        ranking, error = load_owned_ranking(uid)
+        if error:
+            return error
 
         item_count = ranking.items.count()
         comp_count = ranking.comparisons.count()
@@ -60,7 +61,7 @@ class RankingStatisticsResource(Resource):
         model = ranking.get_pairwise_model()
         uncertainties = []
         if model.coefficients:
-            uncertainties = [float(stderr) for _, stderr, _ in model.coefficients]
+            uncertainties = list(model.coefficients.stderrs)
 
         avg_uncertainty = sum(uncertainties) / len(uncertainties) if uncertainties else 0
         max_uncertainty = max(uncertainties) if uncertainties else 0
@@ -0,0 +1,39 @@
+"""Serving item image thumbnails."""
+
+from __future__ import annotations
+
+from flask import redirect, send_file
+from flask_restful import Resource
+
+from ..constants import THUMBNAIL_MAX_AGE
+from ..thumbnails import NAME, thumbnails
+
+
+class ThumbnailResource(Resource):
+    """A WebP thumbnail by content-addressed name, ``<sha256>-<width>.webp``.
+
+    Public like the upstream images they are made from, since ``<img>``
+    tags cannot send tokens. A name never changes content, so responses
+    are cacheable forever. Evicted thumbnails are queued for regeneration
+    and redirect to the original image meanwhile.
+    """
+
+    def get(self, name: str):
+        match = NAME.match(name)
+        if match is None:
+            return {"message": f"Thumbnail `{name}` not found."}, 404
+        path = thumbnails.open(name)
+        if path is not None:
+            response = send_file(path, mimetype="image/webp", max_age=THUMBNAIL_MAX_AGE)
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+            return response
+        source = thumbnails.regenerate(match.group("digest"))
+        if source is None:
+            return {"message": f"Thumbnail `{name}` not found."}, 404
+        response = redirect(source, 302)
+        response.cache_control.no_store = True
+        return response
+
+
+__all__ = ["ThumbnailResource"]
@@ -5,6 +5,7 @@ from typing import Any, Dict, List
 from flask import jsonify, request
 from flask_restful import Resource
 
+from ..cache import user_cache
 from ..model import User
 from .auth import admin_required
 
@@ -24,6 +25,7 @@ class UserResource(Resource):
     @admin_required
     def delete(self, uid: str):
         deleted_rows = User.delete().where(User.id == uid).execute()
+        user_cache.invalidate(uid)
         return jsonify(message=f"Deleted {deleted_rows} user(s).")
 
     @admin_required
@@ -42,6 +44,7 @@ class UserResource(Resource):
             user.set_password_hash(password)
 
         user.save()
+        user_cache.invalidate(user.id)
         return jsonify(user=_serialize_user(user))
 
 
@@ -72,6 +75,7 @@ class UserCollectionResource(Resource):
     @admin_required
     def delete(self):
         deleted_rows = User.delete().execute()
+        user_cache.clear()
         return jsonify(message=f"Deleted {deleted_rows} user(s).")
 
 
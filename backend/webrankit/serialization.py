@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+"""
+JSON response encoding.
+
+Both ``flask.jsonify`` and flask-restful's dict responses are routed through
+the provider installed on ``app.json``, so the encoder is chosen once in
+``create_app`` via the ``JSON_PROVIDER`` setting:
+
+* ``"orjson"`` – native encoder; UUIDs, floats and non-string dict keys are
+  handled in C without per-field conversion in the resources.
+* ``"stdlib"`` – Flask's default ``json`` based provider.
+* ``"auto"`` (default) – orjson when importable, stdlib otherwise.
+
+Large arrays can be streamed with :func:`json_array_response` so the whole
+document never has to exist as a single buffer.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, Type
+
+from flask import Flask, Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+from .metrics import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Marker placed in a payload where a streamed array should be spliced in.
+STREAM = "\x00webrankit-stream\x00"
+STREAM_CHUNK_SIZE = 256
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson does not know (e.g. R scalars, Decimal)."""
+    if hasattr(obj, "__float__"):
+        return float(obj)
+    if hasattr(obj, "__iter__"):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider plus the byte-level API used for streaming."""
+
+    def dumpb(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode()
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        with timed("serialize"):
+            return super().response(*args, **kwargs)
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson."""
+
+    sort_keys = False
+
+    def _options(self) -> int:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumpb(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=self._options())
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumpb(obj).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        with timed("serialize"):
+            body = self.dumpb(obj)
+        return self._app.response_class(body, mimetype="application/json")
+
+
+JSON_PROVIDERS: Dict[str, Type[JSONProvider]] = {"stdlib": StdlibJSONProvider}
+if orjson is not None:
+    JSON_PROVIDERS["orjson"] = OrjsonProvider
+
+
+def init_app(app: Flask) -> JSONProvider:
+    """Install the configured JSON provider on ``app``."""
+    name = app.config.get("JSON_PROVIDER", "auto")
+    if name == "auto":
+        name = "orjson" if "orjson" in JSON_PROVIDERS else "stdlib"
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON_PROVIDER `{name}`")
+
+    provider = JSON_PROVIDERS[name](app)
+    provider.sort_keys = app.config.get("JSON_SORT_KEYS", False)
+    app.json = provider
+    logger.debug(f"Using `{name}` JSON provider")
+    return provider
+
+
+def output_json(data: Any, code: int, headers: Dict[str, str] | None = None) -> Response:
+    """flask-restful representation that delegates to ``app.json``.
+
+    Resources may return an already built response (e.g. ``jsonify(...), 201``);
+    it is passed through with the status and headers applied.
+    """
+    if isinstance(data, Response):
+        response = data
+    else:
+        response = current_app.json.response(data)
+    response.status_code = code
+    response.headers.extend(headers or {})
+    return response
+
+
+def _splice(payload: Dict[str, Any]) -> tuple[bytes, bytes]:
+    encoded = current_app.json.dumpb(payload)
+    marker = json.dumps(STREAM).encode()
+    prefix, sep, suffix = encoded.partition(marker)
+    if not sep:
+        raise ValueError("Streamed payload is missing the STREAM marker")
+    return prefix, suffix
+
+
+def _stream(prefix: bytes, suffix: bytes, rows: Iterable[Any]) -> Iterator[bytes]:
+    dumpb = current_app.json.dumpb
+    yield prefix + b"["
+    chunk: list[bytes] = []
+    first = True
+    for row in rows:
+        chunk.append(dumpb(row))
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield (b"" if first else b",") + b",".join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + b",".join(chunk)
+    yield b"]" + suffix
+
+
+def json_array_response(
+    payload: Dict[str, Any], rows: Iterable[Any], count: int | None = None
+) -> Response:
+    """Respond with ``payload`` where the ``STREAM`` marker is replaced by ``rows``.
+
+    Arrays with at least ``JSON_STREAM_MIN_ITEMS`` entries are encoded
+    incrementally; smaller ones are encoded in one go. ``rows`` should be a
+    lazy generator: streamed bodies are produced after the view returns, so
+    any query must start inside the generator rather than in the view.
+    """
+    threshold = current_app.config.get("JSON_STREAM_MIN_ITEMS", 0)
+    if count is not None and count < threshold:
+        return current_app.json.response(_replace_marker(payload, list(rows)))
+
+    prefix, suffix = _splice(payload)
+    return current_app.response_class(
+        stream_with_context(_stream(prefix, suffix, rows)),
+        mimetype="application/json",
+    )
+
+
+def _replace_marker(obj: Any, rows: list) -> Any:
+    if obj == STREAM:
+        return rows
+    if isinstance(obj, dict):
+        return {key: _replace_marker(value, rows) for key, value in obj.items()}
+    return obj
+
+
+__all__ = [
+    "JSON_PROVIDERS",
+    "OrjsonProvider",
+    "STREAM",
+    "StdlibJSONProvider",
+    "init_app",
+    "json_array_response",
+    "output_json",
+]
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+"""
+Per-user SQLite shards.
+
+With SQLite every write takes the database file's lock, so all users' votes
+queue behind one another. With ``SHARD_DIR`` set, rankings, items and
+comparisons live in ``SHARD_COUNT`` SQLite files instead, and each user's
+data is in the file picked by their id, so writes of users in different
+shards proceed in parallel. Accounts stay in the main database
+(``DATABASE_URL``), which signing in and user administration keep using.
+
+Requests are routed by the ``sub`` claim of their access token before the
+view runs, and background work started by a request keeps its shard (see
+``current_shard``). Shard files use WAL journaling and get the current
+schema on first use. ``SHARD_COUNT`` must not change once data is in the
+shards; ``backend shard-split`` copies an existing main database into them.
+"""
+
+import logging
+import threading
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, g
+from peewee import SqliteDatabase
+
+from .constants import IMPORT_CHUNK_SIZE, SHARD_COUNT
+from .database import db_proxy, request_subject, use_shard
+from .metrics import instrument_database
+from .model import Comparison, Item, Ranking
+
+logger = logging.getLogger(__name__)
+
+SHARD_PRAGMAS = {"journal_mode": "wal", "busy_timeout": 5000, "synchronous": "normal"}
+
+
+class ShardSet:
+    """SQLite shard files in ``directory``, opened on first use."""
+
+    def __init__(self, directory: Optional[str] = None, count: int = SHARD_COUNT) -> None:
+        self.directory = Path(directory) if directory else None
+        self.count = count
+        self._databases: Dict[int, SqliteDatabase] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def init_app(self, app: Flask) -> None:
+        directory = app.config.get("SHARD_DIR")
+        self.directory = Path(directory) if directory else None
+        self.count = max(app.config.get("SHARD_COUNT", self.count), 1)
+        self._databases = {}
+        if not self.enabled:
+            return
+
+        @app.before_request
+        def _route_to_shard() -> None:
+            subject = request_subject()
+            if subject is None:
+                return
+            try:
+                database = self.for_user(subject)
+            except ValueError:
+                return  # Not one of our tokens; jwt_required rejects it.
+            stack = ExitStack()
+            stack.enter_context(use_shard(database))
+            stack.callback(_close, database)
+            g._pwrank_shard = stack
+
+        @app.teardown_request
+        def _leave_shard(exc: BaseException | None) -> None:
+            stack = g.pop("_pwrank_shard", None)
+            if stack is not None:
+                stack.close()
+
+    def index(self, user_id: Any) -> int:
+        """Shard of ``user_id``; user ids are random UUIDs, so buckets stay even."""
+        return uuid.UUID(str(user_id)).int % self.count
+
+    def path(self, index: int) -> Path:
+        return self.directory / f"shard-{index:03d}.db"
+
+    def database(self, index: int) -> SqliteDatabase:
+        database = self._databases.get(index)
+        if database is not None:
+            return database
+        with self._lock:
+            database = self._databases.get(index)
+            if database is None:
+                database = self._open(index)
+                self._databases[index] = database
+        return database
+
+    def for_user(self, user_id: Any) -> SqliteDatabase:
+        return self.database(self.index(user_id))
+
+    def existing(self) -> Iterator[Tuple[int, SqliteDatabase]]:
+        """The shards that have been created, in index order."""
+        for index in range(self.count):
+            if self.path(index).exists():
+                yield index, self.database(index)
+
+    def locate(self, ranking_id: Any) -> Optional[SqliteDatabase]:
+        """The shard holding ``ranking_id``, for callers without a user."""
+        for _, database in self.existing():
+            with use_shard(database):
+                if Ranking.select().where(Ranking.id == ranking_id).exists():
+                    return database
+        return None
+
+    def _open(self, index: int) -> SqliteDatabase:
+        from .migrations import stamp_all
+
+        path = self.path(index)
+        fresh = not path.exists()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        database = SqliteDatabase(str(path), pragmas=SHARD_PRAGMAS)
+        instrument_database(database, "shard")
+        if fresh:
+            with use_shard(database):
+                database.create_tables([Ranking, Item, Comparison])
+                stamp_all()
+            logger.info(f"Created shard {path}")
+        return database
+
+    def split(
+        self,
+        purge: bool = False,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        progress: Optional[Callable[[Ranking, int], None]] = None,
+    ) -> Counter:
+        """Copy every ranking of the main database into its owner's shard.
+
+        Rows already in a shard are left alone, so an interrupted split can
+        be run again. With ``purge`` the copied rankings are then deleted
+        from the main database. Returns the number of rankings per shard.
+        """
+        copied: Counter = Counter()
+        with use_shard(None):
+            rankings = list(Ranking.select())
+        for ranking in rankings:
+            index = self.index(ranking.user_id)
+            shard = self.database(index)
+            _copy(Ranking.select().where(Ranking.id == ranking.id), shard, chunk_size)
+            _copy(Item.select().where(Item.ranking == ranking.id), shard, chunk_size)
+            _copy(Comparison.select().where(Comparison.ranking == ranking.id), shard, chunk_size)
+            if purge:
+                with use_shard(None), db_proxy.atomic():
+                    Comparison.delete().where(Comparison.ranking == ranking.id).execute()
+                    Item.delete().where(Item.ranking == ranking.id).execute()
+                    Ranking.delete().where(Ranking.id == ranking.id).execute()
+            copied[index] += 1
+            if progress is not None:
+                progress(ranking, index)
+        return copied
+
+
+def _copy(query: Any, shard: SqliteDatabase, chunk_size: int) -> None:
+    """Insert the rows of ``query``, read from the main database, into ``shard``."""
+    model = query.model
+    with use_shard(None):
+        rows: List[Dict[str, Any]] = list(query.dicts())
+    with use_shard(shard):
+        for start in range(0, len(rows), chunk_size):
+            with shard.atomic():
+                model.insert_many(rows[start:start + chunk_size]).on_conflict_ignore().execute()
+
+
+def _close(database: SqliteDatabase) -> None:
+    if not database.is_closed():
+        database.close()
+
+
+shards = ShardSet()
+
+
+__all__ = ["SHARD_PRAGMAS", "ShardSet", "shards"]
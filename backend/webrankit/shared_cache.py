@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+"""
+Fitted models shared between worker processes.
+
+Each Gunicorn worker has its own ``model_cache``, so without help every
+worker fits the same ranking separately. Fits are additionally written in
+the snapshot format to ``SHARED_MODEL_CACHE_DIR`` (on tmpfs under
+``/dev/shm`` by default), one file per ranking and version. Other workers
+memory-map the file and use the coefficient arrays in place, so a fit in
+one worker is reusable by all others on the host without copying.
+
+Entries older than ``SHARED_MODEL_CACHE_TTL`` are dropped when read, and
+writes evict least recently used files once the directory grows past
+``SHARED_MODEL_CACHE_MAX_BYTES``. Unlinking a file is safe while other
+workers still have it mapped.
+"""
+
+import logging
+import mmap
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Hashable, Optional
+
+from flask import Flask
+
+from .constants import SHARED_MODEL_CACHE_MAX_BYTES, SHARED_MODEL_CACHE_TTL
+from .metrics import record_cache
+from .pairwise import PairwiseModel
+from .snapshots import decode, encode
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".snap"
+
+
+class SharedModelCache:
+    """Memory-mapped model files keyed by ranking id and version."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = SHARED_MODEL_CACHE_MAX_BYTES,
+        ttl: float = SHARED_MODEL_CACHE_TTL,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def init_app(self, app: Flask) -> None:
+        directory = app.config.get("SHARED_MODEL_CACHE_DIR")
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = app.config.get("SHARED_MODEL_CACHE_MAX_BYTES", self.max_bytes)
+        self.ttl = app.config.get("SHARED_MODEL_CACHE_TTL", self.ttl)
+
+    def _path(self, ranking_id: Hashable, version: int) -> Path:
+        return self.directory / f"{ranking_id}-{version}{SUFFIX}"
+
+    def get(self, ranking_id: Hashable, version: int) -> Optional[PairwiseModel]:
+        if self.directory is None:
+            return None
+        path = self._path(ranking_id, version)
+        try:
+            with path.open("rb") as fh:
+                if time.time() - os.fstat(fh.fileno()).st_mtime > self.ttl:
+                    path.unlink(missing_ok=True)
+                    raise FileNotFoundError(path)
+                mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            # Views into the mapping keep it alive after the file is closed.
+            _, coefficients = decode(mapping, copy=False)
+        except FileNotFoundError:
+            record_cache("shared", hit=False)
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable shared model {path}: {e}")
+            record_cache("shared", hit=False)
+            return None
+        # Access time drives eviction; atime is often disabled, so set it here.
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+        record_cache("shared", hit=True)
+        return PairwiseModel.from_coefficients(coefficients)
+
+    def put(self, ranking_id: Hashable, version: int, model: PairwiseModel) -> None:
+        if self.directory is None or model.coefficients is None:
+            return
+        path = self._path(ranking_id, version)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(encode(version, model.coefficients))
+                os.replace(tmp, path)
+            except OSError:
+                os.unlink(tmp)
+                raise
+            for stale in self.directory.glob(f"{ranking_id}-*{SUFFIX}"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Could not share model for ranking {ranking_id}: {e}")
+
+    def invalidate(self, ranking_id: Hashable) -> None:
+        if self.directory is None:
+            return
+        for path in self.directory.glob(f"{ranking_id}-*{SUFFIX}"):
+            path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        now = time.time()
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug(f"Evicted shared model {path.name}")
+
+
+shared_model_cache = SharedModelCache()
+
+
+__all__ = ["SharedModelCache", "shared_model_cache"]
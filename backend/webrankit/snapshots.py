@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+"""
+Fitted models persisted to disk.
+
+After a restart every ranking would otherwise be refit from its raw
+comparisons on first access. Each fit is therefore also written to
+``MODEL_SNAPSHOT_DIR`` as one small binary file per ranking, and a cache
+miss loads the file if it was written for the ranking's current version.
+
+File layout (little endian)::
+
+    magic "PWRS" | format u16 | ranking version u64 | items u32 | ids bytes u32 | pad
+    abilities f64[items] | stderrs f64[items] | ids, utf-8, "\\n"-separated
+
+Abilities are sorted ascending, as in ``Coefficients``. The header is
+padded to 24 bytes so the arrays are 8-byte aligned and can be used in
+place from a memory mapping (see ``webrankit.shared_cache``). Files are
+replaced atomically, so readers never see a partial snapshot.
+"""
+
+import logging
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Hashable, Optional
+
+from flask import Flask
+
+from .metrics import record_cache
+from .pairwise import Coefficients, PairwiseModel
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PWRS"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHQII2x")
+
+
+def _le_bytes(values: array | memoryview) -> bytes:
+    if sys.byteorder == "big":
+        values = array("d", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _le_array(data: bytes | memoryview) -> array:
+    values = array("d")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def encode(version: int, coefficients: Coefficients) -> bytes:
+    ids = "\n".join(coefficients.ids).encode()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, version, len(coefficients), len(ids))
+    return b"".join(
+        (header, _le_bytes(coefficients.abilities), _le_bytes(coefficients.stderrs), ids)
+    )
+
+
+def _le_view(data: memoryview) -> memoryview | array:
+    if sys.byteorder == "big":
+        return _le_array(data)
+    return data.cast("d")
+
+
+def decode(data: bytes | memoryview, copy: bool = True) -> tuple[int, Coefficients]:
+    """Parse a snapshot; raises ``ValueError`` if it is not one we can read.
+
+    With ``copy=False`` the float arrays are views into ``data``, which
+    must then stay alive and unchanged for as long as they are used.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated snapshot header")
+    magic, fmt, version, count, ids_len = HEADER.unpack_from(data)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {magic!r} v{fmt}")
+    floats_end = HEADER.size + 16 * count
+    if len(data) != floats_end + ids_len:
+        raise ValueError("Snapshot size does not match its header")
+
+    to_floats = _le_array if copy else _le_view
+    view = memoryview(data)
+    return version, Coefficients.from_arrays(
+        to_floats(view[HEADER.size : HEADER.size + 8 * count]),
+        to_floats(view[HEADER.size + 8 * count : floats_end]),
+        bytes(view[floats_end:]).decode().split("\n") if count else [],
+    )
+
+
+class SnapshotStore:
+    """One snapshot file per ranking in ``directory``; disabled without one."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = Path(directory) if directory else None
+
+    def init_app(self, app: Flask) -> None:
+        directory = app.config.get("MODEL_SNAPSHOT_DIR")
+        self.directory = Path(directory) if directory else None
+
+    def path(self, ranking_id: Hashable) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / f"{ranking_id}.snap"
+
+    def load(self, ranking_id: Hashable, version: int) -> Optional[PairwiseModel]:
+        """The model fitted at ``version``, if a matching snapshot exists."""
+        path = self.path(ranking_id)
+        if path is None:
+            return None
+        try:
+            stored_version, coefficients = decode(path.read_bytes())
+        except FileNotFoundError:
+            record_cache("snapshot", hit=False)
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable model snapshot {path}: {e}")
+            record_cache("snapshot", hit=False)
+            return None
+        if stored_version != version:
+            record_cache("snapshot", hit=False)
+            return None
+        record_cache("snapshot", hit=True)
+        return PairwiseModel.from_coefficients(coefficients)
+
+    def version(self, ranking_id: Hashable) -> Optional[int]:
+        """Ranking version of the stored snapshot, reading only its header."""
+        path = self.path(ranking_id)
+        if path is None:
+            return None
+        try:
+            with path.open("rb") as fh:
+                magic, fmt, version, _, _ = HEADER.unpack(fh.read(HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            return None
+        return version
+
+    def save(self, ranking_id: Hashable, version: int, model: PairwiseModel) -> None:
+        path = self.path(ranking_id)
+        if path is None or model.coefficients is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".snap-")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(encode(version, model.coefficients))
+                os.replace(tmp, path)
+            except OSError:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write model snapshot {path}: {e}")
+
+    def delete(self, ranking_id: Hashable) -> None:
+        path = self.path(ranking_id)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+
+model_snapshots = SnapshotStore()
+
+
+__all__ = ["SnapshotStore", "decode", "encode", "model_snapshots"]
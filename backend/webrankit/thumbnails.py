@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+"""
+Thumbnails of item images.
+
+Items point at full-size images on AniList and Steam, so every ranking page
+made clients download hundreds of large remote images. After items are
+imported or edited, their images are downloaded once on a background pool
+and rendered as WebP thumbnails in the ``THUMBNAIL_SIZES`` widths under
+``THUMBNAIL_DIR``. Only hosts matching ``THUMBNAIL_HOSTS`` are fetched, and
+every redirect hop is checked against them too, so item URLs cannot make
+the server request internal addresses.
+
+Files are named after the SHA-256 of the source image. A name always stands
+for the same pixels, so ``/thumbnail/<name>`` is served as immutable for a
+year, and identical images behind different URLs are stored once. Items
+record the digest in ``Item.thumbnail`` ("" when the image could not be
+used) and responses carry a ``thumb_url``. Recording it leaves the ranking
+version alone, so no model is refit and clients that hold the current ETag
+see thumbnails with the next change to the ranking.
+
+Once the directory exceeds ``THUMBNAIL_MAX_BYTES`` the least recently served
+thumbnails are deleted. The source URL of each digest is kept in a small
+``.src`` file, so a request for an evicted thumbnail regenerates it in the
+background and redirects to the original image meanwhile.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set
+from urllib.parse import urlsplit
+
+from flask import Flask, current_app
+from PIL import Image, ImageOps
+
+from .constants import (
+    IMPORT_CHUNK_SIZE,
+    THUMBNAIL_HOSTS,
+    THUMBNAIL_MAX_BYTES,
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_SIZES,
+    THUMBNAIL_SOURCE_MAX_BYTES,
+    THUMBNAIL_WORKERS,
+)
+from .database import current_shard, db_proxy, use_shard
+from .datasource import FetchError, fetcher
+from .model import Item
+
+logger = logging.getLogger(__name__)
+
+NAME = re.compile(r"^(?P<digest>[0-9a-f]{64})-(?P<width>\d+)\.webp$")
+SOURCE_SUFFIX = ".src"
+# Digests remembered per source URL, so shared images are downloaded once.
+URL_MEMORY = 4096
+# Eviction deletes down to this share of the budget, so it does not run on every write.
+EVICT_TO = 0.9
+
+
+class ThumbnailError(Exception):
+    """An image could not be downloaded or decoded."""
+
+
+def render(data: bytes, widths: Iterable[int], quality: int = THUMBNAIL_QUALITY) -> Dict[int, bytes]:
+    """WebP encodings of the image in ``data`` scaled to each of ``widths``.
+
+    Images are never scaled up; aspect ratios are kept.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            widest = max(widths)
+            # Lets JPEG decode at a reduced scale instead of full size.
+            image.draft("RGB", (widest, widest * 4))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            rendered = {}
+            for width in sorted(widths, reverse=True):
+                if image.width > width:
+                    height = max(1, round(image.height * width / image.width))
+                    image = image.resize((width, height), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                image.save(buffer, "WEBP", quality=quality, method=4)
+                rendered[width] = buffer.getvalue()
+            return rendered
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ThumbnailError(f"Unreadable image: {e}") from e
+
+
+class ThumbnailStore:
+    """Content-addressed WebP thumbnails on disk, filled in the background."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = THUMBNAIL_MAX_BYTES,
+        hosts: Sequence[str] = THUMBNAIL_HOSTS,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes
+        self.hosts = tuple(hosts)
+        self.widths = tuple(THUMBNAIL_SIZES.values())
+        self._passes: Optional[ThreadPoolExecutor] = None
+        self._downloads: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Hashable] = set()
+        self._by_url: "OrderedDict[str, str]" = OrderedDict()
+        self._total: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def init_app(self, app: Flask) -> None:
+        directory = app.config.get("THUMBNAIL_DIR")
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = app.config.get("THUMBNAIL_MAX_BYTES", self.max_bytes)
+        self.hosts = tuple(app.config.get("THUMBNAIL_HOSTS", self.hosts))
+        self._total = None
+
+    def url(self, digest: Optional[str], size: str = "small") -> Optional[str]:
+        """Path of the ``size`` thumbnail for an item's ``thumbnail`` digest."""
+        if not digest or not self.enabled:
+            return None
+        return f"/thumbnail/{digest}-{THUMBNAIL_SIZES[size]}.webp"
+
+    def allowed(self, url: str) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return False
+        if "*" in self.hosts:
+            return True
+        host = parts.hostname.lower()
+        return any(host == allowed or host.endswith("." + allowed) for allowed in self.hosts)
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name[:2] / name
+
+    # Serving
+
+    def open(self, name: str) -> Optional[Path]:
+        """The file for ``name`` if it is stored, marked as recently used."""
+        if not self.enabled or not NAME.match(name):
+            return None
+        path = self._path(name)
+        try:
+            # Access time drives eviction; atime is often disabled, so set it here.
+            os.utime(path, (time.time(), path.stat().st_mtime))
+        except OSError:
+            return None
+        return path
+
+    def source(self, digest: str) -> Optional[str]:
+        try:
+            return self._path(digest + SOURCE_SUFFIX).read_text(encoding="utf-8").strip() or None
+        except OSError:
+            return None
+
+    def regenerate(self, digest: str) -> Optional[str]:
+        """Queue an evicted digest for rendering again; returns its source URL."""
+        url = self.source(digest)
+        if url is None:
+            return None
+        self._download_pool().submit(self._regenerate, url)
+        return url
+
+    def _regenerate(self, url: str) -> None:
+        try:
+            self.generate(url, reuse=False)
+        except ThumbnailError as e:
+            logger.info(f"Could not regenerate thumbnail of {url}: {e}")
+
+    # Generating
+
+    def generate(self, url: str, reuse: bool = True) -> str:
+        """Store thumbnails of the image at ``url``; returns its digest."""
+        if not self.allowed(url):
+            raise ThumbnailError(f"Image host of {url} is not in THUMBNAIL_HOSTS")
+        if reuse:
+            with self._lock:
+                digest = self._by_url.get(url)
+            if digest is not None and all(
+                self._path(f"{digest}-{width}.webp").exists() for width in self.widths
+            ):
+                return digest
+
+        data = self._download(url)
+        digest = hashlib.sha256(data).hexdigest()
+        missing = [w for w in self.widths if not self._path(f"{digest}-{w}.webp").exists()]
+        written = 0
+        if missing:
+            for width, encoded in render(data, missing).items():
+                self._write(f"{digest}-{width}.webp", encoded)
+                written += len(encoded)
+        if not self._path(digest + SOURCE_SUFFIX).exists():
+            self._write(digest + SOURCE_SUFFIX, url.encode("utf-8"))
+        with self._lock:
+            self._by_url[url] = digest
+            self._by_url.move_to_end(url)
+            while len(self._by_url) > URL_MEMORY:
+                self._by_url.popitem(last=False)
+            if self._total is not None:
+                self._total += written
+        if written:
+            self._evict()
+        return digest
+
+    def _download(self, url: str) -> bytes:
+        body = bytearray()
+        try:
+            for chunk in fetcher.stream(url, cache=False, follow=self.allowed):
+                body += chunk
+                if len(body) > THUMBNAIL_SOURCE_MAX_BYTES:
+                    raise ThumbnailError(f"{url} is larger than {THUMBNAIL_SOURCE_MAX_BYTES} bytes")
+        except FetchError as e:
+            raise ThumbnailError(str(e)) from e
+        return bytes(body)
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            os.unlink(tmp)
+            raise
+
+    def _evict(self) -> None:
+        with self._lock:
+            if self._total is not None and self._total <= self.max_bytes:
+                return
+            entries = []
+            for path in self.directory.glob("*/*.webp"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    if total <= self.max_bytes * EVICT_TO:
+                        break
+                    path.unlink(missing_ok=True)
+                    total -= size
+                logger.info(f"Evicted thumbnails down to {total} bytes")
+            self._total = total
+
+    # Background passes over rankings
+
+    def request(self, ranking_id: Hashable) -> bool:
+        """Queue thumbnails for the ranking's items that lack them."""
+        if not self.enabled:
+            return False
+        app = current_app._get_current_object()
+        with self._lock:
+            if ranking_id in self._pending:
+                return False
+            self._pending.add(ranking_id)
+            if self._passes is None:
+                self._passes = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        self._passes.submit(self._run, app, current_shard(), ranking_id)
+        return True
+
+    def _download_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._downloads is None:
+                self._downloads = ThreadPoolExecutor(
+                    max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail-download"
+                )
+            return self._downloads
+
+    def _run(self, app: Flask, shard: Any, ranking_id: Hashable) -> None:
+        with app.app_context(), use_shard(shard):
+            db_proxy.connect(reuse_if_open=True)
+            try:
+                # Cleared first, so edits made during the pass queue another one.
+                with self._lock:
+                    self._pending.discard(ranking_id)
+                self.fill(ranking_id)
+            except Exception:  # noqa: BLE001 - items keep their full-size images
+                logger.exception(f"Thumbnail pass for ranking {ranking_id} failed")
+            finally:
+                if not db_proxy.is_closed():
+                    db_proxy.close()
+
+    def fill(self, ranking_id: Hashable) -> int:
+        """Generate missing thumbnails of one ranking; returns how many items got one."""
+        urls: Dict[str, List[Any]] = {}
+        query = Item.select(Item.id, Item.img_url).where(
+            (Item.ranking == ranking_id) & Item.thumbnail.is_null() & (Item.img_url != "")
+        )
+        for item_id, img_url in query.tuples():
+            urls.setdefault(img_url, []).append(item_id)
+        if not urls:
+            return 0
+
+        def attempt(url: str) -> str:
+            try:
+                return self.generate(url)
+            except ThumbnailError as e:
+                logger.info(f"No thumbnail for {url}: {e}")
+                return ""
+
+        done = 0
+        digests = self._download_pool().map(attempt, list(urls))
+        for url, digest in zip(list(urls), digests):
+            ids = urls[url]
+            for start in range(0, len(ids), IMPORT_CHUNK_SIZE):
+                # img_url is rechecked so a concurrent edit is not overwritten.
+                Item.update(thumbnail=digest).where(
+                    Item.id.in_(ids[start:start + IMPORT_CHUNK_SIZE]) & (Item.img_url == url)
+                ).execute()
+            done += len(ids) if digest else 0
+        logger.info(f"Thumbnails ready for {done} items of ranking {ranking_id}")
+        return done
+
+
+thumbnails = ThumbnailStore()
+
+
+__all__ = ["ThumbnailError", "ThumbnailStore", "render", "thumbnails"]
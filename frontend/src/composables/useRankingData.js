@@ -241,7 +241,8 @@ export function useRankingData(rankingId) {
 
     submitting.value = true;
     try {
-      await REST.post(`/ranking/${rankingId.value}`, syncData);
+      const data = await REST.post(`/ranking/${rankingId.value}`, syncData);
+      await REST.waitForJob(data.job);
       notifySuccess("Items synced");
       await loadRanking();
       return true;
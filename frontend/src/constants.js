@@ -136,3 +136,12 @@ export const DEFAULT_ITEMS_PER_PAGE = 20;
  * @default 2
  */
 export const MIN_ITEMS_FOR_RANKING = 2;
+
+/**
+ * Maximum items deleted or updated per bulk items request.
+ * Must match backend BULK_ITEMS_MAX constant.
+ * @type {number}
+ * @constant
+ * @default 500
+ */
+export const BULK_ITEMS_MAX = 500;
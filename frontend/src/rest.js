@@ -119,6 +119,31 @@ class RestClient {
     return this._requestJson("DELETE", endpoint, { body });
   }
 
+  /**
+   * Poll a background import job until it finishes.
+   * Resolves with the final job; rejects if the job failed.
+   */
+  async waitForJob(job, intervalMs = 1000) {
+    let current = job;
+    while (current.status === "queued" || current.status === "running") {
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+      current = (await this.get(`/import/${current.id}`)).job;
+    }
+    if (current.status === "failed") {
+      throw new Error(current.error || "Import failed.");
+    }
+    return current;
+  }
+
+  /**
+   * Open a server-sent events stream. EventSource cannot send headers, so
+   * the access token travels as the `jwt` query parameter.
+   */
+  events(endpoint) {
+    const token = encodeURIComponent(this.auth?.accessToken || "");
+    return new EventSource(`${this.baseUrl}${endpoint}?jwt=${token}`);
+  }
+
   async _requestJson(method, endpoint, options = {}) {
     const { body, includeAuth = true } = options;
     const response = await this._request(method, endpoint, {
@@ -0,0 +1,33 @@
+import { FALLBACK_IMAGE_SVG } from "../constants";
+import { REST } from "../rest";
+
+/**
+ * Image source for an item: the backend's WebP thumbnail once it has been
+ * generated, otherwise the original image URL.
+ *
+ * @param {{img_url?: string, thumb_url?: string|null}} item - Item from the API
+ * @returns {string} URL to use as the image `src`
+ */
+export function itemImageSrc(item) {
+  if (item?.thumb_url) {
+    return `${REST.baseUrl}${item.thumb_url}`;
+  }
+  return item?.img_url || FALLBACK_IMAGE_SVG;
+}
+
+/**
+ * `@error` handler for item images: a failed thumbnail falls back to the
+ * original image, and a failed original to the placeholder.
+ *
+ * @param {Event} event - The image error event
+ * @param {{img_url?: string, thumb_url?: string|null}} item - Item from the API
+ */
+export function handleItemImageError(event, item) {
+  const img = event.target;
+  if (item?.thumb_url && item.img_url && !img.dataset.triedOriginal) {
+    img.dataset.triedOriginal = "1";
+    img.src = item.img_url;
+    return;
+  }
+  img.src = FALLBACK_IMAGE_SVG;
+}